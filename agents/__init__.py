@@ -3,11 +3,16 @@
 Agent Module Exports
 Exposes all agent classes for clean imports like:
 from ai.agents import QAAgent, WellnessAgent, SchedulerAgent
+Agents are imported on first attribute access (PEP 562), so a worker that
+only uses WellnessAgent never loads Chroma or the QA stack.
 """
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-from .qa_agent import QAAgent
-from .wellness_agent import WellnessAgent
-from .scheduler_agent import SchedulerAgent
+if TYPE_CHECKING:
+    from .qa_agent import QAAgent
+    from .wellness_agent import WellnessAgent
+    from .scheduler_agent import SchedulerAgent
 
 # Optional: Version tracking
 __version__ = "1.0.0"
@@ -19,6 +24,24 @@ __all__ = [
     "SchedulerAgent"
 ]
 
+# Exported name -> defining submodule
+_LAZY = {
+    "QAAgent": ".qa_agent",
+    "WellnessAgent": ".wellness_agent",
+    "SchedulerAgent": ".scheduler_agent"
+}
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
+
 # Optional: Package-level initialization
 def init_agents():
     """Pre-load models or verify dependencies"""
@@ -1,34 +1,76 @@
 # ai/agents/qa_agent.py
-from typing import List, Dict, Optional
+import asyncio
+import logging
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Iterator, AsyncIterator, Tuple
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OllamaEmbeddings
-from ai.chains.base_chain import BaseChain
+from ai.chains.base_chain import BaseChain, StreamTimer, LLM_PARAMS
+from ai.chains.answer_cache import SemanticAnswerCache
+from ai.chains.context_assembler import ContextAssembler
+from ai.tools.bm25_index import BM25Index, HybridRetriever, unit_l2_relevance
+from ai.tools.tracing import span, count
+from ai.tools.ingestion import (
+    iter_files, iter_file_pages, iter_chunks, with_chunk_ids, batched, embed_batches,
+    content_hash, file_hash, chunk_id, IngestManifest, Piece
+)
+
+# Kept inside persist_dir, alongside the vectors they describe
+MANIFEST_NAME = "ingest_manifest.json"
+BM25_NAME = "bm25_index.json"
+
+logger = logging.getLogger(__name__)
 
 class QAAgent(BaseChain):
     """
     Enhanced Q&A Agent with:
-    - Document ingestion capability
-    - Dual-path answering (RAG + general knowledge)
+    - Document ingestion capability (streamed, chunked, batched)
+    - Incremental re-sync of knowledge_base (content-hash manifest)
+    - Dual-path answering (RAG + general knowledge), routed by the best
+      hybrid (BM25 + vector) retrieval score
+    - Chroma or memory-mapped (MmapVectorStore) vector backend
+    - Optional semantic answer cache for near-duplicate questions
+    - Token streaming (stream_answer / astream_answer)
+    - Async answering with bounded concurrency (aanswer)
     """
     
-    def __init__(self, persist_dir: str = "chroma_db"):
+    def __init__(
+        self,
+        persist_dir: str = "chroma_db",
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        rag_threshold: float = 0.3,
+        vector_backend: str = "chroma",
+        context_assembler: Optional[ContextAssembler] = None
+    ):
+        """
+        Args:
+            persist_dir: Vector store, BM25 index and ingest manifest location
+            answer_cache: Optional semantic cache of generated answers
+            rag_threshold: Lowest fused retrieval score (0..1) worth answering from our materials
+            vector_backend: "chroma", or "mmap" for a memory-mapped float32 matrix whose
+                pages are shared by every worker process (see MmapVectorStore)
+            context_assembler: Builds the token-budgeted RAG context (default: sized to num_ctx)
+        """
         super().__init__()
+        if vector_backend not in ("chroma", "mmap"):
+            raise ValueError(f"Unknown vector backend: {vector_backend!r}")
         self.persist_dir = persist_dir
-        
-        # Initialize ChromaDB
-        self.vector_db = Chroma(
-            embedding_function=self.embedder,
-            persist_directory=persist_dir
-        )
-        
-        # Setup retrievers
-        self.retriever = self.vector_db.as_retriever(
-            search_type="mmr",
-            search_kwargs={"k": 3}
-        )
+        self.answer_cache = answer_cache
+        self.rag_threshold = rag_threshold
+        self.vector_backend = vector_backend
+        self.context_assembler = context_assembler or ContextAssembler(num_ctx=LLM_PARAMS["num_ctx"])
+
+        # Size of the most recent RAG context (see AssembledContext)
+        self.last_context_stats: Optional[Dict] = None
+        self._template_tokens: Optional[int] = None
+
+        # Vector store, BM25 index and retriever are opened on first use
+        self._vector_db = None
+        self._bm25: Optional[BM25Index] = None
+        self._retriever: Optional[HybridRetriever] = None
         
         # Prompt templates
         self.general_prompt = ChatPromptTemplate.from_template("""
@@ -44,44 +86,408 @@ class QAAgent(BaseChain):
         If the context doesn't help, say "I don't see this in our materials, but generally..." 
         and provide a general answer.""")
 
-    def ingest_documents(self, texts: List[str], metadata: Optional[List[Dict]] = None):
-        """Add documents to the knowledge base"""
+    @property
+    def vector_db(self):
+        """Chroma or MmapVectorStore over persist_dir, opened on first access"""
+        if self._vector_db is None:
+            with self._lazy_lock:
+                if self._vector_db is None:
+                    if self.vector_backend == "mmap":
+                        from ai.tools.mmap_store import MmapVectorStore
+                        self._vector_db = MmapVectorStore(self.persist_dir, embedding=self.embedder)
+                    else:
+                        try:
+                            from langchain_chroma import Chroma
+                        except ImportError:  # Older installs; same public API
+                            from langchain_community.vectorstores import Chroma
+                        self._vector_db = Chroma(
+                            embedding_function=self.embedder,
+                            persist_directory=self.persist_dir,
+                            relevance_score_fn=unit_l2_relevance
+                        )
+        return self._vector_db
+
+    @property
+    def bm25(self) -> BM25Index:
+        """Lexical index kept in step with the vector store, loaded on first access"""
+        if self._bm25 is None:
+            with self._lazy_lock:
+                if self._bm25 is None:
+                    index = BM25Index.load(Path(self.persist_dir) / BM25_NAME)
+                    if not len(index) and self._has_vectors():
+                        self._index_vectors(index)  # Store ingested before the index existed
+                    self._bm25 = index
+        return self._bm25
+
+    @property
+    def retriever(self) -> HybridRetriever:
+        """Hybrid retriever over vector_db and bm25"""
+        if self._retriever is None:
+            with self._lazy_lock:
+                if self._retriever is None:
+                    self._retriever = HybridRetriever(
+                        vector_store=self.vector_db,
+                        index=self.bm25,
+                        k=3,
+                        min_score=self.rag_threshold,
+                        mmr_lambda=0.5  # Diverse top chunks, as the MMR retriever gave before
+                    )
+        return self._retriever
+
+    def ingest_documents(
+        self,
+        texts: Iterable[str],
+        metadata: Optional[Iterable[Dict]] = None,
+        **pipeline_kwargs
+    ) -> Dict:
+        """Add documents to the knowledge base (chunked, see ingest_pieces)"""
         if metadata is None:
-            metadata = [{}] * len(texts)
-        self.vector_db.add_texts(texts=texts, metadatas=metadata)
-        self.vector_db.persist()
-        print(f"✅ Ingested {len(texts)} documents")
+            pieces = ((text, {"source": "inline"}) for text in texts)
+        else:
+            pieces = zip(texts, metadata)
+        return self.ingest_pieces(pieces, **pipeline_kwargs)
+
+    def ingest_directory(self, root: str = "ai/knowledge_base", **pipeline_kwargs) -> Dict:
+        """Stream every Markdown/PDF page under root into the knowledge base"""
+        return self.sync_directory(root, **pipeline_kwargs)
+
+    def sync_directory(
+        self,
+        root: str = "ai/knowledge_base",
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        batch_size: int = 64,
+        workers: int = 4
+    ) -> Dict:
+        """
+        Incrementally sync a directory into the vector store.
+        Unchanged files (same sha256) are skipped without reading their
+        chunks; changed files only embed chunks whose text is new, and
+        vectors for removed chunks/files are deleted.
+        """
+        start = time.perf_counter()
+        manifest = IngestManifest(Path(self.persist_dir) / MANIFEST_NAME)
+        params = {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
+        same_params = manifest.params == params
+
+        report = {
+            "added": [], "changed": [], "unchanged": [], "deleted": [],
+            "chunks_embedded": 0, "chunks_skipped": 0, "chunks_removed": 0
+        }
+        seen, stale_ids, updated = set(), [], {}
+
+        def changed_chunks():
+            for path in iter_files(root):
+                source = str(path)
+                seen.add(source)
+                digest = file_hash(path)
+                old = manifest.files.get(source)
+                if old and same_params and old["sha256"] == digest:
+                    report["unchanged"].append(source)
+                    report["chunks_skipped"] += len(old["chunks"])
+                    continue
+
+                old_chunks = old["chunks"] if old else {}
+                chunks, occurrences = {}, Counter()
+                for text, metadata in iter_chunks(iter_file_pages(path), chunk_size, chunk_overlap):
+                    text_hash = content_hash(text)
+                    occurrences[text_hash] += 1
+                    cid = chunk_id(source, text_hash, occurrences[text_hash])
+                    chunks[cid] = text_hash
+                    if cid in old_chunks:
+                        report["chunks_skipped"] += 1
+                        continue
+                    yield text, {**metadata, "chunk_id": cid}
+
+                stale_ids.extend(cid for cid in old_chunks if cid not in chunks)
+                updated[source] = {"sha256": digest, "chunks": chunks}
+                report["changed" if old else "added"].append(source)
+
+        report["chunks_embedded"] = self._embed_and_store(changed_chunks(), batch_size, workers)
+
+        for source in set(manifest.files) - seen:
+            report["deleted"].append(source)
+            stale_ids.extend(manifest.files.pop(source)["chunks"])
+        self._delete_ids(stale_ids)
+        report["chunks_removed"] = len(stale_ids)
+        self._persist()
+
+        manifest.files.update(updated)
+        manifest.params = params
+        manifest.save()
+
+        report["seconds"] = time.perf_counter() - start
+        print(
+            f"✅ Synced {root}: {len(report['added'])} added, {len(report['changed'])} changed, "
+            f"{len(report['unchanged'])} unchanged, {len(report['deleted'])} deleted "
+            f"({report['chunks_embedded']} chunks embedded, {report['chunks_skipped']} skipped)"
+        )
+        return report
+
+    def ingest_pieces(
+        self,
+        pieces: Iterable[Piece],
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        batch_size: int = 64,
+        workers: int = 4
+    ) -> Dict:
+        """
+        Ingestion pipeline: chunk -> batch -> embed on a worker pool -> store.
+        Pieces are consumed lazily, so memory stays flat for any corpus size.
+        The vector store is persisted once, at the end.
+        """
+        start = time.perf_counter()
+        chunks = with_chunk_ids(iter_chunks(pieces, chunk_size, chunk_overlap))
+        total = self._embed_and_store(chunks, batch_size, workers)
+        self._persist()
+
+        elapsed = time.perf_counter() - start
+        print(f"✅ Ingested {total} chunks")
+        return {
+            "chunks": total,
+            "seconds": elapsed,
+            "chunks_per_second": total / elapsed if elapsed else 0.0
+        }
+
+    def _embed_and_store(self, chunks: Iterable[Piece], batch_size: int, workers: int) -> int:
+        """Embed chunks in batches on a worker pool and store them, return count"""
+        total = 0
+        for batch, embeddings in embed_batches(
+            self.embedder.embed_documents, batched(chunks, batch_size), workers
+        ):
+            self._add_embedded(batch, embeddings)
+            total += len(batch)
+        return total
+
+    def _add_embedded(self, batch: List[Piece], embeddings: List[List[float]]) -> List[str]:
+        """Store an embedded batch (upsert by chunk id)"""
+        ids = [metadata["chunk_id"] for _, metadata in batch]
+        texts = [text for text, _ in batch]
+        metadatas = [metadata for _, metadata in batch]
+        if self.vector_backend == "mmap":
+            self.vector_db.upsert(ids, embeddings, texts, metadatas)
+        else:
+            # Chroma embeds through self.embedder again; the batch was just
+            # embedded by the worker pool, so that is a cache hit
+            self.vector_db.add_texts(texts, metadatas=metadatas, ids=ids)
+        self.bm25.add(ids, texts, metadatas)
+        return ids
+
+    def _delete_ids(self, ids: List[str]) -> None:
+        """Remove vectors by chunk id"""
+        if self.vector_backend == "mmap":
+            self.vector_db.delete(ids)
+        else:
+            for batch in batched(ids, 5000):
+                self.vector_db.delete(ids=batch)
+        self.bm25.remove(ids)
+
+    def _has_vectors(self) -> bool:
+        if self.vector_backend == "mmap":
+            return len(self.vector_db) > 0
+        return bool(self.vector_db.get(limit=1, include=[])["ids"])
+
+    def _persist(self) -> None:
+        """Flush the mmap store and BM25 index to disk (Chroma persists on write)"""
+        if self.vector_backend == "mmap":
+            self.vector_db.save()
+        self.bm25.save()
+
+    def rebuild_bm25(self, page_size: int = 5000) -> int:
+        """Re-index every chunk in the vector store, return count"""
+        return self._index_vectors(self.bm25, page_size)
+
+    def _index_vectors(self, index: BM25Index, page_size: int = 5000) -> int:
+        index.remove(list(index.docs))
+        if self.vector_backend == "mmap":
+            store = self.vector_db
+            index.add(list(store.ids), list(store.texts), list(store.metadatas))
+            index.save()
+            return len(store)
+        offset = 0
+        while True:
+            page = self.vector_db.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            metadatas = [m or {} for m in page["metadatas"]]
+            index.add(page["ids"], page["documents"], metadatas)
+            offset += len(page["ids"])
+        index.save()
+        return offset
 
     def should_use_rag(self, question: str) -> bool:
-        """Determine if question should use RAG"""
-        triggers = ["book", "text", "chapter", "page", "lecture", "note"]
-        return any(trigger in question.lower() for trigger in triggers)
+        """Determine if question should use RAG (best fused retrieval score >= rag_threshold)"""
+        return self.retriever.top_score(question) >= self.rag_threshold
 
     def answer(self, question: str) -> str:
         """Smart answering with automatic fallback"""
+        with span("qa.answer") as s:
+            try:
+                docs = self._retrieve(question)
+                cache_key, cached = self._check_cache(question, docs)
+                if cached is not None:
+                    return cached
+
+                result = self._answer_chain(docs).invoke(question)
+                self._remember(cache_key, result)
+                return result
+
+            except Exception as e:
+                s.fail(e)
+                logger.exception("Failed to answer question")
+                return f"⚠️ Error processing your question: {str(e)}"
+
+    async def aanswer(self, question: str) -> str:
+        """Async answer(); model calls go through the shared limiter"""
+        with span("qa.answer") as s:
+            try:
+                docs = await self._aretrieve(question)
+                cache_key, cached = await self._acheck_cache(question, docs)
+                if cached is not None:
+                    return cached
+
+                await self._allm()
+                result = await self.limiter.run(lambda: self._answer_chain(docs).ainvoke(question))
+                self._remember(cache_key, result)
+                return result
+
+            except asyncio.TimeoutError as e:
+                s.fail(e)
+                logger.warning("Model timed out answering a question")
+                return "⚠️ Error processing your question: the model took too long to respond"
+            except Exception as e:
+                s.fail(e)
+                logger.exception("Failed to answer question")
+                return f"⚠️ Error processing your question: {str(e)}"
+
+    def stream_answer(self, question: str, timer: Optional[StreamTimer] = None) -> Iterator[str]:
+        """
+        answer(), yielding tokens as they are generated.
+        A timer passed in also times retrieval (TTFT runs from its creation).
+        """
         try:
-            if self.should_use_rag(question):
-                docs = self.retriever.invoke(question)
-                if docs:
-                    rag_chain = (
-                        {"context": lambda _: docs, "question": RunnablePassthrough()}
-                        | self.rag_prompt
-                        | self.llm
-                        | StrOutputParser()
-                    )
-                    return rag_chain.invoke(question)
-            
-            # Fallback to general knowledge
-            general_chain = (
-                {"question": RunnablePassthrough()}
-                | self.general_prompt
+            docs = self._retrieve(question)
+            cache_key, cached = self._check_cache(question, docs)
+            if cached is not None:
+                yield cached
+                return
+
+            parts = []
+            for token in self._timed_stream(self._answer_chain(docs).stream(question), timer):
+                parts.append(token)
+                yield token
+            self._remember(cache_key, "".join(parts))
+
+        except Exception as e:
+            count("errors", stage="qa.stream_answer")
+            logger.exception("Failed to stream answer")
+            yield f"⚠️ Error processing your question: {str(e)}"
+
+    async def astream_answer(self, question: str, timer: Optional[StreamTimer] = None) -> AsyncIterator[str]:
+        """Async iterator version of stream_answer()"""
+        try:
+            docs = await self._aretrieve(question)
+            cache_key, cached = await self._acheck_cache(question, docs)
+            if cached is not None:
+                yield cached
+                return
+
+            await self._allm()
+            parts = []
+            tokens = self.limiter.stream(self._answer_chain(docs).astream(question))
+            async for token in self._atimed_stream(tokens, timer):
+                parts.append(token)
+                yield token
+            self._remember(cache_key, "".join(parts))
+
+        except asyncio.TimeoutError:
+            count("errors", stage="qa.stream_answer")
+            logger.warning("Model timed out streaming an answer")
+            yield "⚠️ Error processing your question: the model took too long to respond"
+        except Exception as e:
+            count("errors", stage="qa.stream_answer")
+            logger.exception("Failed to stream answer")
+            yield f"⚠️ Error processing your question: {str(e)}"
+
+    def _retrieve(self, question: str) -> List:
+        """Chunks that clear rag_threshold (empty list -> general answer)"""
+        with span("retrieval") as s:
+            docs = self.retriever.invoke(question)
+            s.set(docs=len(docs))
+            return docs
+
+    async def _aretrieve(self, question: str) -> List:
+        """Async retrieval for questions routed to RAG (empty list otherwise)"""
+        with span("retrieval") as s:
+            # First use opens the vector store and checks the embedding model: keep it off the loop
+            retriever = self._retriever or await asyncio.to_thread(lambda: self.retriever)
+            docs = await self.limiter.run(lambda: retriever.ainvoke(question))
+            s.set(docs=len(docs))
+            return docs
+
+    async def _acheck_cache(self, question: str, docs: List) -> Tuple[Optional[tuple], Optional[str]]:
+        """_check_cache() off the event loop; embedding the question takes a limiter slot"""
+        if self.answer_cache is None:
+            return None, None
+        return await self.limiter.run(lambda: asyncio.to_thread(self._check_cache, question, docs))
+
+    def _answer_chain(self, docs: List):
+        """RAG chain over the retrieved docs, or the general-knowledge fallback"""
+        if docs:
+            return (
+                {"context": lambda question: self._context(question, docs), "question": RunnablePassthrough()}
+                | self.rag_prompt
                 | self.llm
                 | StrOutputParser()
             )
-            return general_chain.invoke(question)
-            
-        except Exception as e:
-            return f"⚠️ Error processing your question: {str(e)}"
+        # Fallback to general knowledge
+        return (
+            {"question": RunnablePassthrough()}
+            | self.general_prompt
+            | self.llm
+            | StrOutputParser()
+        )
+
+    def _context(self, question: str, docs: List) -> str:
+        """Compact page-content-only context that fits the model's window"""
+        if self._template_tokens is None:
+            self._template_tokens = self.context_assembler.count_tokens(
+                self.rag_prompt.format(context="", question="")
+            )
+        with span("context", chunks=len(docs)) as s:
+            context = self.context_assembler.assemble(question, docs, self._template_tokens)
+            s.set(tokens=context.tokens, tokens_saved=context.tokens_saved)
+        self.last_context_stats = {**context._asdict(), "tokens_saved": context.tokens_saved}
+        return context.text
+
+    def _check_cache(self, question: str, docs: List) -> Tuple[Optional[tuple], Optional[str]]:
+        """
+        Look the question up in the answer cache.
+        Returns (key to store the fresh answer under, cached answer or None).
+        """
+        if self.answer_cache is None:
+            return None, None
+        route = "rag" if docs else "general"
+        question_vec = self.embedder.embed_query(question)
+        doc_ids = [self._doc_key(d) for d in docs]
+        key = (question_vec, route, doc_ids)
+        cached = self.answer_cache.lookup(*key)
+        count("answer_cache", hit=cached is not None)
+        return key, cached
+
+    def _remember(self, cache_key: Optional[tuple], answer: str) -> None:
+        if cache_key is not None:
+            self.answer_cache.store(*cache_key, answer)
+
+    @staticmethod
+    def _doc_key(doc) -> str:
+        """Stable id of a retrieved chunk (changes when its text changes)"""
+        return (
+            getattr(doc, "id", None)
+            or doc.metadata.get("chunk_id")
+            or content_hash(doc.page_content)
+        )
 
 # Test cases
 if __name__ == "__main__":
@@ -94,6 +500,7 @@ if __name__ == "__main__":
         "DNA replication happens during S-phase"
     ]
     qa.ingest_documents(test_docs)
+    qa.ingest_directory("ai/knowledge_base")
     
     # Test queries
     print(qa.answer("Where does photosynthesis occur?"))  # From documents
@@ -1,8 +1,25 @@
 # ai/agents/scheduler_agent.py
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Literal
+from pathlib import Path
+from typing import List, Dict, Literal, Optional, Tuple
 from ai.chains.base_chain import BaseChain
-from pydantic import BaseModel
+from ai.chains.decomposition_cache import DecompositionCache, normalize_goal
+from ai.tools.schedule_engine import SchedulePlan, build_schedule, format_schedule
+from ai.tools.tracing import count, traced
+from pydantic import BaseModel, Field, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Default decomposition cache, anchored to the package (DECOMPOSITION_CACHE_PATH overrides it)
+DECOMPOSITION_CACHE_PATH = str(Path(__file__).resolve().parent.parent / "database" / "decomposition_cache.db")
+
+# LLM attempts per goal: the first reply plus one retry with the validation error
+DECOMPOSE_ATTEMPTS = 2
 
 class StudyTask(BaseModel):
     topic: str
@@ -10,16 +27,29 @@ class StudyTask(BaseModel):
     priority: Literal["high", "medium", "low"]
     deadline: datetime
 
+class TaskSpec(BaseModel):
+    topic: str = Field(min_length=1)
+    hours: float = Field(gt=0)
+
+class TaskBreakdown(BaseModel):
+    """Schema the LLM's goal decomposition must satisfy"""
+    tasks: List[TaskSpec] = Field(min_length=1, max_length=10)
+
 class SchedulerAgent(BaseChain):
     """
     Dynamic study planner with:
-    - Deadline-aware scheduling
+    - Deadline-aware scheduling (earliest deadline first, see schedule_engine)
     - Priority-based task allocation
+    - Subject-weighted durations
     - Cognitive load balancing
+    - Async planning with bounded concurrency (aplan_study)
+    - Bulk cohort planning with deduplicated, parallel decomposition (plan_many)
+    - Persistent decomposition cache (DECOMPOSITION_CACHE_PATH, empty = memory only)
     """
     
-    def __init__(self):
+    def __init__(self, decomposition_cache: Optional[DecompositionCache] = None):
         super().__init__()
+        self._decomposition_cache = decomposition_cache  # Opened on first use
         self.max_daily_study = 240  # 4 hours/day max
         self.subject_weights = {
             "math": 1.5,    # Hard subjects get more time
@@ -27,71 +57,188 @@ class SchedulerAgent(BaseChain):
             "coding": 1.3
         }
 
-    def decompose_goal(self, goal: str, total_hours: int) -> List[StudyTask]:
-        """Break goal into subtasks using LLM"""
-        prompt = f"""Break this study goal into 3-5 subtasks:
+    @property
+    def decomposition_cache(self) -> DecompositionCache:
+        """Persistent decomposition cache, opened on first access"""
+        if self._decomposition_cache is None:
+            with self._lazy_lock:
+                if self._decomposition_cache is None:
+                    self._decomposition_cache = DecompositionCache(
+                        os.getenv("DECOMPOSITION_CACHE_PATH", DECOMPOSITION_CACHE_PATH) or None
+                    )
+        return self._decomposition_cache
+
+    def _decompose_prompt(self, goal: str, total_hours: int) -> str:
+        return f"""Break this study goal into 3-5 subtasks:
         Goal: "{goal}" (Total: {total_hours}h)
         
         Respond as JSON:
         {{"tasks": [{{"topic": "...", "hours": float}}]}}"""
-        
+
+    def _retry_prompt(self, goal: str, total_hours: int, error: str) -> str:
+        return (
+            self._decompose_prompt(goal, total_hours)
+            + f"\n\nYour previous reply was rejected ({error}). "
+            "Reply with the JSON object only, no other text."
+        )
+
+    @staticmethod
+    @traced("parse.breakdown")
+    def _parse_breakdown(result: str) -> TaskBreakdown:
+        """
+        Strictly parse the LLM's reply (raises ValueError if malformed).
+        Tolerates prose or code fences around the JSON object.
+        """
+        match = re.search(r"\{.*\}", result, re.DOTALL)
+        if match is None:
+            raise ValueError("no JSON object in reply")
+        return TaskBreakdown.model_validate_json(match.group())
+
+    @staticmethod
+    def _reject_reason(error: ValueError) -> str:
+        """Short explanation of a parse failure, fed back to the LLM"""
+        if isinstance(error, ValidationError):
+            first = error.errors()[0]
+            return f"{'.'.join(map(str, first['loc'])) or 'reply'}: {first['msg']}"
+        return str(error)
+
+    def _parse_tasks(self, result: str) -> List[StudyTask]:
+        """Turn the LLM's task breakdown into StudyTasks (raises if malformed)"""
+        return self._to_tasks(self._parse_breakdown(result))
+
+    @staticmethod
+    def _to_tasks(breakdown: TaskBreakdown) -> List[StudyTask]:
+        return [
+            StudyTask(
+                topic=t.topic,
+                duration=int(t.hours * 60),
+                priority="high" if i == 0 else "medium",  # First task = highest priority
+                deadline=datetime.now() + timedelta(days=3)  # Temp deadline
+            )
+            for i, t in enumerate(breakdown.tasks)
+        ]
+
+    def _fallback_tasks(self, goal: str) -> List[StudyTask]:
+        """Single default task when decomposition fails"""
+        return [
+            StudyTask(
+                topic=goal,
+                duration=120,
+                priority="high",
+                deadline=datetime.now() + timedelta(days=1)
+            )
+        ]
+
+    def decompose_goal(self, goal: str, total_hours: int) -> List[StudyTask]:
+        """Break goal into subtasks using LLM"""
+        return self._decompose(goal, total_hours)[0]
+
+    def _decompose(self, goal: str, total_hours: int) -> Tuple[List[StudyTask], Dict]:
+        """
+        decompose_goal() plus what it took: {"llm_calls", "cached", "fallback"}.
+        Cached breakdowns skip the LLM; a reply that fails validation is
+        retried once with the error attached.
+        """
+        tasks, outcome = self._start_decomposition(goal, total_hours)
+        if tasks is not None:
+            return tasks, outcome
+
+        prompt = self._decompose_prompt(goal, total_hours)
+        try:
+            for _ in range(DECOMPOSE_ATTEMPTS):
+                outcome["llm_calls"] += 1
+                reply = self.llm.invoke(prompt)
+                tasks, prompt = self._accept_reply(goal, total_hours, reply)
+                if tasks is not None:
+                    return tasks, outcome
+        except Exception as e:
+            return self._fall_back(goal, outcome, e)
+        return self._fall_back(goal, outcome)
+
+    async def adecompose_goal(self, goal: str, total_hours: int) -> List[StudyTask]:
+        """Async decompose_goal(), bounded by the shared limiter"""
+        return (await self._adecompose(goal, total_hours))[0]
+
+    async def _adecompose(self, goal: str, total_hours: int) -> Tuple[List[StudyTask], Dict]:
+        """Async _decompose(): same steps, model calls go through the limiter"""
+        tasks, outcome = self._start_decomposition(goal, total_hours)
+        if tasks is not None:
+            return tasks, outcome
+
+        prompt = self._decompose_prompt(goal, total_hours)
         try:
-            result = self.llm.invoke(prompt)
-            tasks = eval(result)["tasks"]  # Simple parsing (use JSON loader in prod)
-            return [
-                StudyTask(
-                    topic=t["topic"],
-                    duration=int(t["hours"] * 60),
-                    priority="high" if i == 0 else "medium",  # First task = highest priority
-                    deadline=datetime.now() + timedelta(days=3)  # Temp deadline
-                )
-                for i, t in enumerate(tasks)
-            ]
+            llm = await self._allm()
+            for _ in range(DECOMPOSE_ATTEMPTS):
+                outcome["llm_calls"] += 1
+                reply = await self.limiter.run(lambda: llm.ainvoke(prompt))
+                tasks, prompt = self._accept_reply(goal, total_hours, reply)
+                if tasks is not None:
+                    return tasks, outcome
         except Exception as e:
-            # Fallback to default tasks
-            return [
-                StudyTask(
-                    topic=goal,
-                    duration=120,
-                    priority="high",
-                    deadline=datetime.now() + timedelta(days=1)
-                )
-            ]
+            return self._fall_back(goal, outcome, e)
+        return self._fall_back(goal, outcome)
+
+    def _start_decomposition(self, goal: str, total_hours: int) -> Tuple[Optional[List[StudyTask]], Dict]:
+        """Cached tasks (or None) and a fresh outcome record"""
+        outcome = {"llm_calls": 0, "cached": False, "fallback": False}
+        cached = self._cached_breakdown(goal, total_hours)
+        if cached is None:
+            return None, outcome
+        outcome["cached"] = True
+        return self._to_tasks(cached), outcome
+
+    def _accept_reply(self, goal: str, total_hours: int, reply: str) -> Tuple[Optional[List[StudyTask]], Optional[str]]:
+        """
+        Parse-and-retry step: tasks from a valid reply (which is cached), or
+        None and the prompt to retry with, explaining what was wrong
+        """
+        try:
+            return self._to_tasks(self._remember(goal, total_hours, reply)), None
+        except (ValueError, ValidationError) as e:
+            count("decompose.rejected")
+            return None, self._retry_prompt(goal, total_hours, self._reject_reason(e))
+
+    def _fall_back(
+        self,
+        goal: str,
+        outcome: Dict,
+        error: Optional[Exception] = None
+    ) -> Tuple[List[StudyTask], Dict]:
+        """Default task when the model is unreachable or never gave a valid breakdown"""
+        if error is not None:
+            logger.warning("Goal decomposition failed; using the default task", exc_info=error)
+        outcome["fallback"] = True
+        count("decompose.fallback")
+        return self._fallback_tasks(goal), outcome
+
+    def _cached_breakdown(self, goal: str, total_hours: int) -> Optional[TaskBreakdown]:
+        tasks = self.decomposition_cache.get(goal, total_hours, self.llm_model)
+        count("decomposition_cache", hit=tasks is not None)
+        if tasks is None:
+            return None
+        try:
+            return TaskBreakdown.model_validate({"tasks": tasks})
+        except ValidationError:
+            return None  # e.g. rescaling rounded a task down to 0h
+
+    def _remember(self, goal: str, total_hours: int, result: str) -> TaskBreakdown:
+        """Validate an LLM reply and cache it (raises ValueError if malformed)"""
+        breakdown = self._parse_breakdown(result)
+        self.decomposition_cache.put(goal, total_hours, self.llm_model, breakdown.model_dump()["tasks"])
+        return breakdown
+
+    def build_schedule(self, tasks: List[StudyTask], available_days: int) -> SchedulePlan:
+        """Structured plan honouring deadlines, subject weights and the daily cap"""
+        return build_schedule(
+            tasks,
+            available_days,
+            max_daily=self.max_daily_study,
+            subject_weights=self.subject_weights
+        )
 
     def generate_schedule(self, tasks: List[StudyTask], available_days: int) -> Dict[str, List[str]]:
         """Create daily timetable with cognitive load balancing"""
-        schedule = {}
-        remaining_tasks = tasks.copy()
-        
-        for day in range(available_days):
-            date = (datetime.now() + timedelta(days=day)).strftime("%Y-%m-%d")
-            schedule[date] = []
-            daily_minutes = 0
-            
-            # Process high-priority tasks first
-            for priority in ["high", "medium", "low"]:
-                for task in remaining_tasks[:]:  # Iterate copy for safe removal
-                    if task.priority == priority:
-                        alloc_min = min(
-                            task.duration,
-                            self.max_daily_study - daily_minutes
-                        )
-                        
-                        if alloc_min > 0:
-                            schedule[date].append(
-                                f"{task.topic} ({alloc_min}min)"
-                            )
-                            daily_minutes += alloc_min
-                            task.duration -= alloc_min
-                            
-                            if task.duration <= 0:
-                                remaining_tasks.remove(task)
-            
-            # Add break slots
-            if schedule[date]:
-                schedule[date].append("15min break")
-        
-        return schedule
+        return format_schedule(self.build_schedule(tasks, available_days))
 
     def plan_study(self, goal: str, days_until_deadline: int) -> Dict:
         """End-to-end planning pipeline"""
@@ -99,6 +246,59 @@ class SchedulerAgent(BaseChain):
         tasks = self.decompose_goal(goal, total_hours)
         return self.generate_schedule(tasks, days_until_deadline)
 
+    async def aplan_study(self, goal: str, days_until_deadline: int) -> Dict:
+        """Async plan_study()"""
+        total_hours = min(days_until_deadline * 4, 40)  # Cap at 40h total
+        tasks = await self.adecompose_goal(goal, total_hours)
+        return self.generate_schedule(tasks, days_until_deadline)
+
+    def plan_many(self, goals: Dict[str, Tuple[str, int]], max_workers: int = 4) -> Dict:
+        """
+        Plan for a whole cohort: {student_id: (goal, days_until_deadline)}.
+        Each distinct (goal, total hours) pair is decomposed once, on a pool of
+        max_workers threads. Returns {"schedules": {student_id: schedule}, "stats": {...}}
+        """
+        start = time.perf_counter()
+        hours = {
+            student: min(days * 4, 40)  # Same cap as plan_study
+            for student, (_, days) in goals.items()
+        }
+        unique: Dict[Tuple[str, int], str] = {}  # key -> goal text to send
+        for student, (goal, _) in goals.items():
+            unique.setdefault((normalize_goal(goal), hours[student]), goal)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                key: pool.submit(self._decompose, goal, key[1])
+                for key, goal in unique.items()
+            }
+            decomposed = {key: future.result() for key, future in futures.items()}
+        decompose_seconds = time.perf_counter() - start
+
+        schedules = {
+            student: self.generate_schedule(
+                decomposed[(normalize_goal(goal), hours[student])][0], days
+            )
+            for student, (goal, days) in goals.items()
+        }
+        outcomes = [outcome for _, outcome in decomposed.values()]
+        return {
+            "schedules": schedules,
+            "stats": {
+                "students": len(goals),
+                "unique_goals": len(unique),
+                "deduplicated": len(goals) - len(unique),
+                "llm_calls": sum(o["llm_calls"] for o in outcomes),
+                "retries": sum(o["llm_calls"] > 1 for o in outcomes),
+                "fallbacks": sum(o["fallback"] for o in outcomes),
+                "cache_hits": sum(o["cached"] for o in outcomes),
+                "cache": self.decomposition_cache.stats(),
+                "decompose_seconds": decompose_seconds,
+                "schedule_seconds": time.perf_counter() - start - decompose_seconds,
+                "total_seconds": time.perf_counter() - start
+            }
+        }
+
 # Test implementation
 if __name__ == "__main__":
     agent = SchedulerAgent()
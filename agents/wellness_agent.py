@@ -1,7 +1,17 @@
 # ai/agents/wellness_agent.py
-from typing import Literal
+import asyncio
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal, Iterator, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 from enum import Enum
 from ai.chains.base_chain import BaseChain
+from ai.tools.ingestion import batched
+from ai.tools.mood_classifier import MoodClassifier, lexical_mood
+from ai.tools.tracing import span, traced
+
+logger = logging.getLogger(__name__)
 
 class WellnessState(Enum):
     STRESSED = "stressed"
@@ -9,16 +19,109 @@ class WellnessState(Enum):
     CALM = "calm"
     UNKNOWN = "unknown"
 
+class MoodBatcher:
+    """
+    Coalesces concurrent single mood classifications:
+    - Calls arriving within `window` seconds share one batched prompt
+    - A batch is sent early once it holds max_batch messages
+    Futures are bound to the event loop that submitted them, so use one
+    batcher per loop.
+    """
+
+    def __init__(
+        self,
+        classify_many: Callable[[List[str]], Awaitable[List[WellnessState]]],
+        window: float = 0.01,
+        max_batch: int = 16
+    ):
+        self.classify_many = classify_many
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()  # Strong refs until each batch finishes
+        self.submitted = 0
+        self.batches = 0
+
+    async def submit(self, text: str) -> WellnessState:
+        """Queue one message and wait for its batch to be classified"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.submitted += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches += 1
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            moods = await self.classify_many([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), mood in zip(batch, moods):
+            if not future.done():  # Caller may have been cancelled
+                future.set_result(mood)
+
+    def stats(self) -> Dict:
+        """How well calls are being coalesced"""
+        return {
+            "submitted": self.submitted,
+            "batches": self.batches,
+            "avg_batch_size": self.submitted / self.batches if self.batches else 0.0
+        }
+
 class WellnessAgent(BaseChain):
     """
     Mental health support agent with:
     - Sentiment analysis
     - Stress detection
     - Personalized coping strategies
+    - Streaming responses (stream_pipeline / astream_pipeline); replies are
+      templated, not generated, so they stream line by line without timing
+    - Async pipeline with bounded concurrency (afull_pipeline)
+    - Batch classification (analyze_moods) and opt-in coalescing of
+      concurrent aanalyze_mood() calls (batch_window)
+    - Local keyword/embedding classifier in front of the LLM; only
+      ambiguous messages reach the model (see mood_classifier.stats())
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        batch_window: Optional[float] = None,
+        max_batch: int = 16,
+        local_classifier: bool = True
+    ):
+        """
+        Args:
+            batch_window: Seconds to collect concurrent aanalyze_mood() calls
+                into one prompt (None = classify each call on its own)
+            max_batch: Most messages per batched prompt
+            local_classifier: Try the keyword and embedding stages before the LLM
+        """
         super().__init__()
+        self.max_batch = max_batch
+        self.local_classifier = local_classifier
+        self._mood_classifier: Optional[MoodClassifier] = None
+        self.mood_batcher = (
+            MoodBatcher(self._aclassify_batch, batch_window, max_batch)
+            if batch_window is not None else None
+        )
         self.coping_strategies = {
             WellnessState.STRESSED: [
                 "Try the 5-4-3-2-1 grounding technique",
@@ -32,9 +135,8 @@ class WellnessAgent(BaseChain):
             ]
         }
 
-    def analyze_mood(self, text: str) -> WellnessState:
-        """Detect emotional state using LLM"""
-        prompt = f"""Classify this student message into exactly one of these categories:
+    def _mood_prompt(self, text: str) -> str:
+        return f"""Classify this student message into exactly one of these categories:
         - "stressed" (overwhelmed with work)
         - "anxious" (nervous about performance)
         - "calm" (positive/neutral)
@@ -42,15 +144,161 @@ class WellnessAgent(BaseChain):
         Message: "{text}"
         
         Respond ONLY with one of the specified words."""
+
+    def _batch_mood_prompt(self, texts: List[str]) -> str:
+        messages = "\n".join(f"{i}. {json.dumps(text)}" for i, text in enumerate(texts, start=1))
+        return f"""Classify each numbered student message into exactly one of these categories:
+        - "stressed" (overwhelmed with work)
+        - "anxious" (nervous about performance)
+        - "calm" (positive/neutral)
         
-        response = self.llm.invoke(prompt).strip().lower()
+        Messages:
+{messages}
         
+        Respond ONLY with a JSON array of {len(texts)} words, one per message, in order.
+        Example: ["calm", "stressed"]"""
+
+    @staticmethod
+    @traced("parse.mood")
+    def _parse_mood(response: str) -> WellnessState:
         try:
-            return WellnessState(response)
+            return WellnessState(response.strip().lower().strip('".'))
         except ValueError:
             return WellnessState.UNKNOWN
 
-    def generate_response(self, state: WellnessState) -> str:
+    @classmethod
+    @traced("parse.moods")
+    def _parse_moods(cls, response: str, count: int) -> List[Optional[WellnessState]]:
+        """
+        Moods from a batched reply, in message order.
+        Accepts a JSON array/object or numbered lines ("2: calm");
+        None marks messages the reply didn't cover.
+        """
+        match = re.search(r"\[.*\]|\{.*\}", response, re.DOTALL)
+        if match:
+            try:
+                data = json.loads(match.group())
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                data = data.get("moods", data)
+            if isinstance(data, list) and len(data) == count:
+                return [cls._parse_mood(str(label)) for label in data]
+            if isinstance(data, dict):
+                by_number = {str(k).strip(): v for k, v in data.items()}
+                return [
+                    cls._parse_mood(str(by_number[str(i)])) if str(i) in by_number else None
+                    for i in range(1, count + 1)
+                ]
+
+        moods: List[Optional[WellnessState]] = [None] * count
+        for number, label in re.findall(r"^\W*(\d+)\W+(\w+)", response, re.MULTILINE):
+            if 1 <= int(number) <= count:
+                moods[int(number) - 1] = cls._parse_mood(label)
+        return moods
+
+    @property
+    def mood_classifier(self) -> Optional[MoodClassifier]:
+        """Local classifier, built on first use (None when disabled)"""
+        if self.local_classifier and self._mood_classifier is None:
+            with self._lazy_lock:
+                if self._mood_classifier is None:
+                    self._mood_classifier = MoodClassifier(self.embedder)
+        return self._mood_classifier
+
+    def _local_moods(self, texts: List[str]) -> List[Optional[WellnessState]]:
+        """Moods the local classifier is confident about (None = ask the LLM, also when embedding fails)"""
+        if self.mood_classifier is None:
+            return [None] * len(texts)
+        with span("mood.local", texts=len(texts)) as s:
+            moods = [
+                WellnessState(result.label) if result is not None else None
+                for result in self.mood_classifier.classify_local_many(texts)
+            ]
+            s.set(escalated=moods.count(None))
+            return moods
+
+    async def _alocal_moods(self, texts: List[str]) -> List[Optional[WellnessState]]:
+        """
+        _local_moods() off the event loop. Messages the keyword stage can't
+        settle are embedded by the model server, so then the call takes a
+        limiter slot like any other model request.
+        """
+        def local():
+            return asyncio.to_thread(self._local_moods, texts)
+        if any(lexical_mood(text) is None for text in texts):
+            return await self.limiter.run(local)
+        return await local()
+
+    def analyze_mood(self, text: str) -> WellnessState:
+        """Detect emotional state locally, falling back to the LLM"""
+        mood = self._local_moods([text])[0]
+        return mood if mood is not None else self._llm_mood(text)
+
+    def _llm_mood(self, text: str) -> WellnessState:
+        return self._parse_mood(self.llm.invoke(self._mood_prompt(text)))
+
+    async def aanalyze_mood(self, text: str) -> WellnessState:
+        """Async version of analyze_mood() (coalesced when batch_window is set)"""
+        if self.local_classifier:
+            mood = (await self._alocal_moods([text]))[0]
+            if mood is not None:
+                return mood
+        if self.mood_batcher is not None:
+            return await self.mood_batcher.submit(text)
+        return await self._aclassify(text)
+
+    async def _aclassify(self, text: str) -> WellnessState:
+        llm = await self._allm()
+        response = await self.limiter.run(lambda: llm.ainvoke(self._mood_prompt(text)))
+        return self._parse_mood(response)
+
+    def analyze_moods(self, texts: List[str], batch_size: Optional[int] = None, workers: int = 4) -> List[WellnessState]:
+        """
+        Classify many messages: the local stages first, then one LLM prompt per
+        batch of leftovers (batches run in parallel). Duplicate messages are
+        classified once; messages a batched reply doesn't cover are sent alone.
+        """
+        unique = list(dict.fromkeys(texts))
+        moods = dict(zip(unique, self._local_moods(unique)))
+        pending = [text for text, mood in moods.items() if mood is None]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(self._classify_batch, batched(pending, batch_size or self.max_batch))
+            moods.update(pair for batch in results for pair in batch)
+        return [moods[text] for text in texts]
+
+    async def aanalyze_moods(self, texts: List[str], batch_size: Optional[int] = None) -> List[WellnessState]:
+        """Async analyze_moods(), bounded by the shared limiter"""
+        unique = list(dict.fromkeys(texts))
+        moods = dict(zip(unique, await self._alocal_moods(unique)))
+        pending = [text for text, mood in moods.items() if mood is None]
+        results = await asyncio.gather(*(
+            self._aclassify_batch(batch) for batch in batched(pending, batch_size or self.max_batch)
+        ))
+        moods.update(zip(pending, (mood for batch in results for mood in batch)))
+        return [moods[text] for text in texts]
+
+    def _classify_batch(self, texts: List[str]) -> List[Tuple[str, WellnessState]]:
+        if len(texts) == 1:
+            return [(texts[0], self._llm_mood(texts[0]))]
+        moods = self._parse_moods(self.llm.invoke(self._batch_mood_prompt(texts)), len(texts))
+        return [
+            (text, mood if mood is not None else self._llm_mood(text))
+            for text, mood in zip(texts, moods)
+        ]
+
+    async def _aclassify_batch(self, texts: List[str]) -> List[WellnessState]:
+        if len(texts) == 1:
+            return [await self._aclassify(texts[0])]
+        llm = await self._allm()
+        response = await self.limiter.run(lambda: llm.ainvoke(self._batch_mood_prompt(texts)))
+        moods = self._parse_moods(response, len(texts))
+        missing = [i for i, mood in enumerate(moods) if mood is None]
+        for i, mood in zip(missing, await asyncio.gather(*(self._aclassify(texts[i]) for i in missing))):
+            moods[i] = mood
+        return moods
+
+    def generate_response(self, state: WellnessState, text: str = "") -> str:
         """Provide personalized mental health support"""
         if state == WellnessState.CALM:
             return "You're doing great! Keep up the good work 🌟"
@@ -67,7 +315,37 @@ class WellnessAgent(BaseChain):
     def full_pipeline(self, text: str) -> str:
         """End-to-end wellness check"""
         state = self.analyze_mood(text)
-        return self.generate_response(state)
+        return self.generate_response(state, text)
+
+    async def afull_pipeline(self, text: str) -> str:
+        """Async full_pipeline()"""
+        state = await self.aanalyze_mood(text)
+        return self.generate_response(state, text)
+
+    def stream_pipeline(self, text: str) -> Iterator[str]:
+        """
+        full_pipeline(), yielding the response line by line once the mood is known.
+        The response is a template filled after classification (no LLM
+        generation), so there are no per-token timings to report.
+        """
+        try:
+            state = self.analyze_mood(text)
+            lines = self.generate_response(state, text).splitlines(keepends=True)
+        except Exception as e:
+            logger.exception("Wellness check-in failed")
+            lines = [f"⚠️ Error checking in: {str(e)}"]
+        yield from lines
+
+    async def astream_pipeline(self, text: str) -> AsyncIterator[str]:
+        """Async iterator version of stream_pipeline()"""
+        try:
+            state = await self.aanalyze_mood(text)
+            lines = self.generate_response(state, text).splitlines(keepends=True)
+        except Exception as e:
+            logger.exception("Wellness check-in failed")
+            lines = [f"⚠️ Error checking in: {str(e)}"]
+        for line in lines:
+            yield line
 
 # Test implementation
 if __name__ == "__main__":
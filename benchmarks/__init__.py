@@ -0,0 +1,10 @@
+# ai/benchmarks/__init__.py
+"""
+Performance benchmarks for StudyBuddy.
+Each module is a standalone script, e.g.:
+python -m ai.benchmarks.bench_startup
+All of them run against fake_ollama.FakeOllama, a local stand-in for the
+Ollama daemon, so no model install is needed. bench_suite replays a
+workload trace (workload.py) end to end and checks the results against
+baselines.json.
+"""
@@ -0,0 +1,104 @@
+# ai/benchmarks/bench_context.py
+"""
+RAG context size, prefill latency and answer quality: raw retrieved
+documents (what QAAgent used to paste into the prompt) vs ContextAssembler.
+Documents hold several facts each and are chunked with overlap, so
+retrieved chunks repeat text. The stub model acts as a reader with a
+num_ctx window: the prompt is cut to its last num_ctx tokens, as the
+runner does, and the answer is the context sentence sharing the most
+terms with the question. An answer is correct when it names the entity
+the question is about. Prefill is charged per prompt token.
+"""
+import argparse
+import logging
+import os
+import re
+import statistics
+import tempfile
+import time
+from ai.benchmarks.fake_ollama import FakeOllama
+from ai.chains.context_assembler import AssembledContext, ContextAssembler
+
+_WORD = re.compile(r"\w+")
+
+def reader(num_ctx: int):
+    """Responder that answers from whatever context survives truncation"""
+    def respond(prompt: str) -> str:
+        words = prompt.split()
+        prompt = " ".join(words[-num_ctx:])
+        context, _, question = prompt.rpartition("Question:")
+        question = question.split("If the context")[0]
+        terms = set(_WORD.findall(question.lower()))
+        best, overlap = "I don't see this in our materials.", 0
+        for sentence in re.split(r"(?<=[.!?])\s+|\\n|\n", context):
+            score = len(terms & set(_WORD.findall(sentence.lower())))
+            if score > overlap:
+                best, overlap = sentence.strip(), score
+        return best
+    return respond
+
+class RawContext(ContextAssembler):
+    """Previous behaviour: the retrieved Document list, metadata and all"""
+
+    def assemble(self, question, docs, template_tokens=0):
+        text = str(list(docs))
+        tokens = self.count_tokens(text)
+        return AssembledContext(text, tokens, tokens, self.budget(question, template_tokens), len(docs), 0, 0)
+
+def run(qa, fake, questions):
+    latencies, correct, saved = [], 0, []
+    prompt_tokens = fake.prompt_tokens
+    for question, name in questions:
+        start = time.perf_counter()
+        answer = qa.answer(question)
+        latencies.append((time.perf_counter() - start) * 1000)
+        correct += name in answer
+        saved.append((qa.last_context_stats or {}).get("tokens_saved", 0))
+    return {
+        "prompt_tokens": (fake.prompt_tokens - prompt_tokens) / len(questions),
+        "tokens_saved": statistics.mean(saved),
+        "mean_ms": statistics.mean(latencies),
+        "accuracy": correct / len(questions)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=400)
+    parser.add_argument("--facts", type=int, default=12, help="facts per document")
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--num-ctx", type=int, default=1024)
+    parser.add_argument("--prefill", type=float, default=0.0005, help="seconds per prompt token")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    from ai.benchmarks.bench_retrieval import corpus, entity
+    rows = corpus(args.docs * args.facts)
+    documents = [
+        " ".join(text for text, _, _ in rows[i:i + args.facts])
+        for i in range(0, len(rows), args.facts)
+    ]
+    step = max(1, len(rows) // args.questions)
+    questions = [(rows[i][2], entity(i)) for i in range(0, len(rows), step)][:args.questions]
+
+    with FakeOllama(responder=reader(args.num_ctx), prompt_token_latency=args.prefill) as fake, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.environ["OLLAMA_HOST"] = fake.url
+        os.environ["EMBED_CACHE_PATH"] = ""
+        from ai.agents import QAAgent
+
+        results = {}
+        for label, assembler in (("raw documents", RawContext(num_ctx=args.num_ctx)),
+                                 ("assembled", ContextAssembler(num_ctx=args.num_ctx))):
+            qa = QAAgent(persist_dir=os.path.join(tmp, "kb"), context_assembler=assembler)
+            if not results:
+                qa.ingest_pieces(((text, {"source": f"doc{i}"}) for i, text in enumerate(documents)),
+                                 chunk_size=1000, chunk_overlap=200)
+            qa.answer(questions[0][0])  # Warm up lazy clients
+            results[label] = run(qa, fake, questions)
+
+    print(f"\n{args.docs} documents x {args.facts} facts, {args.questions} questions, "
+          f"num_ctx={args.num_ctx}, prefill {args.prefill * 1000:.1f}ms/token")
+    print(f"{'context':<16}{'prompt tokens':>14}{'tokens saved':>14}{'answer':>11}{'accuracy':>10}")
+    for label, r in results.items():
+        print(f"{label:<16}{r['prompt_tokens']:14.0f}{r['tokens_saved']:14.0f}"
+              f"{r['mean_ms']:9.1f}ms{r['accuracy']:10.1%}")
@@ -0,0 +1,56 @@
+# ai/benchmarks/bench_embedding_cache.py
+"""
+Repeated-query embedding latency with CachedEmbeddings.
+Compares uncached calls, LRU hits, disk hits (fresh process-like
+instance on the same file) and a mixed batch whose misses must go out
+in a single bulk request.
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from langchain_ollama import OllamaEmbeddings
+from ai.benchmarks.fake_ollama import FakeOllama
+from ai.chains.embedding_cache import CachedEmbeddings
+
+QUESTIONS = [
+    "What is an eigenvalue?",
+    "Explain backpropagation",
+    "Where does photosynthesis occur?",
+    "What is the chain rule?",
+    "Define cross-entropy loss"
+]
+
+def median_ms(fn, rounds: int) -> float:
+    samples = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        fn(QUESTIONS[i % len(QUESTIONS)])
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    with FakeOllama(embed_latency=args.embed_latency) as fake, tempfile.TemporaryDirectory() as tmp:
+        raw = OllamaEmbeddings(model="nomic-embed-text", base_url=fake.url)
+        path = str(Path(tmp) / "cache.db")
+
+        print(f"uncached:    {median_ms(raw.embed_query, args.rounds):8.3f}ms")
+        cached = CachedEmbeddings(raw, "nomic-embed-text", path=path)
+        for q in QUESTIONS:
+            cached.embed_query(q)
+        print(f"memory hit:  {median_ms(cached.embed_query, args.rounds):8.3f}ms")
+
+        reopened = CachedEmbeddings(raw, "nomic-embed-text", path=path, max_memory_items=1)
+        print(f"disk hit:    {median_ms(reopened.embed_query, args.rounds):8.3f}ms")
+
+        before = fake.calls["/api/embed"]
+        batch = QUESTIONS + [f"new question {i}" for i in range(20)]
+        cached.embed_documents(batch)
+        print(f"mixed batch: {len(batch)} texts, {fake.calls['/api/embed'] - before} embed request(s)")
+        print("stats:", cached.stats())
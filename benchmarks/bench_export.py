@@ -0,0 +1,97 @@
+# ai/benchmarks/bench_export.py
+"""
+ProgressDB export/import round trip as history grows.
+For each size a SQLite database is preloaded with sessions, then exported
+with the old all-in-memory json.dump path and with export_data() to each
+streaming format, and every export is imported into a fresh database.
+Reported: time, file size and peak Python heap (tracemalloc, measured on
+a separate untimed pass). The round trip is checked against the source:
+record counts and daily rollups must match.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from ai.benchmarks.bench_progress_db import preload
+from ai.database.progress_db import ProgressDB
+
+def legacy_export(db: ProgressDB, path: str) -> None:
+    """export_data() before streaming: every table in memory, one json.dump"""
+    data = {
+        'sessions': db.storage.all('study_sessions'),
+        'interactions': db.storage.all('interactions'),
+        'goals': db.storage.all('goals')
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def measure(fn):
+    """(seconds, peak traced MiB) -- the peak comes from a second, traced run"""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+def rollups(db: ProgressDB):
+    return sorted((r['day'], r['topic'], r['minutes'], r['sessions']) for r in db.storage.rollup_range())
+
+def available_formats():
+    formats = ["x.json", "x.ndjson", "x.ndjson.gz"]
+    try:
+        import pyarrow  # noqa: F401
+        formats += ["x.parquet", "x.arrow"]
+    except ImportError:
+        pass
+    return formats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--batch", type=int, default=5000, help="import batch size")
+    args = parser.parse_args()
+
+    formats = available_formats()
+    if "x.parquet" not in formats:
+        print("pyarrow not installed: Parquet/Arrow skipped")
+    print(f"{'sessions':>9}  {'format':<14}{'export':>9}{'peak':>10}{'size':>10}{'import':>9}{'peak':>10}  round trip")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = ProgressDB(os.path.join(tmp, "source.db"))
+            preload(db, size)
+            db.rebuild_rollups()
+            expected = rollups(db)
+
+            path = os.path.join(tmp, "legacy.json")
+            seconds, peak = measure(lambda: legacy_export(db, path))
+            print(f"{size:>9}  {'legacy json':<14}{seconds:8.2f}s{peak:7.1f}MiB"
+                  f"{os.path.getsize(path) / 2**20:7.1f}MiB{'-':>9}{'-':>10}")
+
+            for name in formats:
+                path = os.path.join(tmp, name)
+                seconds, peak = measure(lambda: db.export_data(path))
+                targets = iter(range(2))
+
+                def round_trip():
+                    target = ProgressDB(os.path.join(tmp, f"{name}.{next(targets)}.db"))
+                    target.import_data(path, batch_size=args.batch, keep_ids=True)
+                    return target
+
+                start = time.perf_counter()
+                target = round_trip()
+                import_seconds = time.perf_counter() - start
+                ok = target.storage.count('study_sessions') == size and rollups(target) == expected
+                target.close()
+                tracemalloc.start()
+                round_trip().close()
+                import_peak = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+                print(f"{size:>9}  {name[2:]:<14}{seconds:8.2f}s{peak:7.1f}MiB"
+                      f"{os.path.getsize(path) / 2**20:7.1f}MiB{import_seconds:8.2f}s{import_peak:7.1f}MiB"
+                      f"  {'ok' if ok else 'MISMATCH'}")
+            db.close()
@@ -0,0 +1,107 @@
+# ai/benchmarks/bench_import.py
+"""
+Worker cold start: import time and time to the first answered request.
+Every scenario runs in a fresh interpreter. Import cost is read from
+`python -X importtime` (sum of top-level cumulative times, module count);
+the first-request run then imports, constructs one agent and serves one
+request against the stub model server. --eager adds the imports and
+client setup agents used to do up front, as a reference point.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from ai.benchmarks.fake_ollama import FakeOllama
+
+SCENARIOS = {
+    "package": ("import ai.agents", None),
+    "WellnessAgent": (
+        "from ai.agents import WellnessAgent",
+        "agent = WellnessAgent(); {setup}agent.analyze_mood('Not sure how the week went, honestly')"
+    ),
+    "SchedulerAgent": (
+        "from ai.agents import SchedulerAgent",
+        "agent = SchedulerAgent(); {setup}agent.decompose_goal('Linear algebra final', 10)"
+    ),
+    "QAAgent": (
+        "from ai.agents import QAAgent",
+        "agent = QAAgent(persist_dir={persist_dir}); {setup}agent.answer('What is a derivative?')"
+    ),
+}
+
+EAGER = (
+    "import ai.agents.qa_agent, ai.agents.wellness_agent, ai.agents.scheduler_agent; "
+    "import langchain_community.vectorstores, langchain_ollama, langchain_core.prompts"
+)
+EAGER_SETUP = "agent.llm; agent.embedder; getattr(agent, 'vector_db', None); "
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+def import_profile(code: str, env: dict) -> dict:
+    """Total import time and module count for `code` in a fresh interpreter"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env, capture_output=True, text=True, check=True
+    )
+    rows = [m.groups() for m in map(_LINE.match, proc.stderr.splitlines()) if m]
+    top = [int(cumulative) for _, cumulative, indent, _ in rows if not indent]
+    return {"import_ms": sum(top) / 1000, "modules": len(rows)}
+
+def first_request(import_code: str, request: str, env: dict) -> dict:
+    """Import, construct and serve one request in a fresh interpreter"""
+    code = (
+        "import json, time\n"
+        "start = time.perf_counter()\n"
+        f"{import_code}\n"
+        "imported = time.perf_counter()\n"
+        f"{request}\n"
+        "done = time.perf_counter()\n"
+        "print(json.dumps({'import_ms': (imported - start) * 1000, 'first_ms': (done - imported) * 1000}))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--eager", action="store_true", help="also time eager imports/initialization")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with FakeOllama(first_token_latency=0.0) as fake, tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "OLLAMA_HOST": fake.url,
+            "EMBED_CACHE_PATH": "",
+            "DECOMPOSITION_CACHE_PATH": "",
+            "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))
+        }
+        modes = [("lazy", "", "")] + ([("eager", EAGER + "; ", EAGER_SETUP)] if args.eager else [])
+
+        print(f"{'scenario':<16}{'mode':<7}{'imports':>9}{'modules':>9}{'import+first request':>23}")
+        for name, (import_code, request) in SCENARIOS.items():
+            for mode, prefix, setup in modes:
+                profiles = [import_profile(prefix + import_code, env) for _ in range(args.rounds)]
+                line = (
+                    f"{name:<16}{mode:<7}{statistics.median(p['import_ms'] for p in profiles):7.0f}ms"
+                    f"{profiles[0]['modules']:>9}"
+                )
+                if request:
+                    runs = [
+                        first_request(
+                            prefix + import_code,
+                            request.format(setup=setup, persist_dir=repr(os.path.join(tmp, f"{mode}{i}"))),
+                            env
+                        )
+                        for i in range(args.rounds)
+                    ]
+                    line += (
+                        f"{statistics.median(r['import_ms'] for r in runs):9.0f}ms + "
+                        f"{statistics.median(r['first_ms'] for r in runs):5.0f}ms"
+                    )
+                print(line)
@@ -0,0 +1,68 @@
+# ai/benchmarks/bench_ingestion.py
+"""
+QAAgent.ingest_directory throughput (chunks/s) on a synthetic corpus.
+Builds a multi-thousand-page Markdown corpus, serves embeddings from
+FakeOllama (with simulated model latency) and ingests it with 1 and N
+workers. Peak RSS is reported to show memory stays flat.
+"""
+import argparse
+import logging
+import os
+import random
+import resource
+import tempfile
+from pathlib import Path
+from ai.benchmarks.fake_ollama import FakeOllama
+
+WORDS = (
+    "matrix vector eigenvalue gradient neuron layer entropy theorem proof lemma "
+    "integral derivative limit series probability variance tensor kernel graph "
+    "algorithm complexity recursion heap queue protein cell enzyme photosynthesis "
+    "history empire treaty revolution economy market supply demand"
+).split()
+
+def build_corpus(root: Path, files: int, pages_per_file: int, page_words: int = 450) -> int:
+    rng = random.Random(1)
+    for f in range(files):
+        with open(root / f"notes_{f:04d}.md", "w") as out:
+            for p in range(pages_per_file):
+                out.write(f"# Lecture {f}.{p}\n")
+                for _ in range(page_words // 15):
+                    out.write(" ".join(rng.choice(WORDS) for _ in range(15)) + ".\n")
+    return files * pages_per_file
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=75, help="pages per file")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--embed-latency", type=float, default=0.02, help="seconds per request")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with FakeOllama(embed_latency=args.embed_latency) as fake, tempfile.TemporaryDirectory() as tmp:
+        os.environ["OLLAMA_HOST"] = fake.url
+        os.environ["EMBED_CACHE_PATH"] = ""  # Every pass must really embed
+        from ai.agents import QAAgent
+        from ai.chains.base_chain import ClientPool
+
+        corpus = Path(tmp) / "corpus"
+        corpus.mkdir()
+        pages = build_corpus(corpus, args.files, args.pages)
+        print(f"Corpus: {pages} pages, {sum(p.stat().st_size for p in corpus.iterdir()) >> 20}MB")
+
+        for workers in (1, args.workers):
+            ClientPool.default().clear()  # The pooled embedder's memory cache would serve the second pass
+            qa = QAAgent(persist_dir=str(Path(tmp) / f"chroma_{workers}"))
+            before = fake.embedded_texts
+            stats = qa.ingest_directory(str(corpus), batch_size=args.batch_size, workers=workers)
+            chunks = stats["chunks_embedded"]
+            print(
+                f"workers={workers:<2} {chunks} chunks in {stats['seconds']:.1f}s "
+                f"= {chunks / stats['seconds']:.0f} chunks/s, {fake.embedded_texts - before} embedded by the server "
+                f"(peak RSS {peak_rss_mb():.0f}MB)"
+            )
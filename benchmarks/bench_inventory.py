@@ -0,0 +1,44 @@
+# ai/benchmarks/bench_inventory.py
+"""
+Model-existence checks per second: daemon HTTP API vs `ollama list`.
+The HTTP path runs against the local FakeOllama server; the CLI path
+only runs if an `ollama` binary is installed.
+"""
+import argparse
+import shutil
+import time
+from ai.benchmarks.fake_ollama import FakeOllama
+from ai.tools.ollama_manager import OllamaManager
+
+MODELS = ["mistral:latest", "mistral-nemo:latest", "nomic-embed-text:latest", "llama3:8b"]
+
+def checks_per_second(manager: OllamaManager, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        manager.model_exists("mistral")
+    return n / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=2000, help="checks per backend")
+    args = parser.parse_args()
+
+    with FakeOllama(models=MODELS) as fake:
+        manager = OllamaManager(host=fake.url, backend="http", inventory_ttl=0)
+
+        # Exact matching: 'mistral-nemo' must not satisfy 'mistral-large'
+        assert manager.model_exists("mistral")
+        assert manager.model_exists("llama3:8b")
+        assert not manager.model_exists("mistral-large")
+        assert not manager.model_exists("llama3")
+
+        print(f"http (uncached):  {checks_per_second(manager, args.n):10.0f} checks/s")
+        manager.inventory_ttl = 30.0
+        print(f"http (cached):    {checks_per_second(manager, args.n):10.0f} checks/s")
+        print(f"  /api/tags requests served: {fake.calls['/api/tags']}")
+
+    if shutil.which("ollama"):
+        cli = OllamaManager(backend="cli", inventory_ttl=0)
+        print(f"cli  (uncached):  {checks_per_second(cli, max(args.n // 20, 10)):10.0f} checks/s")
+    else:
+        print("cli: skipped (ollama binary not installed)")
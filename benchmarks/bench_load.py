@@ -0,0 +1,107 @@
+# ai/benchmarks/bench_load.py
+"""
+Load test for the async agent API against a stub LLM server.
+Each level runs `--requests` calls per workload with N concurrent clients
+and reports throughput and latency percentiles. FakeOllama serves
+--model-slots generations at once (like OLLAMA_NUM_PARALLEL); the agents
+share LLMLimiter, capped by --max-concurrency.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+from ai.benchmarks.fake_ollama import FakeOllama, agent_responder
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def run_level(call: Callable[[int], Awaitable], concurrency: int, requests: int) -> Dict:
+    """Fire `requests` calls through `concurrency` client tasks"""
+    latencies: List[float] = []
+    errors = 0
+    next_id = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for i in next_id:
+            start = time.perf_counter()
+            try:
+                result = await call(i)
+                if isinstance(result, str) and result.startswith("⚠️"):
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "errors": errors
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--requests", type=int, default=128, help="calls per workload and level")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="LLMLimiter slots")
+    parser.add_argument("--model-slots", type=int, default=4, help="generations the stub serves at once")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout (0 = none)")
+    parser.add_argument("--prefill", type=float, default=0.05, help="seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=400.0)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    fake = FakeOllama(
+        responder=agent_responder,
+        first_token_latency=args.prefill,
+        token_rate=args.token_rate,
+        max_parallel=args.model_slots
+    )
+    with fake, tempfile.TemporaryDirectory() as tmp:
+        os.environ["OLLAMA_HOST"] = fake.url
+        os.environ["EMBED_CACHE_PATH"] = ""
+        os.environ["OLLAMA_MAX_CONCURRENCY"] = str(args.max_concurrency)
+        os.environ["OLLAMA_REQUEST_TIMEOUT"] = str(args.timeout)
+        from ai.agents import QAAgent, SchedulerAgent, WellnessAgent
+        from ai.chains.base_chain import BaseChain
+
+        base = BaseChain()
+        qa = QAAgent(persist_dir=tmp)
+        qa.ingest_documents(["Backpropagation applies the chain rule to compute gradients."])
+        wellness = WellnessAgent(local_classifier=False)  # Measure the LLM path
+        scheduler = SchedulerAgent()
+
+        # Distinct inputs per call so nothing is served from a cache
+        workloads = {
+            "BaseChain.agenerate": lambda i: base.agenerate(f"Explain topic {i}"),
+            "QAAgent.aanswer": lambda i: qa.aanswer(f"What do the lecture notes say about backpropagation {i}?"),
+            "Wellness.afull_pipeline": lambda i: wellness.afull_pipeline(f"I'm overwhelmed with exam {i}"),
+            "Scheduler.aplan_study": lambda i: scheduler.aplan_study(f"Learn chapter {i}", 3)
+        }
+
+        print(f"limiter={args.max_concurrency} model_slots={args.model_slots} "
+              f"requests/level={args.requests}")
+        print(f"{'workload':<24} {'conc':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}")
+
+        # One event loop for everything (pooled async clients are loop-bound)
+        async def main():
+            for name, call in workloads.items():
+                for level in args.levels:
+                    r = await run_level(call, level, args.requests)
+                    print(
+                        f"{name:<24} {level:>5} {r['throughput']:>8.1f} {r['p50']:>6.0f}ms "
+                        f"{r['p95']:>6.0f}ms {r['p99']:>6.0f}ms {r['errors']:>7}"
+                    )
+        asyncio.run(main())
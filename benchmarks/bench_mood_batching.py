@@ -0,0 +1,106 @@
+# ai/benchmarks/bench_mood_batching.py
+"""
+Mood classification throughput: one prompt per message vs batched prompts.
+Compares sequential analyze_mood(), analyze_moods(), and concurrent
+aanalyze_mood() calls with and without the coalescing MoodBatcher.
+The stub answers batched prompts as a JSON array, except every --messy-every-th
+batch, which gets numbered lines with one message missing (exercises the
+parser's fallback path).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from ai.benchmarks.fake_ollama import FakeOllama
+
+MESSAGES = {
+    "stressed": ["I'm so overwhelmed with finals", "Too many deadlines this week",
+                 "I can't keep up with all this work"],
+    "anxious": ["What if I fail this exam?", "I'm nervous about my presentation",
+                "I keep worrying about my grades"],
+    "calm": ["I feel prepared for my presentation", "Studying went well today",
+             "I'm relaxed about the quiz"]
+}
+KEYWORDS = {"overwhelmed": "stressed", "deadlines": "stressed", "keep up": "stressed",
+            "fail": "anxious", "nervous": "anxious", "worrying": "anxious"}
+
+def label_for(text: str) -> str:
+    return next((mood for word, mood in KEYWORDS.items() if word in text), "calm")
+
+def make_responder(messy_every: int):
+    def responder(prompt: str) -> str:
+        if "Classify each numbered student message" in prompt:
+            texts = [json.loads(m) for m in re.findall(r"^\d+\. (\".*\")$", prompt, re.MULTILINE)]
+            labels = [label_for(t) for t in texts]
+            digest = int(hashlib.md5(prompt.encode()).hexdigest(), 16)
+            if messy_every and digest % messy_every == 0:
+                return "\n".join(f"{i}: {label}" for i, label in enumerate(labels[:-1], start=1))
+            return json.dumps(labels)
+        match = re.search(r'Message: "(.*)"', prompt)
+        return label_for(match.group(1)) if match else "calm"
+    return responder
+
+def cohort(n: int):
+    """n distinct messages with known labels"""
+    pool = [(text, mood) for mood, texts in MESSAGES.items() for text in texts]
+    return [(f"{pool[i % len(pool)][0]} (msg {i})", pool[i % len(pool)][1]) for i in range(n)]
+
+def report(label: str, n: int, seconds: float, calls: int, moods, expected) -> None:
+    accuracy = sum(m.value == e for m, e in zip(moods, expected)) / n
+    print(f"{label:<34} {n / seconds:8.1f} msg/s  {calls:5d} LLM calls  accuracy={accuracy:.0%}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--window", type=float, default=0.01, help="MoodBatcher window (seconds)")
+    parser.add_argument("--prefill", type=float, default=0.05, help="fixed seconds per request")
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0002)
+    parser.add_argument("--token-rate", type=float, default=200.0)
+    parser.add_argument("--messy-every", type=int, default=10)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    fake = FakeOllama(
+        responder=make_responder(args.messy_every),
+        first_token_latency=args.prefill,
+        prompt_token_latency=args.prompt_token_latency,
+        token_rate=args.token_rate,
+        max_parallel=4
+    )
+    with fake:
+        os.environ["OLLAMA_HOST"] = fake.url
+        os.environ["EMBED_CACHE_PATH"] = ""
+        from ai.agents.wellness_agent import WellnessAgent
+
+        data = cohort(args.messages)
+        texts = [t for t, _ in data]
+        expected = [e for _, e in data]
+
+        def timed(label, fn):
+            before = fake.generations
+            start = time.perf_counter()
+            moods = fn()
+            report(label, len(texts), time.perf_counter() - start, fake.generations - before, moods, expected)
+
+        agent = WellnessAgent(max_batch=args.batch_size, local_classifier=False)
+        timed("analyze_mood (sequential)", lambda: [agent.analyze_mood(t) for t in texts])
+        timed("analyze_moods (batched)", lambda: agent.analyze_moods(texts))
+
+        batching = WellnessAgent(batch_window=args.window, max_batch=args.batch_size, local_classifier=False)
+
+        # One event loop for all async calls (pooled async clients are loop-bound)
+        async def async_variants():
+            async def gather(a):
+                return await asyncio.gather(*(a.aanalyze_mood(t) for t in texts))
+            for label, a in (("aanalyze_mood (concurrent)", agent), ("aanalyze_mood (coalesced)", batching)):
+                before = fake.generations
+                start = time.perf_counter()
+                moods = await gather(a)
+                report(label, len(texts), time.perf_counter() - start, fake.generations - before, moods, expected)
+            print(f"coalescing: {batching.mood_batcher.stats()}")
+        asyncio.run(async_variants())
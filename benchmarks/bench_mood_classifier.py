@@ -0,0 +1,95 @@
+# ai/benchmarks/bench_mood_classifier.py
+"""
+Two-tier mood classification vs LLM-only, on a labeled sample set.
+The stub LLM answers every message correctly after --prefill seconds, so
+the comparison isolates what the local stages save (and what they get wrong).
+"""
+import argparse
+import logging
+import os
+import re
+import time
+from ai.benchmarks.fake_ollama import FakeOllama
+
+SUBJECTS = ["calculus", "organic chemistry", "history", "physics", "statistics", "biology"]
+
+# (template, label): obvious cues, paraphrases of the labeled examples, and ambiguous mixes
+TEMPLATES = [
+    ("I'm so overwhelmed with {s} finals", "stressed"),
+    ("Too many {s} deadlines this week", "stressed"),
+    ("I can't keep up with all the {s} work", "stressed"),
+    ("I have four {s} assignments due tomorrow and haven't started", "stressed"),
+    ("There's way too much {s} coursework", "stressed"),
+    ("What if I fail the {s} exam?", "anxious"),
+    ("I'm nervous about my {s} presentation", "anxious"),
+    ("I keep worrying about my {s} grade", "anxious"),
+    ("My stomach is in knots before the {s} test", "anxious"),
+    ("I keep thinking I'll mess up my {s} presentation", "anxious"),
+    ("I feel prepared for my {s} quiz", "calm"),
+    ("{s} studying went well today", "calm"),
+    ("I'm relaxed about the {s} midterm", "calm"),
+    ("The {s} lecture made sense and I'm enjoying the topic", "calm"),
+    ("Had a nice productive {s} session at the library", "calm"),
+    ("I'm nervous but prepared for {s}", "anxious"),
+    ("{s} is hard but good", "calm"),
+    ("Exam in {s} tomorrow", "anxious"),
+    ("I'm not ready for {s} at all", "anxious"),
+]
+
+def samples():
+    return [(template.format(s=subject), label) for subject in SUBJECTS for template, label in TEMPLATES]
+
+def make_responder(truth):
+    def responder(prompt: str) -> str:
+        match = re.search(r'Message: "(.*)"', prompt)
+        return truth.get(match.group(1), "calm") if match else "calm"
+    return responder
+
+def run(agent, data, fake) -> dict:
+    before = fake.generations
+    latencies, correct = [], 0
+    for text, label in data:
+        start = time.perf_counter()
+        mood = agent.analyze_mood(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+        correct += mood.value == label
+    latencies.sort()
+    return {
+        "mean_ms": sum(latencies) / len(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95)],
+        "llm_calls": fake.generations - before,
+        "accuracy": correct / len(data)
+    }
+
+def report(label: str, r: dict) -> None:
+    print(
+        f"{label:<12} mean={r['mean_ms']:7.2f}ms p50={r['p50_ms']:7.2f}ms p95={r['p95_ms']:7.2f}ms "
+        f"LLM calls={r['llm_calls']:4d} accuracy={r['accuracy']:.0%}"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prefill", type=float, default=0.15, help="seconds per LLM call")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    data = samples()
+    fake = FakeOllama(responder=make_responder(dict(data)), first_token_latency=args.prefill)
+    with fake:
+        os.environ["OLLAMA_HOST"] = fake.url
+        os.environ["EMBED_CACHE_PATH"] = ""
+        from ai.agents.wellness_agent import WellnessAgent
+
+        print(f"{len(data)} labeled messages, {args.prefill * 1000:.0f}ms per LLM call")
+        report("LLM only", run(WellnessAgent(local_classifier=False), data, fake))
+        two_tier = WellnessAgent()
+        two_tier.mood_classifier._get_centroids()  # Example embeddings are a one-off cost
+        report("two-tier", run(two_tier, data, fake))
+
+        stats = two_tier.mood_classifier.stats()
+        print(
+            f"stage hits: lexical={stats['lexical_ratio']:.0%} embedding={stats['embedding_ratio']:.0%} "
+            f"escalated={stats['escalated_ratio']:.0%} "
+            f"(lexical {stats['lexical_us']:.1f}us/msg, embedding {stats['embedding_us']:.0f}us/msg)"
+        )
@@ -0,0 +1,97 @@
+# ai/benchmarks/bench_plan_many.py
+"""
+Cohort planning: plan_study() per student vs plan_many().
+The stub LLM returns canned JSON task breakdowns; every --messy-every-th
+goal first gets an invalid reply, exercising the validate-and-retry path.
+Students share a small pool of goals (with case/spacing variants), so
+plan_many() deduplicates most decompositions; a second run is served
+entirely from the decomposition cache.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import time
+import zlib
+from ai.benchmarks.fake_ollama import FakeOllama
+
+GOALS = [f"{subject} {exam}" for subject in
+         ("Linear algebra", "Organic chemistry", "World history", "Data structures", "Microeconomics")
+         for exam in ("final exam", "midterm", "quiz", "project", "lab report")]
+
+def make_responder(messy_every: int):
+    def responder(prompt: str) -> str:
+        goal = re.search(r'Goal: "(.*)" \(Total: (\d+)h\)', prompt)
+        name, hours = goal.group(1), int(goal.group(2))
+        if messy_every and zlib.crc32(name.lower().encode()) % messy_every == 0 and "rejected" not in prompt:
+            return "Sure! Here is a plan: tasks = [review, practice]"
+        parts = (0.4, 0.35, 0.25)
+        return json.dumps({"tasks": [
+            {"topic": f"{name} part {i + 1}", "hours": round(hours * share, 1)}
+            for i, share in enumerate(parts)
+        ]})
+    return responder
+
+def cohort(students: int, seed: int = 0):
+    rng = random.Random(seed)
+    variants = (str, str.lower, lambda g: f"  {g} ", lambda g: g.replace(" ", "  "))
+    return {
+        f"student-{i}": (rng.choice(variants)(rng.choice(GOALS)), rng.choice((5, 10, 14)))
+        for i in range(students)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--baseline-sample", type=int, default=30, help="students timed with plan_study()")
+    parser.add_argument("--prefill", type=float, default=0.2, help="seconds per LLM call")
+    parser.add_argument("--messy-every", type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    fake = FakeOllama(responder=make_responder(args.messy_every), first_token_latency=args.prefill)
+    with fake:
+        os.environ["OLLAMA_HOST"] = fake.url
+        os.environ["EMBED_CACHE_PATH"] = ""
+        os.environ["DECOMPOSITION_CACHE_PATH"] = ""  # Fresh in-memory cache per agent
+        from ai.agents.scheduler_agent import SchedulerAgent
+
+        goals = cohort(args.students)
+
+        sample = list(goals.items())[:args.baseline_sample]
+        baseline = SchedulerAgent()
+        before = fake.generations
+        start = time.perf_counter()
+        for _, (goal, days) in sample:
+            baseline.plan_study(goal, days)
+        per_student = (time.perf_counter() - start) / len(sample)
+        print(
+            f"plan_study: {per_student * 1000:.0f}ms/student, "
+            f"{(fake.generations - before) / len(sample):.2f} LLM calls/student "
+            f"(~{per_student * args.students:.0f}s for {args.students} students)"
+        )
+
+        agent = SchedulerAgent()
+        for label in ("plan_many", "plan_many (warm cache)"):
+            before = fake.generations
+            result = agent.plan_many(goals, max_workers=args.workers)
+            stats = result["stats"]
+            assert len(result["schedules"]) == args.students and fake.generations - before == stats["llm_calls"]
+            print(
+                f"{label}: {stats['total_seconds']:.2f}s for {stats['students']} students "
+                f"({stats['unique_goals']} unique goals, {stats['deduplicated']} deduplicated, "
+                f"{stats['cache_hits']} cache hits, {stats['llm_calls']} LLM calls, "
+                f"{stats['retries']} retries, {stats['fallbacks']} fallbacks; "
+                f"scheduling {stats['schedule_seconds'] * 1000:.0f}ms)"
+            )
+
+        # A total-hours change is served by rescaling a cached breakdown
+        goal = GOALS[0]
+        start = time.perf_counter()
+        for _ in range(1000):
+            agent.decompose_goal(goal, 33)
+        print(f"cached decompose_goal (rescaled): {(time.perf_counter() - start) * 1000:.0f}us/call, "
+              f"cache={agent.decomposition_cache.stats()}")
@@ -0,0 +1,85 @@
+# ai/benchmarks/bench_progress_db.py
+"""
+ProgressDB storage backends: insert throughput and summary latency
+as history grows (default 10k / 100k / 1M sessions).
+History is bulk-preloaded; the timed part is single log_* calls and
+get_study_summary() on top of it. TinyDB is capped by --tinydb-max
+because each of its inserts rewrites the whole file.
+--write-behind times the same inserts through the batched write path
+(the clock stops after the final flush).
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from ai.database.progress_db import ProgressDB
+
+TOPICS = ["Linear Algebra", "Calculus", "Physics", "History", "Coding", "Biology"]
+
+def synthetic_sessions(n: int, days: int = 365):
+    now = datetime.now()
+    rng = random.Random(42)
+    for _ in range(n):
+        ts = now - timedelta(seconds=rng.randrange(days * 86400))
+        yield {
+            'timestamp': ts.isoformat(),
+            'topic': rng.choice(TOPICS),
+            'duration_min': rng.randrange(10, 120),
+            'resources': [],
+            'effectiveness': None,
+            'tags': ['general']
+        }
+
+def preload(db: ProgressDB, n: int, batch: int = 50_000) -> None:
+    rows = synthetic_sessions(n)
+    while True:
+        chunk = [r for _, r in zip(range(batch), rows)]
+        if not chunk:
+            break
+        db.storage.insert_many('study_sessions', chunk)
+
+def bench(backend: str, size: int, inserts: int, queries: int, write_behind: bool = False) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        suffix = ".db" if backend == "sqlite" else ".json"
+        db = ProgressDB(str(Path(tmp) / f"progress{suffix}"), backend=backend, write_behind=write_behind)
+        preload(db, size)
+
+        start = time.perf_counter()
+        for i in range(inserts):
+            db.log_study_session(TOPICS[i % len(TOPICS)], 30)
+        db.flush()
+        insert_rate = inserts / (time.perf_counter() - start)
+
+        latencies = []
+        for _ in range(queries):
+            start = time.perf_counter()
+            db.get_study_summary("week")
+            latencies.append(time.perf_counter() - start)
+        db.close()
+
+    return {"inserts_per_s": insert_rate, "summary_ms": statistics.median(latencies) * 1000}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--backends", nargs="+", default=["tinydb", "sqlite"])
+    parser.add_argument("--tinydb-max", type=int, default=100_000)
+    parser.add_argument("--inserts", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--write-behind", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'rows':>10} {'inserts/s':>12} {'summary (ms)':>14}")
+    for size in args.sizes:
+        for backend in args.backends:
+            if backend == "tinydb" and size > args.tinydb_max:
+                print(f"{backend:<8} {size:>10} {'skipped':>12}")
+                continue
+            inserts = args.inserts
+            if backend == "tinydb" and not args.write_behind:
+                inserts = max(inserts // 20, 5)
+            r = bench(backend, size, inserts, args.queries, args.write_behind)
+            print(f"{backend:<8} {size:>10} {r['inserts_per_s']:>12.0f} {r['summary_ms']:>14.2f}")
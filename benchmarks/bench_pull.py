@@ -0,0 +1,46 @@
+# ai/benchmarks/bench_pull.py
+"""
+Provisioning time for several models: sequential vs concurrent pulls.
+Runs against FakeOllama with throttled "large blobs"; one pull is cut
+off half way to check that the retry resumes instead of restarting.
+"""
+import argparse
+import time
+from ai.benchmarks.fake_ollama import FakeOllama
+from ai.tools.ollama_manager import OllamaManager
+
+def provision(workers: int, models: int, blob_mb: int, rate_mb: float) -> dict:
+    size = blob_mb << 20
+    registry = {f"model-{i}:latest": size for i in range(models)}
+    with FakeOllama(models=[], registry=registry, pull_rate=rate_mb * (1 << 20)) as fake:
+        fake.fail_once_at["model-0:latest"] = size // 2
+        manager = OllamaManager(host=fake.url, backend="http", inventory_ttl=0)
+
+        start = time.perf_counter()
+        results = manager.pull_models(list(registry), max_workers=workers, show_progress=False)
+        elapsed = time.perf_counter() - start
+
+        assert all(e is None for e in results.values()), results
+        assert sorted(fake.models) == sorted(registry)
+        return {
+            "seconds": elapsed,
+            "bytes_served": fake.bytes_served,
+            "bytes_expected": size * models,
+            "pull_requests": fake.calls["/api/pull"]
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", type=int, default=4)
+    parser.add_argument("--blob-mb", type=int, default=256)
+    parser.add_argument("--rate-mb", type=float, default=512.0, help="per-pull MB/s")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    for workers in (1, args.workers):
+        r = provision(workers, args.models, args.blob_mb, args.rate_mb)
+        print(
+            f"workers={workers:<2} {r['seconds']:6.2f}s  "
+            f"served={r['bytes_served'] >> 20}MB/{r['bytes_expected'] >> 20}MB  "
+            f"pull requests={r['pull_requests']}"
+        )
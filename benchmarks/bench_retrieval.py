@@ -0,0 +1,102 @@
+# ai/benchmarks/bench_retrieval.py
+"""
+Retrieval quality and latency on a synthetic corpus: vector-only (Chroma),
+BM25-only and the hybrid retriever QAAgent now uses.
+Every chunk states one fact about a uniquely named entity; each query asks
+about one entity, either by name ("exact") or by its attributes only
+("descriptive"), so the ground-truth chunk is known. Off-topic questions
+check the rag_threshold routing.
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from ai.benchmarks.fake_ollama import FakeOllama
+
+SYLLABLES = "ka lo mi ren tov sa qui dor bel fen gra hul ix jor nep pra".split()
+FIELDS = ["enzyme", "theorem", "dynasty", "algorithm", "mineral", "protocol", "treaty", "galaxy"]
+PROPERTIES = ["catalyzes", "proves", "founded", "sorts", "crystallizes", "encrypts", "ended", "orbits"]
+OBJECTS = ["glucose", "primes", "river", "graphs", "quartz", "packets", "war", "quasars",
+           "lipids", "matrices", "harbor", "strings", "basalt", "frames", "famine", "nebulae"]
+FILLER = ("students often review this topic before exams because it appears in many "
+          "lectures and practice problems across the semester").split()
+OFF_TOPIC = ["Explain general relativity", "How do I cook pasta?", "Tips for public speaking",
+             "What is the capital of Peru?", "Recommend a good novel", "How does a car engine work?"]
+
+def entity(i: int) -> str:
+    rng = random.Random(i)
+    return "".join(rng.choice(SYLLABLES) for _ in range(3)) + str(i)
+
+def corpus(n: int):
+    """[(chunk text, query-by-name, query-by-attributes)] with one fact per chunk"""
+    rng = random.Random(0)
+    rows = []
+    for i in range(n):
+        f = rng.randrange(len(FIELDS))
+        obj, obj2 = rng.sample(OBJECTS, 2)
+        name = entity(i)
+        filler = " ".join(rng.sample(FILLER, 8))
+        text = (f"The {FIELDS[f]} {name} {PROPERTIES[f]} {obj} and {obj2}. "
+                f"It was catalogued in year {1000 + i}. {filler}.")
+        rows.append((text, f"What does {name} do?", f"Which {FIELDS[f]} {PROPERTIES[f]} {obj} and {obj2} in year {1000 + i}?"))
+    return rows
+
+def evaluate(label, search, queries, k):
+    latencies, hits = [], 0
+    for query, truth in queries:
+        start = time.perf_counter()
+        ids = search(query)[:k]
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += truth in ids
+    latencies.sort()
+    print(
+        f"{label:<28} recall@{k}={hits / len(queries):6.1%}  "
+        f"mean={sum(latencies) / len(latencies):6.2f}ms  p95={latencies[int(len(latencies) * 0.95)]:6.2f}ms"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=12000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with FakeOllama() as fake, tempfile.TemporaryDirectory() as tmp:
+        os.environ["OLLAMA_HOST"] = fake.url
+        os.environ["EMBED_CACHE_PATH"] = ""
+        from ai.agents import QAAgent
+
+        rows = corpus(args.chunks)
+        qa = QAAgent(persist_dir=tmp)
+        start = time.perf_counter()
+        qa.ingest_pieces(((text, {"source": f"doc{i}"}) for i, (text, _, _) in enumerate(rows)), chunk_size=1000)
+        print(f"ingested {len(qa.bm25)} chunks in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        QAAgent(persist_dir=tmp)  # Reload the persisted index
+        print(f"index reload: {time.perf_counter() - start:.2f}s")
+
+        def chunk_of(doc):
+            return doc.metadata["source"]
+
+        rng = random.Random(1)
+        picks = rng.sample(range(args.chunks), args.queries)
+        for kind, column in (("exact", 1), ("descriptive", 2)):
+            queries = [(rows[i][column], f"doc{i}") for i in picks]
+            print(f"-- {kind} queries")
+            evaluate("vector (Chroma)", lambda q: [chunk_of(d) for d in qa.vector_db.similarity_search(q, k=args.k)],
+                     queries, args.k)
+            evaluate("BM25", lambda q: [qa.bm25.docs[i]["metadata"]["source"] for i, _, _ in qa.bm25.search(q, args.k)],
+                     queries, args.k)
+            evaluate("hybrid", lambda q: [chunk_of(d) for d, _ in qa.retriever.scored(q)], queries, args.k)
+            evaluate("hybrid + MMR (QAAgent)", lambda q: [chunk_of(d) for d in qa.retriever.invoke(q)],
+                     queries, args.k)
+
+        in_domain = [rows[i][column] for i in picks[:50] for column in (1, 2)]
+        routed = sum(qa.should_use_rag(q) for q in in_domain)
+        off = sum(qa.should_use_rag(q) for q in OFF_TOPIC)
+        print(f"routing (threshold {qa.rag_threshold}): {routed}/{len(in_domain)} course questions -> RAG, "
+              f"{off}/{len(OFF_TOPIC)} off-topic -> RAG")
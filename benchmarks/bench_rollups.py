@@ -0,0 +1,75 @@
+# ai/benchmarks/bench_rollups.py
+"""
+Rollup-backed summaries vs a full scan of raw sessions.
+Checks that both give identical totals, top topics and streaks over
+random week/month/custom ranges, and times each path.
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from ai.benchmarks.bench_progress_db import synthetic_sessions
+from ai.database.progress_db import ProgressDB
+
+def full_scan(sessions, since: datetime, until=None) -> dict:
+    """Reference answer straight from raw sessions"""
+    lo, hi = since.isoformat(), until.isoformat() if until else None
+    minutes, days = defaultdict(int), set()
+    for s in sessions:
+        if s['timestamp'] >= lo and (hi is None or s['timestamp'] < hi):
+            minutes[s['topic']] += s['duration_min']
+            days.add(s['timestamp'][:10])
+    return {
+        'total_hours': sum(minutes.values()) / 60,
+        'top_topics': sorted(minutes.items(), key=lambda x: (-x[1], x[0]))[:3],
+        'days': len(days)
+    }
+
+def check(db: ProgressDB, sessions, ranges) -> tuple:
+    rollup_times, scan_times = [], []
+    for since, until in ranges:
+        start = time.perf_counter()
+        got = db.get_study_summary("custom", start=since, end=until)
+        got_days = len(db._range_stats(since, until)[1])
+        rollup_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        want = full_scan(sessions, since, until)
+        scan_times.append(time.perf_counter() - start)
+
+        assert abs(got['total_hours'] - want['total_hours']) < 1e-9, (since, until, got, want)
+        assert got['top_topics'] == want['top_topics'], (since, until, got, want)
+        assert got_days == want['days'], (since, until, got_days, want)
+    return rollup_times, scan_times
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=200_000)
+    parser.add_argument("--ranges", type=int, default=50)
+    parser.add_argument("--backend", default="sqlite")
+    args = parser.parse_args()
+
+    db = ProgressDB(":memory:" if args.backend == "sqlite" else "/tmp/bench_rollups.json", backend=args.backend)
+    sessions = list(synthetic_sessions(args.sessions))
+    for i in range(0, len(sessions), 50_000):
+        db._write_many('study_sessions', sessions[i:i + 50_000])
+
+    now = datetime.now()
+    rng = random.Random(7)
+    ranges = [(now - timedelta(days=7), None), (now - timedelta(days=30), None)]
+    for _ in range(args.ranges):
+        since = now - timedelta(seconds=rng.randrange(365 * 86400))
+        until = since + timedelta(seconds=rng.randrange(1, 60 * 86400)) if rng.random() < 0.7 else None
+        ranges.append((since, until))
+
+    rollup_times, scan_times = check(db, sessions, ranges)
+    print(f"{len(ranges)} ranges over {args.sessions} sessions: rollups match full scan ✅")
+    print(f"  rollups   median={statistics.median(rollup_times) * 1000:8.2f}ms")
+    print(f"  full scan median={statistics.median(scan_times) * 1000:8.2f}ms")
+
+    start = time.perf_counter()
+    db.rebuild_rollups()
+    print(f"  rebuild: {time.perf_counter() - start:.2f}s")
+    check(db, sessions, ranges[:5])
@@ -0,0 +1,95 @@
+# ai/benchmarks/bench_schedule.py
+"""
+Scheduling engine on large plans vs the previous list-based scheduler.
+Runs single plans of growing size plus a whole-cohort batch, and checks
+that the engine leaves its input tasks untouched.
+No model server needed: tasks are synthetic.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from ai.agents.scheduler_agent import StudyTask
+from ai.tools.schedule_engine import build_schedule
+
+SUBJECTS = ["math", "history", "coding", "physics", "chemistry", "literature"]
+WEIGHTS = {"math": 1.5, "history": 1.0, "coding": 1.3}
+
+def synthetic_tasks(n: int, days: int, seed: int = 0):
+    rng = random.Random(seed)
+    now = datetime.now()
+    return [
+        StudyTask(
+            topic=f"{rng.choice(SUBJECTS)} unit {i}",
+            duration=rng.randint(30, 180),
+            priority=rng.choice(["high", "medium", "low"]),
+            deadline=now + timedelta(days=rng.randint(1, days))
+        )
+        for i in range(n)
+    ]
+
+def legacy_schedule(tasks, available_days, max_daily_study=240):
+    """The scheduler this engine replaced (mutates task durations)"""
+    schedule = {}
+    remaining_tasks = tasks.copy()
+    for day in range(available_days):
+        date = (datetime.now() + timedelta(days=day)).strftime("%Y-%m-%d")
+        schedule[date] = []
+        daily_minutes = 0
+        for priority in ["high", "medium", "low"]:
+            for task in remaining_tasks[:]:
+                if task.priority == priority:
+                    alloc_min = min(task.duration, max_daily_study - daily_minutes)
+                    if alloc_min > 0:
+                        schedule[date].append(f"{task.topic} ({alloc_min}min)")
+                        daily_minutes += alloc_min
+                        task.duration -= alloc_min
+                        if task.duration <= 0:
+                            remaining_tasks.remove(task)
+        if schedule[date]:
+            schedule[date].append("15min break")
+    return schedule
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--cohort-tasks", type=int, default=300)
+    parser.add_argument("--legacy-limit", type=int, default=1000, help="skip the old scheduler above this size")
+    args = parser.parse_args()
+
+    # Daily cap scaled so the window is roughly full
+    for n in args.sizes:
+        tasks = synthetic_tasks(n, args.days)
+        cap = max(240, int(sum(t.duration for t in tasks) * 1.2 / args.days))
+        before = [t.duration for t in tasks]
+        plan, engine_ms = timed(build_schedule, tasks, args.days, max_daily=cap, subject_weights=WEIGHTS)
+        assert [t.duration for t in tasks] == before, "engine modified its input"
+        stats = plan.stats()
+
+        legacy = "skipped"
+        if n <= args.legacy_limit:
+            copies = [t.model_copy() for t in tasks]
+            _, legacy_ms = timed(legacy_schedule, copies, args.days, cap)
+            legacy = f"{legacy_ms:8.1f}ms"
+        print(
+            f"{n:>6} tasks x {args.days} days: engine {engine_ms:7.1f}ms  legacy {legacy}  "
+            f"slots={stats['slots']} late={stats['late_minutes']}min "
+            f"unscheduled={stats['unscheduled_minutes']}min util={stats['utilization']:.0%}"
+        )
+
+    cohort = [synthetic_tasks(args.cohort_tasks, args.days, seed=s) for s in range(args.students)]
+    start = time.perf_counter()
+    plans = [build_schedule(tasks, args.days, subject_weights=WEIGHTS) for tasks in cohort]
+    elapsed = time.perf_counter() - start
+    print(
+        f"cohort: {args.students} students x {args.cohort_tasks} tasks in {elapsed:.2f}s "
+        f"({elapsed / args.students * 1000:.1f}ms/student, "
+        f"{sum(p.stats()['slots'] for p in plans)} slots)"
+    )
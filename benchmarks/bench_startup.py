@@ -0,0 +1,49 @@
+# ai/benchmarks/bench_startup.py
+"""
+Cold vs warm agent construction time.
+Cold: empty ModelRegistry + ClientPool (first agents in a fresh worker).
+Warm: registry/pool already populated (every agent after that).
+"""
+import argparse
+import statistics
+import time
+from ai.agents import QAAgent, WellnessAgent, SchedulerAgent
+from ai.chains.base_chain import ClientPool
+from ai.tools.ollama_manager import ModelRegistry
+
+AGENTS = [QAAgent, WellnessAgent, SchedulerAgent]
+
+def build_all() -> float:
+    """Construct every agent once, return elapsed seconds"""
+    start = time.perf_counter()
+    for agent_cls in AGENTS:
+        agent_cls()
+    return time.perf_counter() - start
+
+def reset_shared_state() -> None:
+    """Simulate a fresh worker process"""
+    ModelRegistry.default().invalidate()
+    ClientPool.default().clear()
+
+def run(rounds: int) -> dict:
+    cold, warm = [], []
+    for _ in range(rounds):
+        reset_shared_state()
+        cold.append(build_all())
+        warm.append(build_all())
+    return {"cold": cold, "warm": warm}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.rounds)
+    print(f"Agent construction ({len(AGENTS)} agents, {args.rounds} rounds)")
+    for label, samples in results.items():
+        print(
+            f"  {label:<5} median={statistics.median(samples) * 1000:8.1f}ms "
+            f"min={min(samples) * 1000:8.1f}ms max={max(samples) * 1000:8.1f}ms"
+        )
+    speedup = statistics.median(results["cold"]) / max(statistics.median(results["warm"]), 1e-9)
+    print(f"  warm speedup: {speedup:.1f}x")
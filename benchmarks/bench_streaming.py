@@ -0,0 +1,80 @@
+# ai/benchmarks/bench_streaming.py
+"""
+Time-to-first-token: blocking calls vs the streaming variants.
+FakeOllama streams tokens with a fixed prefill delay and decode rate,
+so blocking latency ~ prefill + tokens/rate while streaming TTFT ~ prefill.
+WellnessAgent replies are templated (only mood classification calls the
+model), so it reports blocking latency only.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from typing import Optional
+from ai.benchmarks.fake_ollama import FakeOllama, default_response
+from ai.chains.base_chain import StreamTimer
+
+def responder(prompt: str) -> str:
+    if "Classify this student message" in prompt:
+        return "stressed"
+    return default_response(prompt, tokens=60)
+
+def blocking_ms(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+def drain(stream_fn, *args) -> dict:
+    timer = StreamTimer()
+    text = "".join(stream_fn(*args, timer=timer))
+    assert text and not text.startswith("⚠️"), text
+    return timer.result()
+
+async def adrain(stream_fn, *args) -> dict:
+    timer = StreamTimer()
+    parts = [token async for token in stream_fn(*args, timer=timer)]
+    assert parts and not parts[0].startswith("⚠️"), parts
+    return timer.result()
+
+def report(label: str, blocking, stats: Optional[dict] = None) -> None:
+    blocking = f"{blocking:7.0f}ms" if blocking is not None else "      -  "
+    streamed = (
+        f"  ttft={stats['ttft_ms']:6.0f}ms  "
+        f"{stats['tokens_per_second']:6.0f} tok/s ({stats['tokens']} tokens)"
+    ) if stats else ""
+    print(f"{label:<22} blocking={blocking}{streamed}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prefill", type=float, default=0.25, help="seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=60.0)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    fake = FakeOllama(responder=responder, first_token_latency=args.prefill, token_rate=args.token_rate)
+    with fake, tempfile.TemporaryDirectory() as tmp:
+        os.environ["OLLAMA_HOST"] = fake.url
+        os.environ["EMBED_CACHE_PATH"] = ""
+        from ai.agents import QAAgent, WellnessAgent
+        from ai.chains.base_chain import BaseChain
+
+        base = BaseChain()
+        report("BaseChain.generate", blocking_ms(base.generate, "Explain entropy"),
+               drain(base.stream_generate, "Explain entropy"))
+
+        qa = QAAgent(persist_dir=tmp)
+        qa.ingest_documents(["Backpropagation applies the chain rule to compute gradients."])
+        for question in ("Explain relativity", "What do the lecture notes say about backpropagation?"):
+            label = "QAAgent " + ("(rag)" if qa.should_use_rag(question) else "(general)")
+            report(label, blocking_ms(qa.answer, question), drain(qa.stream_answer, question))
+
+        wellness = WellnessAgent()
+        msg = "I'm so overwhelmed with finals"
+        report("WellnessAgent", blocking_ms(wellness.full_pipeline, msg))
+
+        # One event loop for all async calls (pooled async clients are loop-bound)
+        async def async_variants():
+            report("QAAgent async", None, await adrain(qa.astream_answer, "Explain relativity"))
+        asyncio.run(async_variants())
@@ -0,0 +1,306 @@
+# ai/benchmarks/bench_suite.py
+"""
+End-to-end replay suite: a workload trace (see workload.py) of student
+sessions -- questions, mood checks, planning, progress logging and
+summaries, plus Ollama inventory checks and a model pull -- replayed
+against QAAgent, WellnessAgent, SchedulerAgent, TenantProgressDB and
+OllamaManager, all talking to FakeOllama.
+Each pass runs in a fresh interpreter: a timed pass (throughput and
+latency percentiles per subsystem) and a memory pass (largest traced
+allocation peak of a single operation per subsystem, plus process RSS).
+The fake server stays in this process so it never shows up in the
+numbers. Results are compared with a stored baseline; a metric worse
+than --tolerance (and above a small noise floor) is flagged and the
+exit status is 1. --update-baseline records the current run instead.
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from ai.benchmarks.fake_ollama import FakeOllama, agent_responder
+from ai.benchmarks.workload import generate_trace, load_trace, save_trace, trace_digest
+
+DEFAULT_BASELINE = Path(__file__).with_name("baselines.json")
+
+# metric -> (higher is worse, noise floor below which differences are ignored)
+METRICS = {
+    "throughput": (False, 0.0),
+    "p50_ms": (True, 0.5),
+    "p95_ms": (True, 1.0),
+    "peak_kib": (True, 64.0),
+}
+
+def rss_mib() -> float:
+    """Resident memory of this process (Linux /proc, 0 elsewhere)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))]
+
+# Child process: build the system and replay
+def build_system(tmp: str, header: Dict):
+    from ai.agents import QAAgent, SchedulerAgent, WellnessAgent
+    from ai.benchmarks.bench_retrieval import corpus
+    from ai.database.tenant_db import TenantProgressDB
+    from ai.tools.ollama_manager import OllamaManager
+
+    qa = QAAgent(persist_dir=os.path.join(tmp, "kb"))
+    qa.ingest_pieces(((text, {"source": f"doc{i}"}) for i, (text, _, _) in enumerate(corpus(header["corpus"]))))
+    return {
+        "qa": qa,
+        "wellness": WellnessAgent(),
+        "scheduler": SchedulerAgent(),
+        "tenants": TenantProgressDB(os.path.join(tmp, "tenants")),
+        "manager": OllamaManager(host=os.environ["OLLAMA_HOST"], backend="http"),
+    }
+
+def run_event(system: Dict, event: Dict, timed) -> None:
+    """Replay one event; `timed(subsystem, fn)` measures each call"""
+    kind, student, args = event["kind"], event["student"], event["args"]
+    tenants = system["tenants"]
+    if kind == "question":
+        answer = timed("qa", lambda: system["qa"].answer(args["question"]))
+        timed("progress_db", lambda: tenants.log_interaction(student, args["question"], answer, "qa"))
+    elif kind == "mood":
+        reply = timed("wellness", lambda: system["wellness"].full_pipeline(args["text"]))
+        timed("progress_db", lambda: tenants.log_interaction(student, args["text"], reply, "wellness"))
+    elif kind == "plan":
+        timed("scheduler", lambda: system["scheduler"].plan_study(args["goal"], args["days"]))
+    elif kind == "study":
+        timed("progress_db", lambda: tenants.log_study_session(student, args["topic"], args["minutes"]))
+    elif kind == "summary":
+        timed("progress_db", lambda: tenants.get_study_summary(student))
+    elif kind == "models":
+        timed("ollama", lambda: system["manager"].list_models(refresh=True))
+    elif kind == "pull":
+        timed("ollama", lambda: system["manager"].pull_model(args["model"], quiet=True))
+    else:
+        raise ValueError(f"Unknown trace event: {kind}")
+
+def replay(trace_path: str, mode: str, workers: int) -> Dict:
+    """Runs in a child process: one timed or memory pass over the trace"""
+    header, events = load_trace(trace_path)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("ai").setLevel(logging.WARNING)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    peaks: Dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+
+    def timed(subsystem: str, fn):
+        if mode == "memory":
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = fn()
+            peak = tracemalloc.get_traced_memory()[1] - before
+            peaks[subsystem] = max(peaks[subsystem], peak)
+            return result
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies[subsystem].append(elapsed)
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if mode == "memory":
+            tracemalloc.start()
+            workers = 1  # Per-operation peaks need one operation at a time
+        start = time.perf_counter()
+        system = build_system(tmp, header)
+        setup = time.perf_counter() - start
+
+        # Each student's events go to one worker, so their order is kept
+        queues: List[List[Dict]] = [[] for _ in range(workers)]
+        for event in events:
+            queues[zlib.crc32(event["student"].encode()) % workers].append(event)
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=lambda q=q: [run_event(system, e, timed) for e in q])
+            for q in queues
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - start
+        system["tenants"].close()
+
+    result = {"events": len(events), "setup_s": setup, "wall_s": wall, "rss_mib": rss_mib()}
+    if mode == "memory":
+        result["peak_kib"] = {name: peak / 1024 for name, peak in peaks.items()}
+    else:
+        result["subsystems"] = {}
+        for name, values in latencies.items():
+            values.sort()
+            result["subsystems"][name] = {
+                "ops": len(values),
+                "throughput": len(values) / (sum(values) / 1000) if sum(values) else 0.0,
+                "mean_ms": statistics.mean(values),
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "p99_ms": percentile(values, 99),
+            }
+    return result
+
+# Parent process: serve the fake model, run the passes, compare
+def run_pass(trace_path: str, mode: str, workers: int, fake: FakeOllama, installed: List[str]) -> Dict:
+    fake.models = list(installed)  # The pull in the trace starts from scratch every pass
+    fake.pulled_bytes.clear()
+    env = {
+        **os.environ,
+        "OLLAMA_HOST": fake.url,
+        "EMBED_CACHE_PATH": "",
+        "DECOMPOSITION_CACHE_PATH": "",
+        "PYTHONPATH": os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))
+    }
+    cmd = [sys.executable, "-m", "ai.benchmarks.bench_suite", "--replay", trace_path, mode, str(workers)]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"{mode} pass failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def collect(timing: Dict, memory: Optional[Dict]) -> Dict:
+    """Flat {subsystem: metrics} report, with "trace" for the whole replay"""
+    report = {name: dict(row) for name, row in timing["subsystems"].items()}
+    if memory:
+        for name, peak in memory["peak_kib"].items():
+            report.setdefault(name, {})["peak_kib"] = peak
+    report["trace"] = {
+        "ops": timing["events"],
+        "throughput": timing["events"] / timing["wall_s"],
+        "setup_s": timing["setup_s"],
+        "rss_mib": memory["rss_mib"] if memory else timing["rss_mib"],
+    }
+    return report
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[Tuple[str, str, float, float, str]]:
+    """(subsystem, metric, baseline, current, verdict) for every shared metric"""
+    rows = []
+    for name, metrics in baseline.items():
+        for metric, base in metrics.items():
+            if metric not in METRICS or metric not in report.get(name, {}):
+                continue
+            now = report[name][metric]
+            higher_is_worse, floor = METRICS[metric]
+            change = (now - base) if higher_is_worse else (base - now)
+            if change > tolerance * base and change > floor:
+                verdict = "REGRESSION"
+            elif -change > tolerance * base and -change > floor:
+                verdict = "improved"
+            else:
+                verdict = "ok"
+            rows.append((name, metric, base, now, verdict))
+    return rows
+
+def print_report(report: Dict) -> None:
+    print(f"{'subsystem':<13}{'ops':>6}{'ops/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'peak alloc':>13}")
+    for name, row in sorted(report.items()):
+        if name == "trace":
+            continue
+        peak = f"{row['peak_kib']:9.0f}KiB" if "peak_kib" in row else f"{'-':>12}"
+        print(f"{name:<13}{row['ops']:>6}{row['throughput']:9.1f}{row['p50_ms']:8.2f}ms"
+              f"{row['p95_ms']:8.2f}ms{row['p99_ms']:8.2f}ms{peak:>13}")
+    trace = report["trace"]
+    print(f"trace: {trace['ops']} events at {trace['throughput']:.1f} events/s, "
+          f"setup {trace['setup_s']:.2f}s, RSS {trace['rss_mib']:.0f}MiB")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--replay":
+        trace_path, mode, workers = sys.argv[2:5]
+        print(json.dumps(replay(trace_path, mode, int(workers))))
+        sys.exit()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trace", help="replay a saved trace instead of generating one")
+    parser.add_argument("--save-trace", help="write the trace used to this path")
+    parser.add_argument("--students", type=int, default=40)
+    parser.add_argument("--sessions", type=int, default=3, help="sessions per student")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="replay threads (students are partitioned)")
+    parser.add_argument("--prefill", type=float, default=0.005, help="seconds to first token")
+    parser.add_argument("--token-rate", type=float, default=2000.0)
+    parser.add_argument("--no-memory", action="store_true", help="skip the memory pass")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--json", help="also write the report here")
+    args = parser.parse_args()
+
+    if args.trace:
+        header, events = load_trace(args.trace)
+    else:
+        header, events = generate_trace(args.students, args.sessions, seed=args.seed)
+    if args.save_trace:
+        save_trace(args.save_trace, header, events)
+    config = {
+        "trace": trace_digest(header, events),
+        "workers": args.workers,
+        "prefill": args.prefill,
+        "token_rate": args.token_rate,
+    }
+
+    pulls = {e["args"]["model"]: e["args"]["bytes"] for e in events if e["kind"] == "pull"}
+    fake = FakeOllama(
+        registry=pulls,
+        responder=agent_responder,
+        first_token_latency=args.prefill,
+        token_rate=args.token_rate
+    )
+    installed = list(fake.models)
+    with fake, tempfile.TemporaryDirectory() as tmp:
+        trace_path = os.path.join(tmp, "trace.jsonl")
+        save_trace(trace_path, header, events)
+        print(f"replaying {len(events)} events ({header['students']} students x {header['sessions']} sessions, "
+              f"trace {config['trace']}, {args.workers} worker(s))")
+        timing = run_pass(trace_path, "timing", args.workers, fake, installed)
+        memory = None if args.no_memory else run_pass(trace_path, "memory", args.workers, fake, installed)
+
+    report = collect(timing, memory)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": config, "report": report}, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"config": config, "report": report}, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        sys.exit()
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline} (run with --update-baseline)")
+        sys.exit()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["config"] != config:
+        print(f"baseline was recorded with {baseline['config']}, not comparing")
+        sys.exit()
+    rows = compare(report, baseline["report"], args.tolerance)
+    regressions = [row for row in rows if row[4] == "REGRESSION"]
+    print(f"\nvs baseline (tolerance {args.tolerance:.0%}):")
+    for name, metric, base, now, verdict in rows:
+        if verdict != "ok":
+            print(f"  {name:<13}{metric:<12}{base:10.2f} -> {now:10.2f}  {verdict}")
+    print(f"  {len(regressions)} regression(s) in {len(rows)} metrics")
+    sys.exit(1 if regressions else 0)
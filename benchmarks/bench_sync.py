@@ -0,0 +1,54 @@
+# ai/benchmarks/bench_sync.py
+"""
+Incremental knowledge_base re-sync.
+1. Initial sync of a synthetic corpus
+2. Re-sync with nothing changed (expect zero embedding calls)
+3. Re-sync after editing one file, adding one and deleting one
+"""
+import argparse
+import logging
+import os
+import tempfile
+from pathlib import Path
+from ai.benchmarks.bench_ingestion import build_corpus
+from ai.benchmarks.fake_ollama import FakeOllama
+
+def run_sync(qa, corpus: Path, fake: FakeOllama, label: str) -> dict:
+    before = fake.embedded_texts
+    report = qa.sync_directory(str(corpus))
+    print(
+        f"{label:<10} {report['seconds']:6.2f}s  embedded={report['chunks_embedded']:<6} "
+        f"skipped={report['chunks_skipped']:<6} removed={report['chunks_removed']:<5} "
+        f"embed calls={fake.embedded_texts - before}"
+    )
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=75, help="pages per file")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with FakeOllama(embed_latency=0.02) as fake, tempfile.TemporaryDirectory() as tmp:
+        os.environ["OLLAMA_HOST"] = fake.url
+        os.environ["EMBED_CACHE_PATH"] = ""  # Embed calls are what this measures
+        from ai.agents import QAAgent
+
+        corpus = Path(tmp) / "corpus"
+        corpus.mkdir()
+        build_corpus(corpus, args.files, args.pages)
+        qa = QAAgent(persist_dir=str(Path(tmp) / "chroma"))
+
+        run_sync(qa, corpus, fake, "initial")
+        report = run_sync(qa, corpus, fake, "unchanged")
+        assert report["chunks_embedded"] == 0 and len(report["unchanged"]) == args.files
+
+        files = sorted(corpus.iterdir())
+        with open(files[0], "a") as f:
+            f.write("\n# Appendix\nA brand new paragraph about eigenvalue decomposition.\n")
+        files[1].unlink()
+        (corpus / "extra.md").write_text("# Extra\nSupply and demand curves meet at equilibrium.\n")
+        report = run_sync(qa, corpus, fake, "edited")
+        assert report["changed"] == [str(files[0])] and report["deleted"] == [str(files[1])]
+        print(f"vectors in store: {len(qa.vector_db.get(include=[])['ids'])}")
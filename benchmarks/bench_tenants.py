@@ -0,0 +1,163 @@
+# ai/benchmarks/bench_tenants.py
+"""
+Multi-tenant ProgressDB: 10k simulated students doing interleaved
+session writes and summary reads from a thread pool.
+Compared layouts:
+- shared json: the default single TinyDB file (first --json-ops ops, one
+  thread: TinyDB corrupts its file under concurrent writers, and every
+  write rewrites the whole file)
+- shared: one ProgressDB (SQLite) that every student writes into; its
+  summaries cover everyone, so it is a contention baseline, not a
+  per-student answer
+- tenants: TenantProgressDB, one database per student behind the LRU pool
+Student activity is Zipf-skewed (a few heavy users, a long tail), so the
+pool hit rate and open/evict counts are realistic. Then a cross-tenant
+aggregate is timed at several fan-out widths, and --processes workers
+hammer the same tenant root at once to check no write is lost.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ai.database.progress_db import ProgressDB
+from ai.database.tenant_db import TenantProgressDB
+
+TOPICS = ["Linear Algebra", "Calculus", "Physics", "History", "Coding", "Biology"]
+
+def workload(students: int, ops: int, read_ratio: float, seed: int = 0):
+    """[(student, op, topic, minutes)] with Zipf-distributed students"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(students)]
+    chosen = rng.choices(range(students), weights=weights, k=ops)
+    return [
+        (f"student-{s}", "read" if rng.random() < read_ratio else "write", rng.choice(TOPICS), rng.randrange(10, 120))
+        for s in chosen
+    ]
+
+def run(ops, threads: int, write, read):
+    """Per-op latencies (ms) for writes and reads, plus wall seconds"""
+    def one(op):
+        student, kind, topic, minutes = op
+        start = time.perf_counter()
+        if kind == "write":
+            write(student, topic, minutes)
+        else:
+            read(student)
+        return kind, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, ops, chunksize=64))
+    wall = time.perf_counter() - start
+    latencies = {"write": [], "read": []}
+    for kind, ms in results:
+        latencies[kind].append(ms)
+    return latencies, wall
+
+def percentiles(values):
+    values = sorted(values)
+    return statistics.mean(values), values[len(values) // 2], values[int(len(values) * 0.95)]
+
+def report(label, latencies, wall, ops):
+    line = f"{label:<12}{ops / wall:7.0f} ops/s"
+    for kind in ("write", "read"):
+        mean, p50, p95 = percentiles(latencies[kind])
+        line += f"   {kind} mean {mean:5.2f} p50 {p50:5.2f} p95 {p95:6.2f}ms"
+    print(line)
+
+def worker(root: str, students: int, writes: int, seed: int) -> dict:
+    """Runs in a child process: session writes against a shared tenant root"""
+    tenants = TenantProgressDB(root, max_open=64)
+    rng = random.Random(seed)
+    for _ in range(writes):
+        tenants.log_study_session(f"student-{rng.randrange(students)}", rng.choice(TOPICS), 30)
+    tenants.close()
+    return {"writes": writes}
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        root, students, writes, seed = sys.argv[2:6]
+        print(json.dumps(worker(root, int(students), int(writes), int(seed))))
+        sys.exit()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=10_000)
+    parser.add_argument("--ops", type=int, default=60_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--read-ratio", type=float, default=0.3)
+    parser.add_argument("--max-open", type=int, default=256)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--json-ops", type=int, default=2000)
+    parser.add_argument("--dir", help="where to create the databases (default: system temp dir)")
+    args = parser.parse_args()
+
+    ops = workload(args.students, args.ops, args.read_ratio)
+    print(f"{args.students} students, {args.ops} ops ({args.read_ratio:.0%} reads), {args.threads} threads, "
+          f"{len({op[0] for op in ops})} distinct students active")
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        shared = ProgressDB(os.path.join(tmp, "shared.json"))
+        latencies, wall = run(
+            ops[:args.json_ops], 1,
+            lambda student, topic, minutes: shared.log_study_session(topic, minutes),
+            lambda student: shared.get_study_summary()
+        )
+        report("shared json", latencies, wall, args.json_ops)
+        shared.close()
+
+        shared = ProgressDB(os.path.join(tmp, "shared.db"))
+        latencies, wall = run(
+            ops, args.threads,
+            lambda student, topic, minutes: shared.log_study_session(topic, minutes),
+            lambda student: shared.get_study_summary()
+        )
+        report("shared", latencies, wall, len(ops))
+        shared.close()
+
+        tenants = TenantProgressDB(os.path.join(tmp, "tenants"), max_open=args.max_open, idle_timeout=60.0)
+        latencies, wall = run(
+            ops, args.threads,
+            lambda student, topic, minutes: tenants.log_study_session(student, topic, minutes),
+            lambda student: tenants.get_study_summary(student)
+        )
+        report("tenants", latencies, wall, len(ops))
+        stats = tenants.pool_stats()
+        print(f"pool: {stats['open']} open, hit rate {stats['hit_rate']:.1%}, "
+              f"{stats['opens']} opens, {stats['evicted']} evicted")
+
+        writes = sum(kind == "write" for _, kind, _, _ in ops)
+        for workers in (1, 4, 16):
+            start = time.perf_counter()
+            summary = tenants.aggregate_summary("month", max_workers=workers)
+            print(f"aggregate over {summary['students']} students, {workers:>2} workers: "
+                  f"{time.perf_counter() - start:6.2f}s")
+        total = sum(tenants.fan_out(lambda db: db.storage.count("study_sessions"), max_workers=16).values())
+        print(f"sessions across tenants: {total} (expected {writes}), "
+              f"{summary['total_hours']:.0f}h total, top {summary['top_topics'][0][0]}")
+        tenants.close()
+
+        if args.processes:
+            root = os.path.join(tmp, "shared-root")
+            per_process = args.ops // args.processes // 4
+            # Few students, so processes constantly write to the same files
+            cmd = [sys.executable, "-m", "ai.benchmarks.bench_tenants", "--worker", root, "50", str(per_process)]
+            start = time.perf_counter()
+            procs = [subprocess.Popen(cmd + [str(seed)], stdout=subprocess.PIPE, text=True)
+                     for seed in range(args.processes)]
+            for p in procs:
+                p.communicate()
+            elapsed = time.perf_counter() - start
+            tenants = TenantProgressDB(root)
+            total = sum(tenants.fan_out(lambda db: db.storage.count("study_sessions")).values())
+            rollup = sum(tenants.fan_out(
+                lambda db: sum(r["sessions"] for r in db.storage.rollup_range())
+            ).values())
+            tenants.close()
+            print(f"{args.processes} processes x {per_process} writes over 50 students: {elapsed:.2f}s, "
+                  f"{total} sessions and {rollup} in rollups (expected {args.processes * per_process})")
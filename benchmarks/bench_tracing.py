@@ -0,0 +1,88 @@
+# ai/benchmarks/bench_tracing.py
+"""
+Cost of the tracing hooks and what they report.
+First the raw price of a span (disabled vs enabled), then a mixed
+workload -- QAAgent answers over a small corpus, goal decompositions,
+mood checks and ProgressDB writes -- run with tracing off and on, followed
+by the per-stage breakdown the HistogramSink collected.
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+from ai.benchmarks.fake_ollama import FakeOllama
+from ai.tools.tracing import HistogramSink, JSONLSink, Tracer, span
+
+def span_cost(n: int) -> float:
+    """Nanoseconds per `with span(...)` on the default tracer"""
+    start = time.perf_counter()
+    for _ in range(n):
+        with span("bench", size=1):
+            pass
+    return (time.perf_counter() - start) / n * 1e9
+
+def workload(qa, scheduler, wellness, db, questions):
+    latencies = []
+    for i, question in enumerate(questions):
+        start = time.perf_counter()
+        qa.answer(question)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if i % 5 == 0:
+            scheduler.decompose_goal(f"Chemistry unit {i}", 6)
+            wellness.analyze_mood(f"Week {i} was a blur, not sure where I stand")
+            db.log_study_session("chemistry", 30)
+    return latencies
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--spans", type=int, default=200_000)
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--prefill", type=float, default=0.02, help="seconds per LLM call")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    tracer = Tracer.default()
+    tracer.disable()
+    disabled = span_cost(args.spans)
+    tracer.enable(HistogramSink())
+    enabled = span_cost(args.spans)
+    tracer.disable()
+    print(f"span overhead: disabled {disabled:.0f}ns, enabled (histogram) {enabled:.0f}ns")
+
+    with FakeOllama(first_token_latency=args.prefill) as fake, tempfile.TemporaryDirectory() as tmp:
+        os.environ["OLLAMA_HOST"] = fake.url
+        os.environ["EMBED_CACHE_PATH"] = ""
+        os.environ["DECOMPOSITION_CACHE_PATH"] = ""
+        from ai.agents import QAAgent, SchedulerAgent, WellnessAgent
+        from ai.benchmarks.bench_retrieval import corpus
+        from ai.database.progress_db import ProgressDB
+
+        rows = corpus(2000)
+        qa = QAAgent(persist_dir=os.path.join(tmp, "kb"))
+        qa.ingest_pieces(((text, {"source": f"doc{i}"}) for i, (text, _, _) in enumerate(rows)), chunk_size=1000)
+        scheduler, wellness = SchedulerAgent(), WellnessAgent()
+        db = ProgressDB(os.path.join(tmp, "progress.db"))
+        questions = [rows[i][2] for i in range(0, len(rows), len(rows) // args.questions)][:args.questions]
+        workload(qa, scheduler, wellness, db, questions[:5])  # Warm up lazy clients
+
+        off = workload(qa, scheduler, wellness, db, questions)
+        histogram = HistogramSink()
+        jsonl = JSONLSink(os.path.join(tmp, "trace.jsonl"))
+        tracer.enable(histogram, jsonl)
+        on = workload(qa, scheduler, wellness, db, questions)
+        tracer.disable()
+
+        print(f"QAAgent.answer: tracing off mean={statistics.mean(off):.2f}ms, "
+              f"on mean={statistics.mean(on):.2f}ms ({args.questions} questions)")
+        print(f"\n{'span':<18}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}  totals")
+        for name, row in histogram.summary().items():
+            extras = {k: v for k, v in row.items() if k not in ("count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")}
+            print(f"{name:<18}{row['count']:>7}{row['mean_ms']:8.2f}ms{row['p50_ms']:8.2f}ms"
+                  f"{row['p95_ms']:8.2f}ms  {extras}")
+        print(f"counters: {histogram.counters()}")
+        with open(jsonl.path) as f:
+            events = sum(1 for _ in f)
+        print(f"JSONL events: {events}; Prometheus dump: {len(histogram.prometheus_text().splitlines())} lines")
+        db.close()
@@ -0,0 +1,128 @@
+# ai/benchmarks/bench_vector_store.py
+"""
+Chroma vs MmapVectorStore on the same persisted corpus.
+Both stores are filled through QAAgent, then each is opened in fresh
+worker processes (several at once) that report import/open/first-query
+time, per-query latency for similarity and MMR search, and resident
+memory split into private (RssAnon) and file-backed, shareable (RssFile)
+pages. Queries are pre-embedded so only the store is timed.
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+def rss() -> dict:
+    """Resident memory of this process in MiB (Linux /proc)"""
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                fields[key] = int(value.split()[0]) / 1024
+    return fields
+
+def worker(backend: str, path: str, queries_path: str, k: int) -> dict:
+    """Runs in a child process: open the store cold and query it"""
+    start = time.perf_counter()
+    import numpy as np
+    if backend == "mmap":
+        from ai.tools.mmap_store import MmapVectorStore
+    else:
+        from langchain_community.vectorstores import Chroma
+    imported = time.perf_counter()
+    base = rss()
+
+    store = MmapVectorStore(path) if backend == "mmap" else Chroma(persist_directory=path)
+    opened = time.perf_counter()
+    queries = np.load(queries_path).tolist()
+    top = [[d.metadata["chunk_id"] for d in store.similarity_search_by_vector(queries[0], k=k)]]
+    first = time.perf_counter()
+
+    latencies = []
+    for query in queries[1:]:
+        t = time.perf_counter()
+        top.append([d.metadata["chunk_id"] for d in store.similarity_search_by_vector(query, k=k)])
+        latencies.append((time.perf_counter() - t) * 1000)
+    mmr = []
+    for query in queries[:50]:
+        t = time.perf_counter()
+        store.max_marginal_relevance_search_by_vector(query, k=k, fetch_k=20)
+        mmr.append((time.perf_counter() - t) * 1000)
+
+    latencies.sort()
+    mem = rss()
+    return {
+        "import_ms": (imported - start) * 1000,
+        "open_ms": (opened - imported) * 1000,
+        "first_query_ms": (first - opened) * 1000,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95)],
+        "mmr_ms": sum(mmr) / len(mmr),
+        "anon_mib": mem["RssAnon"] - base["RssAnon"],
+        "file_mib": mem["RssFile"] - base["RssFile"],
+        "top": top
+    }
+
+def spawn(backend: str, path: str, queries_path: str, k: int, workers: int):
+    """Start `workers` processes at once so they compete for (or share) pages"""
+    cmd = [sys.executable, "-m", "ai.benchmarks.bench_vector_store", "--worker", backend, path, queries_path, str(k)]
+    procs = [subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True) for _ in range(workers)]
+    return [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in procs]
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        backend, path, queries_path, k = sys.argv[2:6]
+        print(json.dumps(worker(backend, path, queries_path, int(k))))
+        sys.exit()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    import numpy as np
+    from ai.benchmarks.bench_retrieval import corpus
+    from ai.benchmarks.fake_ollama import FakeOllama, fake_embedding
+
+    rows = corpus(args.chunks)
+    with FakeOllama(embed_dim=args.dim) as fake, tempfile.TemporaryDirectory() as tmp:
+        os.environ["OLLAMA_HOST"] = fake.url
+        os.environ["EMBED_CACHE_PATH"] = ""
+        from ai.agents import QAAgent
+
+        queries_path = os.path.join(tmp, "queries.npy")
+        np.save(queries_path, np.array(
+            [fake_embedding(rows[i][2], args.dim) for i in range(0, args.chunks, max(1, args.chunks // args.queries))],
+            dtype=np.float32
+        ))
+
+        results = {}
+        for backend in ("chroma", "mmap"):
+            path = os.path.join(tmp, backend)
+            QAAgent(persist_dir=path, vector_backend=backend).ingest_pieces(
+                ((text, {"source": f"doc{i}"}) for i, (text, _, _) in enumerate(rows)), chunk_size=1000
+            )
+            results[backend] = spawn(backend, path, queries_path, args.k, args.workers)
+
+    print(f"\n{args.chunks} chunks x {args.dim} dims, {args.workers} concurrent worker processes (means per worker)")
+    print(f"{'backend':<8}{'import':>9}{'open':>9}{'1st query':>11}{'p50':>8}{'p95':>8}{'mmr':>8}"
+          f"{'private':>10}{'shared':>9}")
+    for backend, runs in results.items():
+        mean = {key: sum(r[key] for r in runs) / len(runs) for key in runs[0] if key != "top"}
+        print(
+            f"{backend:<8}{mean['import_ms']:7.0f}ms{mean['open_ms']:7.0f}ms{mean['first_query_ms']:9.1f}ms"
+            f"{mean['p50_ms']:6.2f}ms{mean['p95_ms']:6.2f}ms{mean['mmr_ms']:6.2f}ms"
+            f"{mean['anon_mib']:7.1f}MiB{mean['file_mib']:6.1f}MiB"
+        )
+    exact, approx = results["mmap"][0]["top"], results["chroma"][0]["top"]
+    overlap = sum(len(set(a) & set(b)) for a, b in zip(exact, approx)) / (len(exact) * args.k)
+    print(f"top-{args.k} agreement (Chroma HNSW vs exact mmap): {overlap:.1%}")
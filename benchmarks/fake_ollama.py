@@ -0,0 +1,401 @@
+# ai/benchmarks/fake_ollama.py
+"""
+Local stand-in for the Ollama daemon, used by the benchmarks.
+Implements just enough of the REST API to exercise our clients:
+- GET /api/tags (model inventory)
+- POST /api/pull (streamed byte progress over simulated blobs, resumable)
+- POST /api/embed, /api/embeddings (deterministic hashed bag-of-words vectors)
+- POST /api/generate (deterministic text, streamed token by token)
+"""
+import hashlib
+import json
+import math
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+@lru_cache(maxsize=65536)
+def _token_slot(token: str, dim: int):
+    digest = hashlib.md5(token.encode()).digest()
+    return int.from_bytes(digest[:4], "little") % dim, 1.0 if digest[4] & 1 else -1.0
+
+def fake_embedding(text: str, dim: int = 256) -> List[float]:
+    """
+    Deterministic unit vector from hashed word counts.
+    Texts sharing words get similar vectors, so retrieval quality is measurable.
+    """
+    vec = [0.0] * dim
+    for token in re.findall(r"\w+", text.lower()):
+        slot, sign = _token_slot(token, dim)
+        vec[slot] += sign
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+WORDS = (
+    "the a study review practice concept example theorem proof notes chapter "
+    "learn understand apply compare explain because therefore first next finally"
+).split()
+
+def default_response(prompt: str, tokens: int = 40) -> str:
+    """Deterministic pseudo-answer: same prompt -> same text"""
+    seed = int.from_bytes(hashlib.md5(prompt.encode()).digest()[:8], "little")
+    words = []
+    for _ in range(tokens):
+        seed = (seed * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+        words.append(WORDS[(seed >> 33) % len(WORDS)])
+    return " ".join(words) + "."
+
+MOODS = ("stressed", "anxious", "calm")
+
+def agent_responder(prompt: str, tokens: int = 20) -> str:
+    """
+    Deterministic replies in the shapes our agents parse: mood words (single
+    and batched), goal decompositions as JSON, filler text for anything else
+    """
+    seed = int.from_bytes(hashlib.md5(prompt.encode()).digest()[:4], "little")
+    if "Classify each numbered student message" in prompt:
+        count = int(re.search(r"JSON array of (\d+) words", prompt).group(1))
+        return json.dumps([MOODS[(seed + i) % len(MOODS)] for i in range(count)])
+    if "Classify this student message" in prompt:
+        return MOODS[seed % len(MOODS)]
+    if "Break this study goal" in prompt:
+        hours = float(re.search(r"Total: ([\d.]+)h", prompt).group(1))
+        parts = 3 + seed % 3
+        return json.dumps({"tasks": [
+            {"topic": f"{WORDS[(seed + i) % len(WORDS)].title()} part {i + 1}", "hours": round(hours / parts, 2)}
+            for i in range(parts)
+        ]})
+    return default_response(prompt, tokens=tokens)
+
+def split_tokens(text: str) -> List[str]:
+    """Word-ish tokens that concatenate back to the original text"""
+    return re.findall(r"\s*\S+", text) or [text]
+
+def count_tokens(text: str) -> int:
+    return len(re.findall(r"\S+", text))
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real daemon
+    wbufsize = -1  # Send headers + body in one segment (avoids Nagle stalls)
+    disable_nagle_algorithm = True  # Streamed tokens are tiny writes; don't wait on delayed ACKs
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    @property
+    def fake(self) -> "FakeOllama":
+        return self.server.fake
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _send_json(self, obj: Dict, status: int = 200) -> None:
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method: str) -> None:
+        self.fake.calls[self.path] += 1
+        handler = getattr(self, f"_{method}_{self.path.strip('/').replace('/', '_')}", None)
+        if handler is None:
+            self._send_json({"error": f"unknown endpoint {self.path}"}, status=404)
+        else:
+            handler()
+
+    def do_GET(self):
+        self._dispatch("get")
+
+    def do_POST(self):
+        self._dispatch("post")
+
+    def _start_stream(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _stream_json(self, obj: Dict) -> None:
+        line = json.dumps(obj).encode() + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _abort_stream(self) -> None:
+        """Drop the connection mid-response (simulates a network failure)"""
+        self.wfile.flush()
+        self.close_connection = True
+
+    def _get_api_tags(self):
+        self._send_json({"models": [
+            {"name": name, "model": name, "size": 0, "digest": ""}
+            for name in self.fake.models
+        ]})
+
+    def _post_api_pull(self):
+        fake = self.fake
+        name = self._read_json()
+        name = name.get("model") or name.get("name")
+        size = fake.registry.get(name)
+        if size is None:
+            self._send_json({"error": f"pull model manifest: file does not exist"}, status=404)
+            return
+
+        with fake.lock:
+            status = fake.fail_status.pop(name, None)
+            error = fake.error_event.pop(name, None)
+        if status is not None:
+            self._send_json({"error": f"simulated {status}"}, status=status)
+            return
+
+        digest = "sha256:" + hashlib.sha256(name.encode()).hexdigest()
+        self._start_stream()
+        self._stream_json({"status": "pulling manifest"})
+        if error is not None:
+            self._stream_json({"error": error})  # As the daemon reports e.g. a missing manifest
+            self._end_stream()
+            return
+
+        with fake.lock:
+            completed = fake.pulled_bytes.get(name, 0)  # Resume partial blob
+            fail_at = fake.fail_once_at.pop(name, None)
+
+        while completed < size:
+            step = min(fake.progress_chunk, size - completed)
+            if fake.pull_rate:
+                time.sleep(step / fake.pull_rate)
+            completed += step
+            with fake.lock:
+                fake.pulled_bytes[name] = completed
+                fake.bytes_served += step
+            self._stream_json({
+                "status": f"pulling {digest[7:19]}",
+                "digest": digest,
+                "total": size,
+                "completed": completed
+            })
+            if fail_at is not None and completed >= fail_at:
+                self._abort_stream()
+                return
+
+        for status in ("verifying sha256 digest", "writing manifest"):
+            self._stream_json({"status": status})
+        with fake.lock:
+            if name not in fake.models:
+                fake.models.append(name)  # Installed before "success", as the daemon does
+        self._stream_json({"status": "success"})
+        self._end_stream()
+
+    def _post_api_embed(self):
+        body = self._read_json()
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        self.fake.simulate_embed(len(inputs))
+        self._send_json({
+            "model": body.get("model"),
+            "embeddings": [fake_embedding(t, self.fake.embed_dim) for t in inputs]
+        })
+
+    def _post_api_embeddings(self):
+        body = self._read_json()
+        self.fake.simulate_embed(1)
+        self._send_json({"embedding": fake_embedding(body.get("prompt", ""), self.fake.embed_dim)})
+
+    def _post_api_generate(self):
+        fake = self.fake
+        body = self._read_json()
+        prompt = body.get("prompt", "")
+        tokens = split_tokens(fake.responder(prompt))
+        prompt_tokens = count_tokens(prompt)
+        fake.record_generation(prompt_tokens, len(tokens))
+        with fake.model_slots:
+            self._generate(body, tokens, prompt_tokens)
+
+    def _generate(self, body: Dict, tokens: List[str], prompt_tokens: int) -> None:
+        fake = self.fake
+        # Prefill, then decode at token_rate
+        time.sleep(fake.first_token_latency + prompt_tokens * fake.prompt_token_latency)
+        delay = 1.0 / fake.token_rate if fake.token_rate else 0.0
+        final = {
+            "model": body.get("model"),
+            "created_at": "2025-01-01T00:00:00Z",
+            "response": "",
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": len(tokens)
+        }
+
+        if body.get("stream", True) is False:
+            time.sleep(delay * len(tokens))
+            self._send_json({**final, "response": "".join(tokens)})
+            return
+
+        self._start_stream()
+        for token in tokens:
+            if delay:
+                time.sleep(delay)
+            self._stream_json({
+                "model": body.get("model"),
+                "created_at": "2025-01-01T00:00:00Z",
+                "response": token,
+                "done": False
+            })
+        self._stream_json(final)
+        self._end_stream()
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)  # Clients hanging up (timeouts) are expected
+
+class FakeOllama:
+    """
+    Fake Ollama server running on a background thread.
+    Usage:
+        with FakeOllama(models=["mistral:latest"]) as fake:
+            OllamaManager(host=fake.url)
+    """
+
+    def __init__(
+        self,
+        models: Optional[List[str]] = None,
+        registry: Optional[Dict[str, int]] = None,
+        pull_rate: Optional[float] = None,
+        progress_chunk: int = 1 << 20,
+        embed_dim: int = 256,
+        embed_latency: float = 0.0,
+        embed_item_latency: float = 0.0,
+        responder: Optional[Callable[[str], str]] = None,
+        first_token_latency: float = 0.0,
+        prompt_token_latency: float = 0.0,
+        token_rate: Optional[float] = None,
+        max_parallel: Optional[int] = None,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        """
+        Args:
+            models: Installed models reported by /api/tags
+            registry: Pullable models -> blob size in bytes
+            pull_rate: Simulated download speed in bytes/s (None = unthrottled)
+            progress_chunk: Bytes per progress event
+            embed_dim: Embedding vector size
+            embed_latency: Fixed seconds per embedding request
+            embed_item_latency: Extra seconds per embedded text
+            responder: prompt -> completion text (default: deterministic filler)
+            first_token_latency: Fixed seconds before the first token
+            prompt_token_latency: Extra prefill seconds per prompt token
+            token_rate: Generated tokens per second (None = unthrottled)
+            max_parallel: Generations served at once, like OLLAMA_NUM_PARALLEL;
+                extra requests queue (None = unlimited)
+        """
+        self.models = list(["mistral:latest", "nomic-embed-text:latest"] if models is None else models)
+        self.registry = dict(registry or {})
+        self.pull_rate = pull_rate
+        self.progress_chunk = progress_chunk
+        self.embed_dim = embed_dim
+        self.embed_latency = embed_latency
+        self.embed_item_latency = embed_item_latency
+        self.embedded_texts = 0
+        self.responder = responder or default_response
+        self.first_token_latency = first_token_latency
+        self.prompt_token_latency = prompt_token_latency
+        self.token_rate = token_rate
+        self.model_slots = threading.BoundedSemaphore(max_parallel) if max_parallel else nullcontext()
+        self.generations = 0
+        self.prompt_tokens = 0
+        self.generated_tokens = 0
+        self.pulled_bytes: Dict[str, int] = {}
+        self.bytes_served = 0
+        self.fail_once_at: Dict[str, int] = {}  # model -> byte offset to drop the connection at
+        self.fail_status: Dict[str, int] = {}  # model -> HTTP status the next pull is answered with
+        self.error_event: Dict[str, str] = {}  # model -> error the next pull stream reports
+        self.calls: Counter = Counter()
+        self.lock = threading.Lock()
+        self._server = FakeOllamaServer((host, port), FakeOllamaHandler)
+        self._server.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    def simulate_embed(self, n: int) -> None:
+        """Account for (and optionally sleep through) an embedding request"""
+        with self.lock:
+            self.embedded_texts += n
+        delay = self.embed_latency + n * self.embed_item_latency
+        if delay:
+            time.sleep(delay)
+
+    def record_generation(self, prompt_tokens: int, generated_tokens: int) -> None:
+        with self.lock:
+            self.generations += 1
+            self.prompt_tokens += prompt_tokens
+            self.generated_tokens += generated_tokens
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOllama":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the fake Ollama server (point OLLAMA_HOST at it)")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--prefill", type=float, default=0.0, help="seconds to first token")
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0, help="extra prefill seconds per prompt token")
+    parser.add_argument("--token-rate", type=float, default=None, help="generated tokens per second")
+    parser.add_argument("--max-parallel", type=int, default=None)
+    parser.add_argument("--embed-dim", type=int, default=256)
+    parser.add_argument("--embed-latency", type=float, default=0.0)
+    parser.add_argument("--pull-rate", type=float, default=None, help="bytes per second")
+    parser.add_argument("--pullable", nargs="*", default=[], metavar="NAME=BYTES", help="models /api/pull can serve")
+    args = parser.parse_args()
+
+    fake = FakeOllama(
+        registry={name: int(size) for name, _, size in (m.partition("=") for m in args.pullable)},
+        pull_rate=args.pull_rate,
+        embed_dim=args.embed_dim,
+        embed_latency=args.embed_latency,
+        responder=agent_responder,
+        first_token_latency=args.prefill,
+        prompt_token_latency=args.prompt_token_latency,
+        token_rate=args.token_rate,
+        max_parallel=args.max_parallel,
+        port=args.port
+    )
+    with fake:
+        print(f"Fake Ollama listening on {fake.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
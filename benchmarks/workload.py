@@ -0,0 +1,120 @@
+# ai/benchmarks/workload.py
+"""
+Replayable workload traces for the benchmark suite.
+A trace is a JSONL file: one header line ({"trace": version, ...} with
+the generator settings), then one event per line:
+    {"student": "student-7", "kind": "question", "args": {...}}
+Kinds: question, mood, plan, study (log a session), summary (read the
+student's weekly summary), models (Ollama inventory check), pull.
+Events of different students are interleaved the way concurrent study
+sessions would be; the events of each session stay in order. The same
+seed always produces the same trace, and a saved trace replays
+identically on any machine.
+"""
+import hashlib
+import heapq
+import json
+import random
+from typing import Dict, List, Tuple
+
+TRACE_VERSION = 1
+
+MOOD_TEXTS = [
+    "I have three exams next week and I'm completely overwhelmed",
+    "Feeling nervous about tomorrow's presentation",
+    "Had a good study session today, feeling okay",
+    "Not sure how the week went, honestly",
+    "I can't focus and the deadline is tonight",
+    "Pretty relaxed, just reviewing notes",
+]
+GOALS = [
+    "Linear algebra final", "Organic chemistry midterm", "Learn recursion in Python",
+    "European history essay", "Statistics problem set", "Physics lab report",
+]
+TOPICS = ["Linear Algebra", "Calculus", "Physics", "History", "Coding", "Biology"]
+GENERAL_QUESTIONS = [
+    "How should I plan revision for two exams in one week?",
+    "What is a good way to take lecture notes?",
+    "Explain spaced repetition",
+    "How do I stay focused while studying?",
+]
+
+Event = Dict
+
+def _session(rng: random.Random, student: str, corpus_questions: List[str]) -> List[Event]:
+    """One study session: check in, study and ask, maybe plan, log, review"""
+    events = [{"student": student, "kind": "mood", "args": {"text": rng.choice(MOOD_TEXTS)}}]
+    for _ in range(rng.randint(1, 4)):
+        if rng.random() < 0.7:
+            question = rng.choice(corpus_questions)  # Repeats across students exercise the caches
+        else:
+            question = rng.choice(GENERAL_QUESTIONS)
+        events.append({"student": student, "kind": "question", "args": {"question": question}})
+    if rng.random() < 0.3:
+        events.append({"student": student, "kind": "plan",
+                       "args": {"goal": rng.choice(GOALS), "days": rng.randint(2, 14)}})
+    events.append({"student": student, "kind": "study",
+                   "args": {"topic": rng.choice(TOPICS), "minutes": rng.randrange(15, 120, 5)}})
+    events.append({"student": student, "kind": "summary", "args": {}})
+    return events
+
+def generate_trace(
+    students: int = 40,
+    sessions: int = 3,
+    corpus: int = 200,
+    questions: int = 40,
+    seed: int = 0
+) -> Tuple[Dict, List[Event]]:
+    """
+    (header, events) for `students` x `sessions` study sessions
+    Questions are drawn from `questions` descriptive queries over the
+    first `corpus` rows of bench_retrieval.corpus(), which the replay
+    ingests (the header records both).
+    """
+    from ai.benchmarks.bench_retrieval import corpus as build_corpus
+    rng = random.Random(seed)
+    rows = build_corpus(corpus)
+    corpus_questions = [rows[i][2] for i in rng.sample(range(corpus), min(questions, corpus))]
+
+    # Sessions start at random times; merging by time interleaves students
+    timeline: List[Tuple[float, int, List[Event]]] = []
+    for s in range(students):
+        student = f"student-{s}"
+        for _ in range(sessions):
+            timeline.append((rng.random(), len(timeline), _session(rng, student, corpus_questions)))
+    timeline.sort()
+
+    events: List[Event] = [{"student": "ops", "kind": "pull", "args": {"model": "course-notes:latest", "bytes": 64 << 20}}]
+    queue = [(start, order, 0, session) for start, order, session in timeline]
+    heapq.heapify(queue)
+    while queue:
+        at, order, i, session = heapq.heappop(queue)
+        events.append(session[i])
+        if i + 1 < len(session):
+            heapq.heappush(queue, (at + rng.random() * 0.05, order, i + 1, session))
+        if rng.random() < 0.01:
+            events.append({"student": "ops", "kind": "models", "args": {}})
+
+    header = {"trace": TRACE_VERSION, "students": students, "sessions": sessions,
+              "corpus": corpus, "questions": questions, "seed": seed}
+    return header, events
+
+def trace_digest(header: Dict, events: List[Event]) -> str:
+    """Short content hash, so results are only compared for the same trace"""
+    digest = hashlib.sha256(json.dumps(header, sort_keys=True).encode())
+    for event in events:
+        digest.update(json.dumps(event, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+def save_trace(path: str, header: Dict, events: List[Event]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(header) + "\n")
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+
+def load_trace(path: str) -> Tuple[Dict, List[Event]]:
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("trace", 0) > TRACE_VERSION:
+            raise ValueError(f"Trace version {header['trace']} is newer than supported ({TRACE_VERSION})")
+        return header, [json.loads(line) for line in f if line.strip()]
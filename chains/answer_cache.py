@@ -0,0 +1,103 @@
+# ai/chains/answer_cache.py
+import math
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# (route, retrieved doc ids) -- an answer is only reusable for the same pair
+ValidityKey = Tuple[str, Tuple[str, ...]]
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+class SemanticAnswerCache:
+    """
+    Opt-in cache of generated answers, matched on question embeddings:
+    - Hit when cosine(new question, cached question) >= threshold AND the
+      route ("rag"/"general") and retrieved document ids are identical,
+      so re-ingesting changed material invalidates old answers
+    - TTL expiry plus LRU eviction beyond max_entries
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl: float = 3600.0, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()  # LRU order
+        self._by_key: Dict[ValidityKey, List[int]] = {}
+        self._ids = count()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evicted = 0
+
+    def _drop(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        ids = self._by_key[entry["key"]]
+        ids.remove(entry_id)
+        if not ids:
+            del self._by_key[entry["key"]]
+
+    def lookup(self, embedding: Sequence[float], route: str, doc_ids: Sequence[str]) -> Optional[str]:
+        """Cached answer for a semantically equivalent question, or None"""
+        key = (route, tuple(doc_ids))
+        query = _normalize(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            best_id, best_score = None, self.threshold
+            for entry_id in list(self._by_key.get(key, ())):
+                entry = self._entries[entry_id]
+                if now - entry["created"] > self.ttl:
+                    self._drop(entry_id)
+                    self._expired += 1
+                    continue
+                score = sum(a * b for a, b in zip(query, entry["vector"]))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self._hits += 1
+            return self._entries[best_id]["answer"]
+
+    def store(self, embedding: Sequence[float], route: str, doc_ids: Sequence[str], answer: str) -> None:
+        """Remember an answer for this question/route/context"""
+        key = (route, tuple(doc_ids))
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = {
+                "key": key,
+                "vector": _normalize(embedding),
+                "answer": answer,
+                "created": time.monotonic()
+            }
+            self._by_key.setdefault(key, []).append(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._evicted += 1
+
+    def stats(self) -> Dict:
+        """Hit-rate statistics"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "expired": self._expired,
+                "evicted": self._evicted
+            }
+
+    def clear(self) -> None:
+        """Forget every cached answer"""
+        with self._lock:
+            self._entries.clear()
+            self._by_key.clear()
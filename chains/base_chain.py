@@ -1,54 +1,362 @@
 # ai/chains/base_chain.py
+import asyncio
 import os
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING, Callable, Dict, Optional, Tuple, TypeVar, Awaitable, Iterable, Iterator, AsyncIterable, AsyncIterator
+)
 from dotenv import load_dotenv
-from langchain_ollama import OllamaLLM
-from langchain_ollama import OllamaEmbeddings
-from langchain_core.prompts import ChatPromptTemplate
-from ai.tools.ollama_manager import OllamaManager
+from ai.tools.ollama_manager import ModelRegistry
+from ai.tools.tracing import Tracer, llm_span_handler
+
+if TYPE_CHECKING:
+    # Imported on first use: langchain_ollama alone adds ~0.2-0.4s to worker startup
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_ollama import OllamaLLM, OllamaEmbeddings
+    from ai.chains.embedding_cache import CachedEmbeddings
 
 # Load environment variables
 load_dotenv()
 
+T = TypeVar("T")
+
+# Default generation settings shared by every agent
+LLM_PARAMS = {
+    "temperature": 0.7,  # Balance creativity/focus
+    "top_k": 50,         # Broader token sampling
+    "num_ctx": 1024,     # Smaller context = faster
+    "stop": ["<|endoftext|>"]  # Custom stop sequence
+}
+
+# Persistent embedding cache, next to the package's other databases
+# (not relative to the working directory); EMBED_CACHE_PATH overrides it
+EMBED_CACHE_PATH = str(Path(__file__).resolve().parent.parent / "database" / "embedding_cache.db")
+
+class ClientPool:
+    """
+    Process-wide pool of Ollama clients.
+    Clients are keyed by model name + parameters, so agents built with the
+    same settings share one LLM/embeddings client (and its HTTP connections).
+    """
+
+    _default: Optional["ClientPool"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self):
+        self._clients: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> "ClientPool":
+        """Shared pool for the current process"""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls()
+        return cls._default
+
+    @staticmethod
+    def _key(kind: str, model: str, params: Dict) -> Tuple:
+        """Hashable key for a client configuration"""
+        frozen = tuple(sorted(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in params.items()
+        ))
+        return (kind, model, frozen)
+
+    def _get(self, kind: str, factory, model: str, params: Dict):
+        key = self._key(kind, model, params)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = factory(model=model, **params)
+                    self._clients[key] = client
+        return client
+
+    def get_llm(self, model: str, **params) -> "OllamaLLM":
+        """Shared OllamaLLM for this model/parameter combination"""
+        from langchain_ollama import OllamaLLM
+        return self._get("llm", OllamaLLM, model, params)
+
+    def get_embedder(self, model: str, **params) -> "OllamaEmbeddings":
+        """Shared OllamaEmbeddings for this model/parameter combination"""
+        from langchain_ollama import OllamaEmbeddings
+        return self._get("embeddings", OllamaEmbeddings, model, params)
+
+    def get_cached_embedder(self, model: str, cache_path: Optional[str] = None) -> "CachedEmbeddings":
+        """Shared cache-fronted embedder (cache_path=None keeps it in memory only)"""
+        from ai.chains.embedding_cache import CachedEmbeddings
+        embedder = self.get_embedder(model)  # Outside _get: the pool lock isn't reentrant
+
+        def factory(model, cache_path):
+            return CachedEmbeddings(embedder, model, path=cache_path)
+        return self._get("cached_embeddings", factory, model, {"cache_path": cache_path})
+
+    def clear(self) -> None:
+        """Drop all pooled clients (next request builds fresh ones)"""
+        with self._lock:
+            self._clients.clear()
+
+class LLMLimiter:
+    """
+    Process-wide cap on in-flight model calls from the async agent API,
+    so many concurrent students don't oversubscribe the local model server.
+    Keeps one asyncio.Semaphore per event loop (semaphores are loop-bound).
+    """
+
+    _default: Optional["LLMLimiter"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, limit: int = 4, timeout: Optional[float] = 120.0):
+        self.limit = limit
+        self.timeout = timeout
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> "LLMLimiter":
+        """Shared limiter (OLLAMA_MAX_CONCURRENCY, OLLAMA_REQUEST_TIMEOUT seconds; 0 = none)"""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    timeout = float(os.getenv("OLLAMA_REQUEST_TIMEOUT", "120"))
+                    cls._default = cls(
+                        limit=int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4")),
+                        timeout=timeout or None
+                    )
+        return cls._default
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            sem = self._semaphores.get(loop)
+            if sem is None:
+                sem = asyncio.Semaphore(self.limit)
+                self._semaphores[loop] = sem
+        return sem
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the shared model slots (used for streams)"""
+        async with self._semaphore():
+            yield
+
+    async def run(self, call: Callable[[], Awaitable[T]], timeout: Optional[float] = None) -> T:
+        """
+        Make a model call inside a slot: call() is only invoked once a slot
+        is free, so a caller that times out while queued leaves no coroutine
+        behind. The timeout (default self.timeout) covers queueing plus the call.
+        """
+        async def guarded():
+            async with self.slot():
+                return await call()
+        return await asyncio.wait_for(guarded(), timeout or self.timeout)
+
+    async def stream(self, tokens: AsyncIterable[T], timeout: Optional[float] = None) -> AsyncIterator[T]:
+        """
+        Iterate a streamed model call inside a slot.
+        The timeout (default self.timeout) covers queueing plus the whole
+        stream; a stalled stream raises asyncio.TimeoutError and frees its slot.
+        """
+        loop = asyncio.get_running_loop()
+        timeout = timeout or self.timeout
+        deadline = loop.time() + timeout if timeout else None
+
+        def remaining() -> Optional[float]:
+            return None if deadline is None else max(0.0, deadline - loop.time())
+
+        sem = self._semaphore()
+        await asyncio.wait_for(sem.acquire(), remaining())
+        iterator = tokens.__aiter__()
+        try:
+            while True:
+                try:
+                    token = await asyncio.wait_for(iterator.__anext__(), remaining())
+                except StopAsyncIteration:
+                    return
+                yield token
+        finally:
+            sem.release()
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+
+class StreamTimer:
+    """
+    Time-to-first-token and token throughput for one streamed generation.
+    Callers create one per stream and pass it to the streaming method,
+    so concurrent streams never share timing state.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.end: Optional[float] = None
+        self.tokens = 0
+
+    def tick(self) -> None:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.tokens += 1
+
+    def stop(self) -> None:
+        self.end = time.perf_counter()
+
+    def result(self) -> Dict:
+        elapsed = (self.end or time.perf_counter()) - self.start
+        decode = elapsed - (self.first_token_at - self.start) if self.first_token_at else 0.0
+        return {
+            "ttft_ms": (self.first_token_at - self.start) * 1000 if self.first_token_at else None,
+            "tokens": self.tokens,
+            "seconds": elapsed,
+            "tokens_per_second": (self.tokens - 1) / decode if decode > 0 else 0.0
+        }
+
 class BaseChain:
     """
     Core LLM and embeddings setup with Ollama.
     Handles model initialization and basic prompt templating.
+    Clients and model checks are shared process-wide (see ClientPool/ModelRegistry).
+    Embeddings go through a persistent cache (EMBED_CACHE_PATH, empty = memory only).
+    Streaming variants take an optional StreamTimer for TTFT and tokens/s.
+    Async methods share LLMLimiter.default() for bounded concurrency.
+    The LLM, embedder and prompt are built (and their models verified) on
+    first use, so constructing an agent is cheap.
+    With tracing on (see tools/tracing.py), every LLM call is recorded as
+    an "llm" span with prompt/output token counts.
     """
-    
+
     def __init__(self):
-        # Verify required models are available
-        self._verify_models()
-        
-        # Initialize LLM with custom settings
-        self.llm = OllamaLLM(
-            model=os.getenv("OLLAMA_MODEL", "mistral"),
-            temperature=0.7,  # Balance creativity/focus
-            top_k=50,        # Broader token sampling
-            num_ctx=1024,  # Smaller context = faster 
-            stop=["<|endoftext|>"]  # Custom stop sequence
-        )
-        
-        # Initialize embeddings
-        self.embedder = OllamaEmbeddings(
-            model=os.getenv("OLLAMA_EMBEDDINGS", "nomic-embed-text")
-        )
-        
-        # Base prompt template for all chains
-        self.base_prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an AI Study Buddy. Respond helpfully and concisely."),
-            ("human", "{input}")
-        ])
+        self.llm_model = os.getenv("OLLAMA_MODEL", "mistral")
+        self.embeddings_model = os.getenv("OLLAMA_EMBEDDINGS", "nomic-embed-text")
+        self._llm: Optional["OllamaLLM"] = None
+        self._traced_llm = None
+        self._embedder: Optional["CachedEmbeddings"] = None
+        self._base_prompt: Optional["ChatPromptTemplate"] = None
+        self._lazy_lock = threading.RLock()  # Guards first use of every lazy attribute
+
+        # Shared cap on concurrent async model calls
+        self.limiter = LLMLimiter.default()
+
+    @property
+    def llm(self) -> "OllamaLLM":
+        """Pooled LLM client, verified and created on first access"""
+        if self._llm is None:
+            with self._lazy_lock:
+                if self._llm is None:
+                    self._ensure_model(self.llm_model)
+                    self._llm = ClientPool.default().get_llm(self.llm_model, **LLM_PARAMS)
+        tracer = Tracer.default()
+        if tracer.enabled:
+            if self._traced_llm is None:
+                self._traced_llm = self._llm.with_config(callbacks=[llm_span_handler(tracer)])
+            return self._traced_llm
+        return self._llm
+
+    @property
+    def embedder(self) -> "CachedEmbeddings":
+        """Pooled cache-fronted embedder, verified and created on first access"""
+        if self._embedder is None:
+            with self._lazy_lock:
+                if self._embedder is None:
+                    self._ensure_model(self.embeddings_model)
+                    self._embedder = ClientPool.default().get_cached_embedder(
+                        self.embeddings_model,
+                        os.getenv("EMBED_CACHE_PATH", EMBED_CACHE_PATH) or None
+                    )
+        return self._embedder
+
+    @property
+    def base_prompt(self) -> "ChatPromptTemplate":
+        """Base prompt template for all chains"""
+        if self._base_prompt is None:
+            from langchain_core.prompts import ChatPromptTemplate
+            self._base_prompt = ChatPromptTemplate.from_messages([
+                ("system", "You are an AI Study Buddy. Respond helpfully and concisely."),
+                ("human", "{input}")
+            ])
+        return self._base_prompt
 
     def _verify_models(self):
-        """Ensure required Ollama models are pulled and available"""
-        OllamaManager().pull_model(os.getenv("OLLAMA_MODEL", "mistral"))
-        OllamaManager().pull_model(os.getenv("OLLAMA_EMBEDDINGS", "nomic-embed-text"))
+        """Ensure required Ollama models are pulled and available (eagerly, e.g. at deploy time)"""
+        self._ensure_model(self.llm_model)
+        self._ensure_model(self.embeddings_model)
+
+    @staticmethod
+    def _ensure_model(model: str) -> None:
+        with Tracer.default().span("verify", model=model):
+            ModelRegistry.default().ensure(model)
 
     def generate(self, input_text: str, **kwargs) -> str:
         """Base generation method with templating"""
         chain = self.base_prompt | self.llm
         return chain.invoke({"input": input_text, **kwargs})
 
+    async def agenerate(self, input_text: str, **kwargs) -> str:
+        """Async generate(), bounded by the shared limiter"""
+        chain = self.base_prompt | await self._allm()
+        return await self.limiter.run(lambda: chain.ainvoke({"input": input_text, **kwargs}))
+
+    def stream_generate(self, input_text: str, timer: Optional[StreamTimer] = None, **kwargs) -> Iterator[str]:
+        """generate(), yielding tokens as the LLM produces them (timed into timer if given)"""
+        chain = self.base_prompt | self.llm
+        yield from self._timed_stream(chain.stream({"input": input_text, **kwargs}), timer)
+
+    async def astream_generate(
+        self,
+        input_text: str,
+        timer: Optional[StreamTimer] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Async iterator version of stream_generate()"""
+        chain = self.base_prompt | await self._allm()
+        tokens = self.limiter.stream(chain.astream({"input": input_text, **kwargs}))
+        async for token in self._atimed_stream(tokens, timer):
+            yield token
+
+    async def _allm(self) -> "OllamaLLM":
+        """self.llm for async callers: the first access (model check, maybe a pull) runs off the event loop"""
+        if self._llm is None:
+            return await asyncio.to_thread(lambda: self.llm)
+        return self.llm
+
+    @staticmethod
+    def _timed_stream(tokens: Iterable[str], timer: Optional[StreamTimer] = None) -> Iterator[str]:
+        """
+        Pass tokens through, ticking timer per token and stopping it when the
+        stream ends (also when the consumer stops early). No timer, no timing.
+        A timer started earlier includes pre-generation work in TTFT.
+        """
+        if timer is None:
+            yield from tokens
+            return
+        try:
+            for token in tokens:
+                timer.tick()
+                yield token
+        finally:
+            timer.stop()
+
+    @staticmethod
+    async def _atimed_stream(
+        tokens: AsyncIterable[str],
+        timer: Optional[StreamTimer] = None
+    ) -> AsyncIterator[str]:
+        """Async version of _timed_stream()"""
+        try:
+            async for token in tokens:
+                if timer is not None:
+                    timer.tick()
+                yield token
+        finally:
+            if timer is not None:
+                timer.stop()
+
 # Quick test
 if __name__ == "__main__":
     chain = BaseChain()
@@ -0,0 +1,140 @@
+# ai/chains/context_assembler.py
+"""
+Builds the RAG context for a question from retrieved chunks.
+Overlapping chunk text is deduplicated, each chunk is cut down to the
+sentences that share terms with the question, and the result is packed
+into what is left of the model's context window (num_ctx minus prompt
+template, question and room for the answer). Only page content is
+rendered -- no metadata.
+"""
+import math
+import re
+from typing import Callable, List, NamedTuple, Optional, Sequence
+from ai.tools.bm25_index import tokenize
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+_PIECE = re.compile(r"\w+|[^\w\s]")
+
+def count_tokens(text: str) -> int:
+    """Approximate LLM token count: words and punctuation marks, +15% for sub-word splits"""
+    return math.ceil(len(_PIECE.findall(text)) * 1.15)
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE.split(text) if s.strip()]
+
+class AssembledContext(NamedTuple):
+    text: str
+    tokens: int           # Context tokens actually sent
+    raw_tokens: int       # Tokens the unprocessed chunks (with metadata) would have cost
+    budget: int           # Context tokens available for this question
+    chunks: int           # Retrieved chunks that contributed sentences
+    sentences: int
+    dropped_duplicates: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.raw_tokens - self.tokens)
+
+class ContextAssembler:
+    """
+    Token-budgeted context for the RAG prompt:
+    - Sentences repeated across chunks (chunk overlap, re-ingested copies)
+      or contained in a longer kept sentence are dropped
+    - Sentences are ranked by question-term overlap (idf-weighted over the
+      retrieved sentences, earlier chunks break ties) and packed greedily
+    - When nothing overlaps the question (paraphrase matches), chunks are
+      kept in retrieval order instead, still within budget
+    - Selected sentences are rendered in their original order, one
+      paragraph per chunk
+    """
+
+    def __init__(
+        self,
+        num_ctx: int = 1024,
+        answer_tokens: int = 256,
+        max_sentences: Optional[int] = None,
+        token_counter: Callable[[str], int] = count_tokens
+    ):
+        """
+        Args:
+            num_ctx: Model context window in tokens (LLM_PARAMS["num_ctx"])
+            answer_tokens: Tokens kept free for the generated answer
+            max_sentences: Optional cap on selected sentences, even under budget
+            token_counter: Tokenizer-backed counter, if one is available
+        """
+        self.num_ctx = num_ctx
+        self.answer_tokens = answer_tokens
+        self.max_sentences = max_sentences
+        self.count_tokens = token_counter
+
+    def budget(self, question: str, template_tokens: int = 0) -> int:
+        """Context tokens left after template, question and answer reserve"""
+        return max(0, self.num_ctx - self.answer_tokens - template_tokens - self.count_tokens(question))
+
+    def assemble(self, question: str, docs: Sequence, template_tokens: int = 0) -> AssembledContext:
+        """Context text for `question` from retrieved documents (best first)"""
+        budget = self.budget(question, template_tokens)
+        raw_tokens = self.count_tokens(str(list(docs))) if docs else 0
+
+        # (chunk rank, position, sentence, normalized form), overlap removed
+        sentences = []
+        kept: List[str] = []
+        dropped = 0
+        for rank, doc in enumerate(docs):
+            for position, sentence in enumerate(split_sentences(doc.page_content)):
+                norm = " ".join(sentence.lower().split())
+                if any(norm in other for other in kept):
+                    dropped += 1
+                    continue
+                # A fragment cut at a chunk boundary may have been kept first
+                for i, other in enumerate(kept):
+                    if other and other in norm:
+                        kept[i] = ""
+                        sentences[i] = None
+                        dropped += 1
+                kept.append(norm)
+                sentences.append((rank, position, sentence, norm))
+        sentences = [s for s in sentences if s is not None]
+
+        # idf over the retrieved sentences: terms in every sentence carry no signal
+        terms = set(tokenize(question))
+        sentence_terms = [set(tokenize(s[3])) & terms for s in sentences]
+        df = {t: sum(t in st for st in sentence_terms) for t in terms}
+        n = len(sentences)
+        scores = [
+            sum(math.log(1 + n / df[t]) for t in st) / math.sqrt(1 + len(s[3].split()) / 20)
+            for s, st in zip(sentences, sentence_terms)
+        ]
+        signal = any(scores)
+        if signal:
+            order = sorted(range(n), key=lambda i: (-scores[i], sentences[i][0], sentences[i][1]))
+        else:
+            order = list(range(n))  # No lexical signal: trust retrieval order
+
+        chosen, used = [], 0
+        for i in order:
+            if signal and scores[i] <= 0:
+                break
+            if self.max_sentences is not None and len(chosen) >= self.max_sentences:
+                break
+            cost = self.count_tokens(sentences[i][2]) + 1
+            if used + cost > budget:
+                continue  # A shorter sentence may still fit
+            chosen.append(i)
+            used += cost
+
+        paragraphs, by_chunk = [], {}
+        for i in sorted(chosen, key=lambda i: sentences[i][:2]):
+            by_chunk.setdefault(sentences[i][0], []).append(sentences[i][2])
+        for rank in sorted(by_chunk):
+            paragraphs.append(" ".join(by_chunk[rank]))
+        text = "\n\n".join(paragraphs)
+        return AssembledContext(
+            text=text,
+            tokens=self.count_tokens(text) if text else 0,
+            raw_tokens=raw_tokens,
+            budget=budget,
+            chunks=len(by_chunk),
+            sentences=len(chosen),
+            dropped_duplicates=dropped
+        )
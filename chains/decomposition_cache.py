@@ -0,0 +1,149 @@
+# ai/chains/decomposition_cache.py
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+def normalize_goal(goal: str) -> str:
+    """Case- and whitespace-insensitive form of a goal"""
+    return " ".join(goal.split()).casefold()
+
+class DecompositionCache:
+    """
+    Persistent cache of validated goal breakdowns ([{"topic", "hours"}, ...]):
+    - Keyed on (model, normalized goal, total hours)
+    - Same goal with different total hours -> nearest entry, hours rescaled
+    - TTL expiry plus LRU eviction beyond max_entries
+    SQLite file (WAL) when path is given, otherwise an in-memory database.
+    Lookups only read: expired rows are skipped and deleted on the next
+    put(), and last-used times are kept in memory and written in batches
+    (every touch_batch hits, on put(), stats() and close()).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = 30 * 86400,
+        max_entries: int = 10_000,
+        touch_batch: int = 256
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.touch_batch = touch_batch
+        self._touched: Dict[Tuple[str, str, float], float] = {}  # key -> last_used not yet written
+        if path and path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path or ":memory:", check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._rescaled = 0
+        self._misses = 0
+        self._expired = 0
+        self._evicted = 0
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS decompositions (
+                    model TEXT NOT NULL,
+                    goal TEXT NOT NULL,
+                    total_hours REAL NOT NULL,
+                    tasks TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model, goal, total_hours)
+                ) WITHOUT ROWID""")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_decompositions_last_used ON decompositions (last_used)"
+            )
+
+    def get(self, goal: str, total_hours: float, model: str) -> Optional[List[Dict]]:
+        """Cached breakdown for this goal, rescaled to total_hours if needed (None on miss)"""
+        goal = normalize_goal(goal)
+        now = time.time()
+        with self._lock:
+            # Exact hours first, otherwise the closest cached total
+            row = self.conn.execute(
+                "SELECT total_hours, tasks FROM decompositions WHERE model = ? AND goal = ? AND created >= ? "
+                "ORDER BY ABS(total_hours - ?) LIMIT 1",
+                (model, goal, now - self.ttl, total_hours)
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+
+            cached_hours, tasks = row
+            self._touched[(model, goal, cached_hours)] = now
+            if len(self._touched) >= self.touch_batch:
+                with self.conn:
+                    self._write_touches()
+            tasks = json.loads(tasks)
+            if cached_hours == total_hours:
+                self._hits += 1
+                return tasks
+
+            self._rescaled += 1
+            scale = total_hours / cached_hours if cached_hours else 1.0
+            return [{**task, "hours": round(task["hours"] * scale, 2)} for task in tasks]
+
+    def put(self, goal: str, total_hours: float, model: str, tasks: List[Dict]) -> None:
+        """Remember a validated breakdown"""
+        now = time.time()
+        with self._lock, self.conn:
+            self._write_touches()
+            self._expired += self.conn.execute(
+                "DELETE FROM decompositions WHERE created < ?", (now - self.ttl,)
+            ).rowcount
+            self.conn.execute(
+                "INSERT OR REPLACE INTO decompositions (model, goal, total_hours, tasks, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (model, normalize_goal(goal), total_hours, json.dumps(tasks), now, now)
+            )
+            overflow = self.conn.execute("SELECT COUNT(*) FROM decompositions").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._evicted += self.conn.execute(
+                    "DELETE FROM decompositions WHERE (model, goal, total_hours) IN "
+                    "(SELECT model, goal, total_hours FROM decompositions ORDER BY last_used LIMIT ?)",
+                    (overflow,)
+                ).rowcount
+
+    def stats(self) -> Dict:
+        """Hit-rate statistics"""
+        with self._lock:
+            with self.conn:
+                self._write_touches()
+            lookups = self._hits + self._rescaled + self._misses
+            entries = self.conn.execute("SELECT COUNT(*) FROM decompositions").fetchone()[0]
+            return {
+                "hits": self._hits,
+                "rescaled": self._rescaled,
+                "misses": self._misses,
+                "hit_rate": (self._hits + self._rescaled) / lookups if lookups else 0.0,
+                "entries": entries,
+                "expired": self._expired,
+                "evicted": self._evicted
+            }
+
+    def clear(self) -> None:
+        """Forget every cached breakdown"""
+        with self._lock, self.conn:
+            self._touched.clear()
+            self.conn.execute("DELETE FROM decompositions")
+
+    def close(self) -> None:
+        """Write pending last-used times and close the database"""
+        with self._lock:
+            with self.conn:
+                self._write_touches()
+            self.conn.close()
+
+    def _write_touches(self) -> None:
+        """Write batched last-used times (caller holds the lock, inside a transaction)"""
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE decompositions SET last_used = ? WHERE model = ? AND goal = ? AND total_hours = ?",
+                [(used, model, goal, hours) for (model, goal, hours), used in self._touched.items()]
+            )
+            self._touched.clear()
@@ -0,0 +1,148 @@
+# ai/chains/embedding_cache.py
+import hashlib
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from ai.tools.tracing import span
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with a two-level cache:
+    - In-memory LRU front (bounded number of vectors)
+    - SQLite file keyed by (model, sha256(text)), optional
+    Batch lookups embed all misses with a single bulk request.
+    """
+
+    def __init__(
+        self,
+        embedder: Embeddings,
+        model_name: str,
+        path: Optional[str] = None,
+        max_memory_items: int = 10_000
+    ):
+        self.embedder = embedder
+        self.model_name = model_name
+        self.max_memory_items = max_memory_items
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits_memory = 0
+        self._hits_disk = 0
+        self._misses = 0
+        self._embed_calls = 0
+
+        self.conn = None
+        if path:
+            if path != ":memory:":
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            with self.conn:
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.conn.execute("""
+                    CREATE TABLE IF NOT EXISTS embeddings (
+                        model TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        vector BLOB NOT NULL,
+                        PRIMARY KEY (model, key)
+                    ) WITHOUT ROWID""")
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        """Insert into the LRU front, evicting the least recently used"""
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_memory_items:
+            self._lru.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Cached vectors for the given keys (memory first, then disk)"""
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = vector
+            self._hits_memory += len(found)
+
+            missing = [k for k in dict.fromkeys(keys) if k not in found]
+            if missing and self.conn is not None:
+                for start in range(0, len(missing), 500):
+                    part = missing[start:start + 500]
+                    rows = self.conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE model = ? "
+                        f"AND key IN ({','.join('?' * len(part))})",
+                        [self.model_name, *part]
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = array("f", blob).tolist()
+                        found[key] = vector
+                        self._remember(key, vector)
+                        self._hits_disk += 1
+        return found
+
+    def _store(self, items: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (model, key, vector) VALUES (?, ?, ?)",
+                        [(self.model_name, key, array("f", vector).tobytes())
+                         for key, vector in items.items()]
+                    )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, only sending cache misses to the model (in one request)"""
+        with span("embed", texts=len(texts)) as s:
+            keys = [self._key(t) for t in texts]
+            found = self._lookup(keys)
+
+            # One request for all distinct misses
+            pending: Dict[str, str] = {}
+            for key, text in zip(keys, texts):
+                if key not in found and key not in pending:
+                    pending[key] = text
+            s.set(cache_hits=len(texts) - len(pending), embedded=len(pending))
+            if pending:
+                vectors = self.embedder.embed_documents(list(pending.values()))
+                fresh = dict(zip(pending, vectors))
+                self._store(fresh)
+                found.update(fresh)
+                with self._lock:
+                    self._misses += len(pending)
+                    self._embed_calls += 1
+
+            return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query through the same cache"""
+        return self.embed_documents([text])[0]
+
+    def stats(self) -> Dict:
+        """Hit/miss counters"""
+        with self._lock:
+            lookups = self._hits_memory + self._hits_disk + self._misses
+            return {
+                "hits_memory": self._hits_memory,
+                "hits_disk": self._hits_disk,
+                "misses": self._misses,
+                "hit_rate": (self._hits_memory + self._hits_disk) / lookups if lookups else 0.0,
+                "embed_calls": self._embed_calls,
+                "memory_items": len(self._lru)
+            }
+
+    def clear(self) -> None:
+        """Drop every cached vector for this model"""
+        with self._lock:
+            self._lru.clear()
+            if self.conn is not None:
+                with self.conn:
+                    self.conn.execute("DELETE FROM embeddings WHERE model = ?", (self.model_name,))
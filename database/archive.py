@@ -0,0 +1,234 @@
+# ai/database/archive.py
+"""
+Streaming export/import formats for ProgressDB.
+Every format is written and read one record (or one record batch) at a
+time, so memory does not grow with history size:
+- NDJSON (.ndjson/.jsonl, optionally .gz): a header line, then one
+  {"table", "id", "record"} object per line
+- Parquet (.parquet) and Arrow IPC (.arrow/.feather/.ipc): zstd-compressed
+  columnar archive with typed columns from RECORD_FIELDS, requires pyarrow
+- JSON (anything else): the original {"sessions": [...], ...} layout,
+  still written incrementally; reading it loads the whole file
+"""
+import gzip
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Tuple, Union
+from ai.database.storage import INDEXED_FIELDS, RECORD_FIELDS, TABLES
+
+# (table, doc id, record) -- doc id is None when the source has none
+Row = Tuple[str, Optional[int], Dict]
+
+FORMAT_NAME = "progressdb"
+FORMAT_VERSION = 1
+
+# Keys of the original export_data() JSON layout
+LEGACY_KEYS = {"study_sessions": "sessions", "interactions": "interactions", "goals": "goals"}
+
+FORMATS = {
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+def detect_format(path: Union[str, Path]) -> str:
+    """Format from the file name (a trailing .gz is looked through)"""
+    suffixes = Path(path).suffixes
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes = suffixes[:-1]
+    return FORMATS.get(suffixes[-1] if suffixes else "", "json")
+
+def as_iso(value: Union[str, datetime, None]) -> Optional[str]:
+    """Date-range bound as the ISO string timestamps are compared with"""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def in_range(record: Dict, since: Optional[str], until: Optional[str]) -> bool:
+    """since <= timestamp < until, like StorageBackend.search"""
+    if since is None and until is None:
+        return True
+    ts = record.get("timestamp")
+    return ts is not None and (since is None or ts >= since) and (until is None or ts < until)
+
+def _open_text(path: Union[str, Path], mode: str) -> IO[str]:
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", compresslevel=6)
+    return open(path, mode, encoding="utf-8")
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet/Arrow archives require pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+def write_rows(rows: Iterable[Row], path: Union[str, Path], fmt: Optional[str] = None, batch_size: int = 5000) -> Dict[str, int]:
+    """Write rows to `path`, return {table: records written}"""
+    fmt = fmt or detect_format(path)
+    if fmt == "ndjson":
+        return _write_ndjson(rows, path)
+    if fmt in ("parquet", "arrow"):
+        return _write_columnar(rows, path, fmt, batch_size)
+    if fmt == "json":
+        return _write_json(rows, path)
+    raise ValueError(f"Unknown archive format: {fmt}")
+
+def read_rows(path: Union[str, Path], fmt: Optional[str] = None, batch_size: int = 5000) -> Iterator[Row]:
+    """Rows of an archive written by write_rows (or an old export_data file)"""
+    fmt = fmt or detect_format(path)
+    if fmt == "ndjson":
+        return _read_ndjson(path)
+    if fmt in ("parquet", "arrow"):
+        return _read_columnar(path, fmt, batch_size)
+    if fmt == "json":
+        return _read_json(path)
+    raise ValueError(f"Unknown archive format: {fmt}")
+
+# NDJSON
+def _write_ndjson(rows: Iterable[Row], path: Union[str, Path]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    with _open_text(path, "w") as f:
+        f.write(json.dumps({"format": FORMAT_NAME, "version": FORMAT_VERSION}) + "\n")
+        for table, doc_id, record in rows:
+            f.write(json.dumps({"table": table, "id": doc_id, "record": record}) + "\n")
+            counts[table] = counts.get(table, 0) + 1
+    return counts
+
+def _read_ndjson(path: Union[str, Path]) -> Iterator[Row]:
+    with _open_text(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            obj = json.loads(line)
+            if "format" in obj:
+                if obj["format"] != FORMAT_NAME or obj.get("version", 1) > FORMAT_VERSION:
+                    raise ValueError(f"Unsupported archive: {obj}")
+                continue
+            yield obj["table"], obj.get("id"), obj["record"]
+
+# Original JSON layout
+def _write_json(rows: Iterable[Row], path: Union[str, Path]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    current = None
+    with _open_text(path, "w") as f:
+        f.write("{")
+        for table, _, record in rows:
+            if table != current:
+                if table in counts:
+                    raise ValueError(f"Rows for {table} must be contiguous in the JSON layout")
+                f.write(("\n  ]," if current is not None else "") + f"\n  {json.dumps(LEGACY_KEYS.get(table, table))}: [")
+                current = table
+                counts[table] = 0
+            f.write(("," if counts[table] else "") + "\n    " + json.dumps(record))
+            counts[table] += 1
+        f.write("\n  ]\n}\n" if current is not None else "}\n")
+    return counts
+
+def _read_json(path: Union[str, Path]) -> Iterator[Row]:
+    tables = {key: table for table, key in LEGACY_KEYS.items()}
+    with _open_text(path, "r") as f:
+        data = json.load(f)
+    for key, records in data.items():
+        for record in records:
+            yield tables.get(key, key), None, record
+
+# Columnar: each table's declared fields (RECORD_FIELDS, or the indexed
+# fields for tables without a declaration) get typed, nullable columns.
+# "missing" lists declared fields a record lacks, so an absent key and a
+# None value both round-trip. Undeclared keys, and values that don't fit
+# their column's type, go to the JSON "data" column.
+_FITS = {
+    "string": lambda v: isinstance(v, str),
+    "int64": lambda v: isinstance(v, int) and not isinstance(v, bool) and -2 ** 63 <= v < 2 ** 63,
+    "float64": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "list<string>": lambda v: isinstance(v, list) and all(isinstance(x, str) for x in v),
+}
+
+def _table_fields(table: str) -> Dict[str, str]:
+    return RECORD_FIELDS.get(table) or {field: "string" for field in INDEXED_FIELDS}
+
+def _columns() -> Dict[str, str]:
+    """Union of the declared fields of every table"""
+    columns: Dict[str, str] = {}
+    for table in TABLES + tuple(RECORD_FIELDS):
+        for field, kind in _table_fields(table).items():
+            if columns.setdefault(field, kind) != kind:
+                raise ValueError(f"Field {field} is declared as both {columns[field]} and {kind}")
+    return columns
+
+def _schema(pa):
+    types = {
+        "string": pa.string(), "int64": pa.int64(), "float64": pa.float64(),
+        "list<string>": pa.list_(pa.string())
+    }
+    return pa.schema(
+        # Plain strings: IPC files can't change a dictionary between batches
+        [("table", pa.string()), ("id", pa.int64())]
+        + [(field, types[kind]) for field, kind in _columns().items()]
+        + [("missing", pa.list_(pa.string())), ("data", pa.string())]
+    )
+
+def _batch(pa, schema, rows: List[Row]):
+    columns = {name: [] for name in schema.names}
+    kinds = _columns()
+    for table, doc_id, record in rows:
+        columns["table"].append(table)
+        columns["id"].append(doc_id)
+        rest = dict(record)
+        fields = _table_fields(table)
+        missing = [field for field in fields if field not in rest]
+        for field, kind in kinds.items():
+            value = rest.get(field)
+            if field in fields and (value is None or _FITS[kind](value)):
+                rest.pop(field, None)
+            else:
+                value = None
+            columns[field].append(value)
+        columns["missing"].append(missing)
+        columns["data"].append(json.dumps(rest))
+    return pa.record_batch([pa.array(columns[name], type=schema.field(name).type) for name in schema.names], schema=schema)
+
+def _write_columnar(rows: Iterable[Row], path: Union[str, Path], fmt: str, batch_size: int) -> Dict[str, int]:
+    pa = _pyarrow()
+    schema = _schema(pa)
+    if fmt == "parquet":
+        writer = pa.parquet.ParquetWriter(str(path), schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(str(path), schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+    write = writer.write_batch
+
+    counts: Dict[str, int] = {}
+    pending: List[Row] = []
+    try:
+        for row in rows:
+            pending.append(row)
+            counts[row[0]] = counts.get(row[0], 0) + 1
+            if len(pending) >= batch_size:
+                write(_batch(pa, schema, pending))
+                pending = []
+        if pending:
+            write(_batch(pa, schema, pending))
+    finally:
+        writer.close()
+    return counts
+
+def _read_columnar(path: Union[str, Path], fmt: str, batch_size: int) -> Iterator[Row]:
+    pa = _pyarrow()
+    if fmt == "parquet":
+        batches = pa.parquet.ParquetFile(str(path)).iter_batches(batch_size=batch_size)
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(str(path)))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for batch in batches:
+        for row in batch.to_pylist():
+            missing = set(row["missing"])
+            record = {
+                field: row[field] for field in _table_fields(row["table"]) if field not in missing
+            }
+            record.update(json.loads(row["data"]))  # Extra keys and values kept out of typed columns
+            yield row["table"], row["id"], record
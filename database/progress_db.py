@@ -1,92 +1,287 @@
 # ai/database/progress_db.py
-from datetime import datetime
-from typing import Optional, List, Dict
-from tinydb import TinyDB, Query, where
-from tinydb.table import Document
-import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Literal, Set, Tuple, Iterable, Iterator, Union
+from ai.database.archive import Row, as_iso, in_range, read_rows, write_rows
+from ai.database.storage import TABLES, open_backend, rollup_deltas, rebuild_rollups
+from ai.database.write_buffer import WriteBehindBuffer
+from ai.tools.mood_classifier import lexical_sentiment
+from ai.tools.tracing import span
 
 class ProgressDB:
     """
-    Track study progress and interactions using TinyDB
+    Track study progress and interactions
+    Storage is pluggable (see storage.py): TinyDB JSON file or SQLite (WAL).
     Features:
     - Log study sessions
     - Record Q&A history
     - Track streaks and goals
-    - Export/import data
+    - Streaming export/import (NDJSON, JSON, Parquet/Arrow; see archive.py)
+    - Optional write-behind mode (batched background inserts)
+    - Daily per-topic rollups, so summaries cost O(days) not O(sessions)
+    - Per-student partitioning for many tenants (see tenant_db.py)
     """
+
+    # Lookback of the named summary periods (anything else counts as "month")
+    PERIODS = {"week": timedelta(days=7), "month": timedelta(days=30)}
     
-    def __init__(self, db_path: str = "ai/database/progress.json"):
-        self.db = TinyDB(db_path, indent=4)
-        self.sessions = self.db.table('study_sessions')
-        self.interactions = self.db.table('interactions')
-        self.goals = self.db.table('goals')
+    def __init__(
+        self,
+        db_path: str = "ai/database/progress.json",
+        backend: Literal["auto", "tinydb", "sqlite"] = "auto",
+        write_behind: bool = False,
+        flush_size: int = 100,
+        flush_interval: float = 1.0
+    ):
+        # "auto": *.db/*.sqlite/:memory: -> SQLite, anything else -> TinyDB
+        self.storage = open_backend(db_path, backend)
+
+        # Databases written before rollups existed get them built once
+        if not self.storage.count_rollups() and self.storage.count('study_sessions'):
+            rebuild_rollups(self.storage)
+
+        # Write-behind: log_* calls queue records and return None instead of a doc id
+        self.buffer = (
+            WriteBehindBuffer(self._write_many, flush_size, flush_interval)
+            if write_behind else None
+        )
         
     def log_study_session(
         self,
         topic: str,
         duration_min: int,
         resources: Optional[List[str]] = None,
-        effectiveness: Optional[int] = None
-    ) -> int:
-        """Record a study session"""
-        doc_id = self.sessions.insert({
+        effectiveness: Optional[int] = None,
+        sync: bool = False
+    ) -> Optional[int]:
+        """
+        Record a study session
+        Returns the doc id, or None if it was queued (write-behind mode
+        without sync=True)
+        """
+        doc_id = self._insert('study_sessions', {
             'timestamp': datetime.now().isoformat(),
             'topic': topic,
             'duration_min': duration_min,
             'resources': resources or [],
             'effectiveness': effectiveness,  # 1-5 scale
             'tags': self._generate_tags(topic)
-        })
+        }, sync)
         return doc_id
 
     def log_interaction(
         self,
         query: str,
         response: str,
-        interaction_type: str
-    ) -> int:
-        """Record Q&A or wellness interactions"""
-        return self.interactions.insert({
+        interaction_type: str,
+        sync: bool = False
+    ) -> Optional[int]:
+        """Record Q&A or wellness interactions (see log_study_session for sync)"""
+        return self._insert('interactions', {
             'timestamp': datetime.now().isoformat(),
             'query': query,
             'response': response[:500],  # Truncate long responses
             'type': interaction_type,
             'sentiment': self._analyze_sentiment(response)
-        })
+        }, sync)
 
     def get_streak(self, days: int = 7) -> int:
         """Calculate current study streak"""
-        recent_sessions = self.sessions.search(
-            where('timestamp') >= (datetime.now() - timedelta(days=days)).isoformat()
-        )
-        return len({s['timestamp'][:10] for s in recent_sessions})  # Unique days
-
-    def get_study_summary(self, period: str = "week") -> Dict:
-        """Get summary stats for time period"""
-        if period == "week":
-            cutoff = datetime.now() - timedelta(days=7)
-        else:  # month
-            cutoff = datetime.now() - timedelta(days=30)
-            
-        sessions = self.sessions.search(where('timestamp') >= cutoff.isoformat())
-        
+        _, active_days = self._range_stats(datetime.now() - timedelta(days=days))
+        return len(active_days)  # Unique days
+
+    def get_study_summary(
+        self,
+        period: str = "week",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Dict:
+        """
+        Get summary stats for time period
+        period: "week", "month", or "custom" (sessions in [start, end))
+        """
+        topic_minutes = self.get_topic_minutes(period, start, end)
+
         return {
-            'total_hours': sum(s['duration_min'] for s in sessions) / 60,
-            'top_topics': self._get_top_topics(sessions),
+            'total_hours': sum(topic_minutes.values()) / 60,
+            'top_topics': self._get_top_topics(topic_minutes),
             'streak': self.get_streak()
         }
 
-    def export_data(self, filepath: str) -> None:
-        """Export all data to JSON"""
-        data = {
-            'sessions': self.sessions.all(),
-            'interactions': self.interactions.all(),
-            'goals': self.goals.all()
-        }
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+    def get_topic_minutes(
+        self,
+        period: str = "week",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """Minutes studied per topic over a period (same periods as get_study_summary)"""
+        if period == "custom" or start is not None:
+            if start is None:
+                raise ValueError("Custom summaries need a start datetime")
+            cutoff = start
+        else:
+            cutoff = datetime.now() - self.PERIODS.get(period, self.PERIODS["month"])
+
+        topic_minutes, _ = self._range_stats(cutoff, end)
+        return topic_minutes
+
+    def rebuild_rollups(self) -> int:
+        """Recompute daily rollups from raw sessions (returns sessions scanned)"""
+        self.flush()
+        return rebuild_rollups(self.storage)
+
+    def export_data(
+        self,
+        filepath: str,
+        tables: Optional[Iterable[str]] = None,
+        since: Union[datetime, str, None] = None,
+        until: Union[datetime, str, None] = None,
+        fmt: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        Stream records to a file, one page at a time
+        Format follows the file name unless fmt is given: .ndjson/.jsonl
+        (optionally .gz), .parquet, .arrow/.feather (pyarrow), anything
+        else is the original JSON layout. tables/since/until narrow the
+        export (date bounds match get_study_summary: [since, until)).
+        Returns {table: records exported}.
+        """
+        self.flush()
+        return write_rows(self._iter_rows(tables, as_iso(since), as_iso(until)), filepath, fmt)
+
+    def import_data(
+        self,
+        filepath: str,
+        tables: Optional[Iterable[str]] = None,
+        since: Union[datetime, str, None] = None,
+        until: Union[datetime, str, None] = None,
+        fmt: Optional[str] = None,
+        batch_size: int = 5000,
+        keep_ids: bool = False
+    ) -> Dict[str, int]:
+        """
+        Bulk-load an export_data file in batches (rollups are kept in step)
+        keep_ids=True restores the original doc ids, for loading into an
+        empty database; by default records get new ids and are appended.
+        Returns {table: records imported}.
+        """
+        self.flush()
+        wanted = set(tables) if tables is not None else None
+        since, until = as_iso(since), as_iso(until)
+        pending: Dict[str, List[Row]] = defaultdict(list)
+        counts: Dict[str, int] = defaultdict(int)
+
+        def write(table: str) -> None:
+            rows = pending.pop(table)
+            ids = [doc_id for _, doc_id, _ in rows]
+            if not keep_ids or None in ids:  # The original JSON layout has no ids
+                ids = None
+            self._write_many(table, [record for _, _, record in rows], ids)
+            counts[table] += len(rows)
+
+        for row in read_rows(filepath, fmt, batch_size):
+            table, _, record = row
+            if (wanted is not None and table not in wanted) or not in_range(record, since, until):
+                continue
+            pending[table].append(row)
+            if len(pending[table]) >= batch_size:
+                write(table)
+        for table in list(pending):
+            write(table)
+        return dict(counts)
+
+    def flush(self) -> None:
+        """Write any queued records now (no-op without write-behind)"""
+        if self.buffer is not None:
+            self.buffer.flush()
+
+    def buffer_stats(self) -> Optional[Dict]:
+        """Queue depth and flush latency metrics (None without write-behind)"""
+        return self.buffer.stats() if self.buffer is not None else None
+
+    def close(self) -> None:
+        """
+        Flush queued writes and close the underlying storage
+        Raises RuntimeError if queued records could not be written.
+        """
+        try:
+            if self.buffer is not None:
+                self.buffer.close()
+        finally:
+            self.storage.close()
 
     # Private helpers
+    def _insert(self, table: str, record: Dict, sync: bool) -> Optional[int]:
+        """Insert now, or queue when write-behind is on and sync isn't requested"""
+        if self.buffer is None:
+            return self._write_many(table, [record])[0]
+        if sync:
+            self.buffer.flush()  # Keep earlier queued records ahead of this one
+            return self._write_many(table, [record])[0]
+        self.buffer.put(table, record)
+        return None
+
+    def _write_many(self, table: str, records: List[Dict], ids: Optional[List[int]] = None) -> List[int]:
+        """Store records and their session rollups in one transaction"""
+        with span("db.write", table=table, records=len(records)):
+            rollups = rollup_deltas(records) if table == 'study_sessions' else None
+            return self.storage.insert_many(table, records, ids, rollups)
+
+    def _iter_rows(
+        self,
+        tables: Optional[Iterable[str]],
+        since: Optional[str],
+        until: Optional[str]
+    ) -> Iterator[Row]:
+        """(table, doc id, record) for export, table by table"""
+        for table in (TABLES if tables is None else tables):
+            for doc_id, record in self.storage.iter_records(table, since, until):
+                yield table, doc_id, record
+
+    def _range_stats(
+        self,
+        since: datetime,
+        until: Optional[datetime] = None
+    ) -> Tuple[Dict[str, int], Set[str]]:
+        """
+        Minutes per topic and active days for sessions in [since, until).
+        Whole days are read from rollups; only the partial first/last
+        day falls back to raw sessions.
+        """
+        self.flush()
+        topic_minutes: Dict[str, int] = defaultdict(int)
+        active_days: Set[str] = set()
+
+        def add_raw(lo: datetime, hi: datetime) -> None:
+            for s in self.storage.search('study_sessions', since=lo.isoformat(), until=hi.isoformat()):
+                topic_minutes[s['topic']] += s['duration_min']
+                active_days.add(s['timestamp'][:10])
+
+        # Partial first day
+        full_start = datetime.combine(since.date(), datetime.min.time())
+        if since > full_start:
+            full_start += timedelta(days=1)
+            add_raw(since, min(full_start, until) if until else full_start)
+
+        # Whole days, then the partial last day
+        full_end = None
+        if until is not None:
+            full_end = datetime.combine(until.date(), datetime.min.time())
+            if until > full_end and full_end >= full_start:
+                add_raw(full_end, until)
+
+        if full_end is None or full_start < full_end:
+            rows = self.storage.rollup_range(
+                full_start.date().isoformat(),
+                full_end.date().isoformat() if full_end else None
+            )
+            for row in rows:
+                topic_minutes[row['topic']] += row['minutes']
+                if row['sessions']:
+                    active_days.add(row['day'])
+
+        return dict(topic_minutes), active_days
+
     def _generate_tags(self, topic: str) -> List[str]:
         """Auto-generate tags from topic"""
         topic = topic.lower()
@@ -98,24 +293,12 @@ class ProgressDB:
         return tags or ['general']
 
     def _analyze_sentiment(self, text: str) -> Optional[str]:
-        """Basic sentiment analysis"""
-        text = text.lower()
-        positive_words = ['great', 'good', 'excellent']
-        negative_words = ['stress', 'anxious', 'hard']
-        
-        if any(word in text for word in positive_words):
-            return 'positive'
-        elif any(word in text for word in negative_words):
-            return 'negative'
-        return None
+        """Sentiment from the wellness keyword scorer (calm -> positive, stressed/anxious -> negative)"""
+        return lexical_sentiment(text)
 
-    def _get_top_topics(self, sessions: List[Document]) -> List[Dict]:
+    def _get_top_topics(self, topic_minutes: Dict[str, int]) -> List[Dict]:
         """Get most studied topics"""
-        from collections import defaultdict
-        topic_counts = defaultdict(int)
-        for s in sessions:
-            topic_counts[s['topic']] += s['duration_min']
-        return sorted(topic_counts.items(), key=lambda x: -x[1])[:3]  # Top 3
+        return sorted(topic_minutes.items(), key=lambda x: (-x[1], x[0]))[:3]  # Top 3
 
 # Test cases
 if __name__ == "__main__":
@@ -0,0 +1,439 @@
+# ai/database/storage.py
+import json
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List, Optional, Literal, Iterable, Iterator, Tuple
+
+# Tables every ProgressDB uses
+TABLES = ("study_sessions", "interactions", "goals")
+
+# Per-day, per-topic aggregates of study_sessions
+ROLLUP_TABLE = "session_rollups"
+
+# Record fields promoted to indexed columns in SQLite
+INDEXED_FIELDS = ("timestamp", "topic", "type")
+
+# Fields ProgressDB writes per table, with their types (typed archive columns)
+RECORD_FIELDS = {
+    "study_sessions": {
+        "timestamp": "string", "topic": "string", "duration_min": "int64",
+        "resources": "list<string>", "effectiveness": "int64", "tags": "list<string>"
+    },
+    "interactions": {
+        "timestamp": "string", "query": "string", "response": "string",
+        "type": "string", "sentiment": "string"
+    },
+}
+
+class StorageBackend:
+    """
+    Storage interface used by ProgressDB.
+    Records are plain dicts; every table is keyed by an integer doc id.
+    """
+
+    def insert(self, table: str, record: Dict) -> int:
+        """Store one record, return its doc id"""
+        return self.insert_many(table, [record])[0]
+
+    def insert_many(
+        self,
+        table: str,
+        records: List[Dict],
+        ids: Optional[List[int]] = None,
+        rollups: Optional[Dict[Tuple[str, str], List[int]]] = None
+    ) -> List[int]:
+        """
+        Store several records in one write, return their doc ids
+        rollups (see add_rollups) are applied in the same transaction, so
+        the records and their aggregates are written together or not at all.
+        """
+        raise NotImplementedError
+
+    def search(self, table: str, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        """Records with since <= timestamp < until (ISO strings, either bound optional)"""
+        raise NotImplementedError
+
+    def all(self, table: str) -> List[Dict]:
+        """Every record in a table"""
+        return self.search(table)
+
+    def iter_records(
+        self,
+        table: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        page_size: int = 1000
+    ) -> Iterator[Tuple[int, Dict]]:
+        """(doc id, record) in id order, read page by page (same bounds as search)"""
+        raise NotImplementedError
+
+    def count(self, table: str) -> int:
+        """Number of records in a table"""
+        raise NotImplementedError
+
+    def add_rollups(self, deltas: Dict[Tuple[str, str], List[int]]) -> None:
+        """Add {(day, topic): [minutes, sessions]} onto the rollup table"""
+        raise NotImplementedError
+
+    def rollup_range(self, start_day: Optional[str] = None, end_day: Optional[str] = None) -> List[Dict]:
+        """Rollup rows (day, topic, minutes, sessions) with start_day <= day < end_day"""
+        raise NotImplementedError
+
+    def clear_rollups(self) -> None:
+        """Delete every rollup row"""
+        raise NotImplementedError
+
+    def count_rollups(self) -> int:
+        """Number of rollup rows"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release files/connections"""
+
+class TinyDBBackend(StorageBackend):
+    """Original single JSON file storage (rewrites the file on every insert)"""
+
+    def __init__(self, db_path: str):
+        from tinydb import TinyDB
+        self.db = TinyDB(db_path, indent=4)
+
+    def insert_many(
+        self,
+        table: str,
+        records: List[Dict],
+        ids: Optional[List[int]] = None,
+        rollups: Optional[Dict[Tuple[str, str], List[int]]] = None
+    ) -> List[int]:
+        # TinyDB has no transactions: the records and rollups are two file
+        # writes, so a crash in between can leave the rollups behind
+        if ids is not None:
+            from tinydb.table import Document
+            records = [Document(r, doc_id=i) for r, i in zip(records, ids)]
+        doc_ids = self.db.table(table).insert_multiple(records)
+        if rollups:
+            self.add_rollups(rollups)
+        return doc_ids
+
+    def search(self, table: str, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        from tinydb import where
+        tbl = self.db.table(table)
+        if since is None and until is None:
+            return tbl.all()
+        cond = None
+        if since is not None:
+            cond = where('timestamp') >= since
+        if until is not None:
+            upper = where('timestamp') < until
+            cond = upper if cond is None else cond & upper
+        return tbl.search(cond)
+
+    def iter_records(
+        self,
+        table: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        page_size: int = 1000
+    ) -> Iterator[Tuple[int, Dict]]:
+        # The JSON file is in memory already; paging would not save anything
+        for doc in sorted(self.search(table, since, until), key=lambda d: d.doc_id):
+            yield doc.doc_id, dict(doc)
+
+    def count(self, table: str) -> int:
+        return len(self.db.table(table))
+
+    def add_rollups(self, deltas: Dict[Tuple[str, str], List[int]]) -> None:
+        if not deltas:
+            return
+        tbl = self.db.table(ROLLUP_TABLE)
+
+        def apply(rows: Dict[int, Dict]) -> None:
+            # Every update and insert in one read-modify-write of the file
+            existing = {(row['day'], row['topic']): row for row in rows.values()}
+            for (day, topic), (minutes, sessions) in deltas.items():
+                row = existing.get((day, topic))
+                if row is None:
+                    rows[tbl._get_next_id()] = {'day': day, 'topic': topic, 'minutes': minutes, 'sessions': sessions}
+                else:
+                    row['minutes'] += minutes
+                    row['sessions'] += sessions
+
+        tbl._update_table(apply)
+
+    def rollup_range(self, start_day: Optional[str] = None, end_day: Optional[str] = None) -> List[Dict]:
+        from tinydb import where
+        tbl = self.db.table(ROLLUP_TABLE)
+        cond = None
+        if start_day is not None:
+            cond = where('day') >= start_day
+        if end_day is not None:
+            upper = where('day') < end_day
+            cond = upper if cond is None else cond & upper
+        return tbl.all() if cond is None else tbl.search(cond)
+
+    def clear_rollups(self) -> None:
+        self.db.drop_table(ROLLUP_TABLE)
+
+    def count_rollups(self) -> int:
+        return len(self.db.table(ROLLUP_TABLE))
+
+    def close(self) -> None:
+        self.db.close()
+
+class SQLiteBackend(StorageBackend):
+    """
+    SQLite storage in WAL mode:
+    - Appends are O(1) instead of rewriting the whole history
+    - timestamp/topic/type are indexed columns, the full record is JSON
+    - Safe to share across threads (single connection behind a lock)
+    """
+
+    def __init__(self, db_path: str):
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self.lock = threading.RLock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            # The whole schema in one transaction: one commit (and fsync)
+            # per new database instead of one per statement
+            self.conn.executescript("BEGIN;\n" + "".join(self._table_ddl(t) for t in TABLES) + f"""
+                CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+                    day TEXT NOT NULL,
+                    topic TEXT NOT NULL,
+                    minutes INTEGER NOT NULL DEFAULT 0,
+                    sessions INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, topic)
+                ) WITHOUT ROWID;
+                COMMIT;""")
+            self._tables = set(TABLES)
+
+    @staticmethod
+    def _table_ddl(table: str) -> str:
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", table):
+            raise ValueError(f"Invalid table name: {table!r}")
+        return f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT,
+                topic TEXT,
+                type TEXT,
+                data TEXT NOT NULL
+            );""" + "".join(
+            f"\nCREATE INDEX IF NOT EXISTS idx_{table}_{field} ON {table}({field});"
+            for field in INDEXED_FIELDS
+        )
+
+    def _ensure_table(self, table: str) -> None:
+        if table in self._tables:
+            return
+        ddl = self._table_ddl(table)
+        with self.lock:
+            self.conn.executescript(f"BEGIN;{ddl}\nCOMMIT;")
+        self._tables.add(table)
+
+    @staticmethod
+    def _row(record: Dict) -> tuple:
+        return tuple(record.get(f) for f in INDEXED_FIELDS) + (json.dumps(record),)
+
+    def insert_many(
+        self,
+        table: str,
+        records: List[Dict],
+        ids: Optional[List[int]] = None,
+        rollups: Optional[Dict[Tuple[str, str], List[int]]] = None
+    ) -> List[int]:
+        self._ensure_table(table)
+        with self.lock, self.conn:
+            if ids is not None:
+                self.conn.executemany(
+                    f"INSERT INTO {table} (id, timestamp, topic, type, data) VALUES (?, ?, ?, ?, ?)",
+                    [(i,) + self._row(r) for r, i in zip(records, ids)]
+                )
+                doc_ids = list(ids)
+            else:
+                doc_ids = []
+                for record in records:
+                    cur = self.conn.execute(
+                        f"INSERT INTO {table} (timestamp, topic, type, data) VALUES (?, ?, ?, ?)",
+                        self._row(record)
+                    )
+                    doc_ids.append(cur.lastrowid)
+            if rollups:
+                self._upsert_rollups(rollups)
+            return doc_ids
+
+    def search(self, table: str, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        self._ensure_table(table)
+        clauses, params = [], []
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT data FROM {table} {where} ORDER BY id", params
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def iter_records(
+        self,
+        table: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        page_size: int = 1000
+    ) -> Iterator[Tuple[int, Dict]]:
+        # Keyset paging: each page is a short indexed read, writers are not
+        # blocked between pages and memory stays at one page
+        self._ensure_table(table)
+        clauses, params = ["id > ?"], []
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        sql = f"SELECT id, data FROM {table} WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?"
+        last = 0
+        while True:
+            with self.lock:
+                rows = self.conn.execute(sql, [last] + params + [page_size]).fetchall()
+            for doc_id, data in rows:
+                yield doc_id, json.loads(data)
+            if len(rows) < page_size:
+                return
+            last = rows[-1][0]
+
+    def count(self, table: str) -> int:
+        self._ensure_table(table)
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def add_rollups(self, deltas: Dict[Tuple[str, str], List[int]]) -> None:
+        with self.lock, self.conn:
+            self._upsert_rollups(deltas)
+
+    def _upsert_rollups(self, deltas: Dict[Tuple[str, str], List[int]]) -> None:
+        """Rollup upsert inside the caller's transaction (caller holds the lock)"""
+        self.conn.executemany(
+            f"""INSERT INTO {ROLLUP_TABLE} (day, topic, minutes, sessions) VALUES (?, ?, ?, ?)
+                ON CONFLICT(day, topic) DO UPDATE SET
+                    minutes = minutes + excluded.minutes,
+                    sessions = sessions + excluded.sessions""",
+            [(day, topic, minutes, sessions) for (day, topic), (minutes, sessions) in deltas.items()]
+        )
+
+    def rollup_range(self, start_day: Optional[str] = None, end_day: Optional[str] = None) -> List[Dict]:
+        clauses, params = [], []
+        if start_day is not None:
+            clauses.append("day >= ?")
+            params.append(start_day)
+        if end_day is not None:
+            clauses.append("day < ?")
+            params.append(end_day)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT day, topic, minutes, sessions FROM {ROLLUP_TABLE} {where}", params
+            ).fetchall()
+        return [{'day': d, 'topic': t, 'minutes': m, 'sessions': n} for d, t, m, n in rows]
+
+    def clear_rollups(self) -> None:
+        with self.lock, self.conn:
+            self.conn.execute(f"DELETE FROM {ROLLUP_TABLE}")
+
+    def count_rollups(self) -> int:
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {ROLLUP_TABLE}").fetchone()[0]
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+def rollup_deltas(sessions: Iterable[Dict]) -> Dict[Tuple[str, str], List[int]]:
+    """Aggregate sessions into {(day, topic): [minutes, sessions]}"""
+    deltas: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0, 0])
+    for s in sessions:
+        delta = deltas[(s['timestamp'][:10], s['topic'])]
+        delta[0] += s['duration_min']
+        delta[1] += 1
+    return dict(deltas)
+
+def rebuild_rollups(storage: StorageBackend, batch_size: int = 50_000) -> int:
+    """
+    Recompute the rollup table from raw sessions, return sessions scanned.
+    Sessions are streamed a page at a time and each page's deltas are
+    written before the next is read, so memory stays at one batch.
+    """
+    storage.clear_rollups()
+    records = (record for _, record in storage.iter_records('study_sessions', page_size=batch_size))
+    scanned = 0
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return scanned
+        storage.add_rollups(rollup_deltas(batch))
+        scanned += len(batch)
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+def open_backend(db_path: str, backend: Literal["auto", "tinydb", "sqlite"] = "auto") -> StorageBackend:
+    """Pick a backend explicitly or from the file name (.json -> TinyDB)"""
+    if backend == "auto":
+        is_sqlite = db_path == ":memory:" or Path(db_path).suffix in SQLITE_SUFFIXES
+        backend = "sqlite" if is_sqlite else "tinydb"
+    if backend == "sqlite":
+        return SQLiteBackend(db_path)
+    if backend == "tinydb":
+        return TinyDBBackend(db_path)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+def migrate_json_to_sqlite(json_path: str, sqlite_path: str, batch_size: int = 5000) -> Dict[str, int]:
+    """
+    One-shot copy of a TinyDB progress.json into a SQLite database.
+    Doc ids are preserved and rollups are rebuilt. Returns {table: records migrated}.
+    """
+    with open(json_path) as f:
+        data = json.load(f)
+
+    target = SQLiteBackend(sqlite_path)
+    counts = {}
+    try:
+        for table, docs in data.items():
+            if table == ROLLUP_TABLE:
+                continue  # Derived data, rebuilt below
+            items = sorted(docs.items(), key=lambda kv: int(kv[0]))
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                target.insert_many(table, [doc for _, doc in batch], ids=[int(i) for i, _ in batch])
+            counts[table] = len(items)
+        rebuild_rollups(target)
+    finally:
+        target.close()
+    return counts
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="ProgressDB storage maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="Copy progress.json into SQLite")
+    migrate.add_argument("json_path")
+    migrate.add_argument("sqlite_path")
+    rebuild = commands.add_parser("rebuild-rollups", help="Recompute daily rollups")
+    rebuild.add_argument("db_path")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        for table, n in migrate_json_to_sqlite(args.json_path, args.sqlite_path).items():
+            print(f"✅ {table}: {n} records")
+    else:
+        storage = open_backend(args.db_path)
+        print(f"✅ Rebuilt rollups from {rebuild_rollups(storage)} sessions")
+        storage.close()
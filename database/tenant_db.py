@@ -0,0 +1,266 @@
+# ai/database/tenant_db.py
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import quote, unquote
+from ai.database.progress_db import ProgressDB
+
+logger = logging.getLogger(__name__)
+
+class _Handle:
+    """One open tenant database plus its pool bookkeeping"""
+    __slots__ = ("db", "users", "last_used", "ready", "error")
+
+    def __init__(self):
+        self.db: Optional[ProgressDB] = None
+        self.users = 0
+        self.last_used = time.monotonic()
+        self.ready = threading.Event()
+        self.error: Optional[BaseException] = None
+
+class TenantProgressDB:
+    """
+    ProgressDB partitioned by student:
+    - One SQLite (WAL) file per student, spread over 256 hashed shard
+      directories so no directory grows past a few thousand files
+    - An LRU pool keeps at most max_open databases open; handles idle
+      for idle_timeout seconds are closed on the next pool access
+      (or evict_idle()). Handles in use are never closed, so the pool
+      can briefly exceed max_open under heavy concurrency.
+    - Writes to one student are serialized by the backend's lock across
+      threads and by SQLite file locking across processes (busy timeout
+      30s), so several workers may serve the same root
+    - Cross-tenant aggregates fan out over a thread pool
+    """
+
+    def __init__(
+        self,
+        root: str = "ai/database/tenants",
+        max_open: int = 128,
+        idle_timeout: float = 300.0,
+        **db_kwargs
+    ):
+        """
+        Args:
+            root: Directory holding the shard directories
+            max_open: Open tenant databases kept in the LRU pool
+            idle_timeout: Seconds after which an unused handle is closed
+            db_kwargs: Passed to every ProgressDB (e.g. write_behind=True)
+        """
+        if max_open < 1:
+            raise ValueError("max_open must be at least 1")
+        self.root = Path(root)
+        self.max_open = max_open
+        self.idle_timeout = idle_timeout
+        self.db_kwargs = {**db_kwargs, "backend": "sqlite"}
+
+        self._handles: "OrderedDict[str, _Handle]" = OrderedDict()  # LRU order
+        self._lock = threading.Lock()
+        self._closed = False
+        self._hits = 0
+        self._opens = 0
+        self._evicted = 0
+        self._expired = 0
+        self._next_sweep = 0.0
+        atexit.register(self.close)
+
+    def path_for(self, student_id: str) -> Path:
+        """Database file of a student: <root>/<2 hex chars>/<quoted id>.db"""
+        if not student_id:
+            raise ValueError("student_id must be a non-empty string")
+        shard = hashlib.sha256(student_id.encode("utf-8")).hexdigest()[:2]
+        return self.root / shard / f"{quote(student_id, safe='')}.db"
+
+    @contextmanager
+    def tenant(self, student_id: str) -> Iterator[ProgressDB]:
+        """Borrow a student's ProgressDB from the pool (opened on demand)"""
+        handle = self._acquire(student_id)
+        try:
+            yield handle.db
+        finally:
+            with self._lock:
+                handle.users -= 1
+                handle.last_used = time.monotonic()
+
+    def log_study_session(self, student_id: str, *args, **kwargs) -> Optional[int]:
+        """ProgressDB.log_study_session for one student"""
+        with self.tenant(student_id) as db:
+            return db.log_study_session(*args, **kwargs)
+
+    def log_interaction(self, student_id: str, *args, **kwargs) -> Optional[int]:
+        """ProgressDB.log_interaction for one student"""
+        with self.tenant(student_id) as db:
+            return db.log_interaction(*args, **kwargs)
+
+    def get_study_summary(self, student_id: str, *args, **kwargs) -> Dict:
+        """ProgressDB.get_study_summary for one student"""
+        with self.tenant(student_id) as db:
+            return db.get_study_summary(*args, **kwargs)
+
+    def get_streak(self, student_id: str, days: int = 7) -> int:
+        """ProgressDB.get_streak for one student"""
+        with self.tenant(student_id) as db:
+            return db.get_streak(days)
+
+    def students(self) -> List[str]:
+        """Every student with a database under root"""
+        return sorted(unquote(path.stem) for path in self.root.glob("??/*.db"))
+
+    def fan_out(
+        self,
+        fn: Callable[[ProgressDB], Any],
+        students: Optional[Iterable[str]] = None,
+        max_workers: int = 8
+    ) -> Dict[str, Any]:
+        """
+        Run fn on each student's ProgressDB in parallel
+        Returns {student: result}. Workers borrow handles from the pool,
+        so keep max_workers below max_open.
+        """
+        students = self.students() if students is None else list(students)
+
+        def run(student_id: str) -> Any:
+            with self.tenant(student_id) as db:
+                return fn(db)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(students) or 1))) as pool:
+            return dict(zip(students, pool.map(run, students)))
+
+    def aggregate_summary(
+        self,
+        period: str = "week",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        students: Optional[Iterable[str]] = None,
+        max_workers: int = 8
+    ) -> Dict:
+        """Study totals across students (same periods as ProgressDB.get_study_summary)"""
+        if start is None and period != "custom":
+            # One cutoff for every tenant, not one per worker
+            start = datetime.now() - ProgressDB.PERIODS.get(period, ProgressDB.PERIODS["month"])
+        per_student = self.fan_out(
+            lambda db: db.get_topic_minutes("custom", start, end), students, max_workers
+        )
+        topic_minutes: Dict[str, int] = defaultdict(int)
+        for minutes in per_student.values():
+            for topic, value in minutes.items():
+                topic_minutes[topic] += value
+        return {
+            'students': len(per_student),
+            'active_students': sum(1 for minutes in per_student.values() if minutes),
+            'total_hours': sum(topic_minutes.values()) / 60,
+            'top_topics': sorted(topic_minutes.items(), key=lambda x: (-x[1], x[0]))[:3]
+        }
+
+    def evict_idle(self) -> int:
+        """Close handles unused for idle_timeout seconds, return how many"""
+        with self._lock:
+            self._next_sweep = 0.0
+            victims = self._collect(time.monotonic())
+        self._close_all(victims)
+        return len(victims)
+
+    def pool_stats(self) -> Dict:
+        """Open handles and hit/open/eviction counters"""
+        with self._lock:
+            requests = self._hits + self._opens
+            return {
+                "open": len(self._handles),
+                "in_use": sum(1 for h in self._handles.values() if h.users),
+                "max_open": self.max_open,
+                "hits": self._hits,
+                "opens": self._opens,
+                "hit_rate": self._hits / requests if requests else 0.0,
+                "evicted": self._evicted,
+                "expired": self._expired
+            }
+
+    def close(self) -> None:
+        """Flush and close every open tenant database"""
+        with self._lock:
+            self._closed = True
+            victims = [h for h in self._handles.values() if h.db is not None]
+            self._handles.clear()
+        self._close_all(victims)
+
+    # Private helpers
+    def _acquire(self, student_id: str) -> _Handle:
+        path = self.path_for(student_id)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("TenantProgressDB is closed")
+            handle = self._handles.get(student_id)
+            opener = handle is None
+            if opener:
+                handle = self._handles[student_id] = _Handle()
+                self._opens += 1
+            else:
+                self._handles.move_to_end(student_id)
+                self._hits += 1
+            handle.users += 1
+            victims = self._collect(time.monotonic())
+        self._close_all(victims)
+
+        if opener:
+            # Opened outside the pool lock so other tenants are not held up;
+            # concurrent callers for the same student wait on `ready`
+            try:
+                handle.db = ProgressDB(str(path), **self.db_kwargs)
+            except BaseException as e:
+                handle.error = e
+                with self._lock:
+                    if self._handles.get(student_id) is handle:
+                        del self._handles[student_id]
+                raise
+            finally:
+                handle.ready.set()
+        else:
+            handle.ready.wait()
+            if handle.error is not None:
+                with self._lock:
+                    handle.users -= 1
+                raise handle.error
+        return handle
+
+    def _collect(self, now: float) -> List[_Handle]:
+        """Unlink expired and over-capacity idle handles (caller holds the lock)"""
+        excess = len(self._handles) - self.max_open
+        sweep = now >= self._next_sweep  # Idle expiry is checked at most once a second
+        if excess <= 0 and not sweep:
+            return []
+        if sweep:
+            self._next_sweep = now + 1.0
+
+        unlinked = []
+        for student_id, handle in self._handles.items():  # Least recently used first
+            if excess <= 0 and not sweep:
+                break
+            if handle.users or not handle.ready.is_set():
+                continue
+            if now - handle.last_used > self.idle_timeout:
+                self._expired += 1
+            elif excess > 0:
+                self._evicted += 1
+            else:
+                continue
+            unlinked.append(student_id)
+            excess -= 1
+        return [self._handles.pop(student_id) for student_id in unlinked]
+
+    @staticmethod
+    def _close_all(handles: List[_Handle]) -> None:
+        for handle in handles:
+            if handle.db is None:
+                continue
+            try:
+                handle.db.close()
+            except Exception:
+                logger.exception("Closing tenant database failed")
@@ -0,0 +1,155 @@
+# ai/database/write_buffer.py
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindBuffer:
+    """
+    In-memory write queue flushed in batches by a background thread.
+    A flush happens when flush_size records are queued or flush_interval
+    seconds have passed, and always on flush()/close()/interpreter exit.
+    write_many must be all-or-nothing per call: when a table's batch
+    fails, only that table's records (and any tables not reached yet)
+    are re-queued, so nothing is written twice.
+    """
+
+    def __init__(
+        self,
+        write_many: Callable[[str, List[Dict]], List[int]],
+        flush_size: int = 100,
+        flush_interval: float = 1.0,
+        close_retries: int = 3
+    ):
+        self._write_many = write_many
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.close_retries = close_retries
+
+        self._queue: List[Tuple[str, Dict]] = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # Keeps batches in order
+        self._closed = False
+
+        # Metrics
+        self._enqueued = 0
+        self._flushed = 0
+        self._flushes = 0
+        self._failures = 0
+        self._flush_total = 0.0
+        self._flush_last = 0.0
+        self._flush_max = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="progress-db-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, table: str, record: Dict) -> None:
+        """Queue a record for the next batch"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write buffer is closed")
+            self._queue.append((table, record))
+            self._enqueued += 1
+            if len(self._queue) >= self.flush_size:
+                self._cond.notify()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._closed and len(self._queue) < self.flush_size:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self) -> int:
+        """Write everything queued so far, return the number of records written"""
+        try:
+            return self._flush()
+        except Exception:
+            logger.exception("Batched write failed; unwritten records re-queued")
+            return 0
+
+    def close(self) -> None:
+        """
+        Flush remaining records and stop the writer thread
+        A failed final flush is retried close_retries times; if records
+        are still unwritten after that, RuntimeError is raised with the
+        count (they stay in the queue but are never written).
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()  # The thread's last flush logs its own failure
+        atexit.unregister(self.close)
+
+        error = None
+        for attempt in range(self.close_retries):
+            if not self._queue:
+                return
+            time.sleep(0.1 * 2 ** attempt)
+            try:
+                self._flush()
+            except Exception as e:
+                error = e
+        if self._queue:
+            logger.error("Write buffer closed with %d records unwritten", len(self._queue))
+            raise RuntimeError(f"{len(self._queue)} queued records could not be written") from error
+
+    def _flush(self) -> int:
+        """flush() that raises; records of tables that failed go back on the queue"""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._queue = self._queue, []
+            if not batch:
+                return 0
+
+            by_table: Dict[str, List[Dict]] = defaultdict(list)
+            for table, record in batch:
+                by_table[table].append(record)
+
+            start = time.perf_counter()
+            written = set()
+            try:
+                for table, records in by_table.items():
+                    self._write_many(table, records)
+                    written.add(table)
+            except Exception:
+                self._failures += 1
+                with self._cond:
+                    # Keep the original order ahead of anything queued meanwhile
+                    self._queue[:0] = [(table, record) for table, record in batch if table not in written]
+                    self._flushed += sum(len(by_table[table]) for table in written)
+                raise
+            elapsed = time.perf_counter() - start
+
+            self._flushed += len(batch)
+            self._flushes += 1
+            self._flush_total += elapsed
+            self._flush_last = elapsed
+            self._flush_max = max(self._flush_max, elapsed)
+            return len(batch)
+
+    def stats(self) -> Dict:
+        """Queue depth and flush latency metrics"""
+        return {
+            'queue_depth': len(self._queue),
+            'enqueued': self._enqueued,
+            'flushed': self._flushed,
+            'flushes': self._flushes,
+            'failed_flushes': self._failures,
+            'last_flush_ms': self._flush_last * 1000,
+            'avg_flush_ms': (self._flush_total / self._flushes * 1000) if self._flushes else 0.0,
+            'max_flush_ms': self._flush_max * 1000
+        }
@@ -0,0 +1,37 @@
+# ai/tests/conftest.py
+"""
+Shared fixtures. The repository is the `ai` package; when it is checked
+out under another directory name, it is registered as `ai` here so the
+tests import it the same way the app does.
+"""
+import importlib.util
+import sys
+import types
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+if importlib.util.find_spec("ai") is None:
+    package = types.ModuleType("ai")
+    package.__path__ = [str(ROOT)]
+    sys.modules["ai"] = package
+
+from ai.benchmarks.fake_ollama import FakeOllama, agent_responder  # noqa: E402
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    """
+    FakeOllama serving the agent-shaped replies, with OLLAMA_HOST pointed
+    at it, on-disk caches off, and the process-wide clients reset
+    """
+    from ai.chains.base_chain import ClientPool, LLMLimiter
+    from ai.tools.ollama_manager import ModelRegistry
+
+    with FakeOllama(responder=agent_responder) as fake:
+        monkeypatch.setenv("OLLAMA_HOST", fake.url)
+        monkeypatch.setenv("EMBED_CACHE_PATH", "")
+        monkeypatch.setenv("DECOMPOSITION_CACHE_PATH", "")
+        for cls in (ClientPool, LLMLimiter, ModelRegistry):
+            monkeypatch.setattr(cls, "_default", None)
+        yield fake
@@ -0,0 +1,64 @@
+# ai/tests/test_archive.py
+import pytest
+from ai.database.archive import detect_format, read_rows, write_rows
+from ai.database.progress_db import ProgressDB
+
+ROWS = [
+    ("study_sessions", 1, {
+        "timestamp": "2026-03-02T09:15:00", "topic": "Calculus", "duration_min": 45,
+        "resources": ["ch3.pdf"], "effectiveness": 4, "tags": ["math"]
+    }),
+    ("study_sessions", 2, {
+        "timestamp": "2026-03-02T11:00:00", "topic": None, "duration_min": 20,
+        "resources": [], "effectiveness": None, "tags": []
+    }),
+    ("study_sessions", 3, {  # Values that don't fit their declared types, and an extra key
+        "timestamp": "2026-03-03T08:00:00", "topic": "Physics", "duration_min": 12.5,
+        "resources": [], "effectiveness": "good", "tags": ["science"], "room": {"floor": 2}
+    }),
+    ("interactions", 1, {
+        "timestamp": "2026-03-02T10:00:00", "query": "What is a limit?", "response": "...",
+        "type": None, "sentiment": None
+    }),
+    ("interactions", 2, {"timestamp": "2026-03-02T10:05:00", "query": "Legacy record", "type": "qa"}),
+    ("goals", None, {"title": "Finish problem set", "topic": None, "done": False}),
+]
+
+@pytest.mark.parametrize("name", ["x.ndjson", "x.jsonl.gz", "x.parquet", "x.arrow"])
+def test_round_trip_keeps_types_and_nulls(tmp_path, name):
+    if detect_format(name) in ("parquet", "arrow"):
+        pytest.importorskip("pyarrow")
+    path = tmp_path / name
+    assert write_rows(ROWS, path, batch_size=2) == {"study_sessions": 3, "interactions": 2, "goals": 1}
+    assert list(read_rows(path, batch_size=2)) == ROWS
+
+def test_legacy_json_layout_round_trip(tmp_path):
+    path = tmp_path / "export.json"
+    write_rows(ROWS, path)
+    assert list(read_rows(path)) == [(table, None, record) for table, _, record in ROWS]
+
+def test_columnar_schema_comes_from_declared_fields(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet
+    path = tmp_path / "x.parquet"
+    write_rows(ROWS[3:], path)  # No study sessions in the first (only) batch
+    schema = pa.parquet.read_schema(str(path))
+    assert schema.field("duration_min").type == pa.int64()
+    assert schema.field("tags").type == pa.list_(pa.string())
+    assert schema.field("effectiveness").nullable
+
+def test_export_import_restores_the_database(tmp_path):
+    db = ProgressDB(str(tmp_path / "a.db"))
+    db.log_study_session("Calculus", 45, ["ch3.pdf"], effectiveness=4)
+    db.log_study_session("Physics", 30)
+    db.log_interaction("What is a limit?", "hmm", "qa")
+    path = str(tmp_path / "export.ndjson")
+    assert db.export_data(path) == {"study_sessions": 2, "interactions": 1}
+
+    copy = ProgressDB(str(tmp_path / "b.db"))
+    copy.import_data(path, keep_ids=True)
+    for table in ("study_sessions", "interactions"):
+        assert copy.storage.all(table) == db.storage.all(table)
+    assert copy.get_study_summary() == db.get_study_summary()
+    db.close()
+    copy.close()
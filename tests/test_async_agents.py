@@ -0,0 +1,101 @@
+# ai/tests/test_async_agents.py
+import asyncio
+import threading
+import warnings
+import pytest
+from ai.chains.base_chain import BaseChain, LLMLimiter, StreamTimer
+
+async def stalled(first: str = "Hello"):
+    yield first
+    await asyncio.sleep(3600)  # The model stops sending tokens
+    yield "never"
+
+def test_stalled_stream_times_out_and_frees_its_slot():
+    limiter = LLMLimiter(limit=1, timeout=0.2)
+
+    async def main():
+        tokens = []
+        with pytest.raises(asyncio.TimeoutError):
+            async for token in limiter.stream(stalled()):
+                tokens.append(token)
+        assert tokens == ["Hello"]
+        # The only slot is free again
+        return await limiter.run(lambda: asyncio.sleep(0, result="next"), timeout=1)
+
+    assert asyncio.run(main()) == "next"
+
+def test_stream_slot_is_released_when_the_consumer_stops_early():
+    limiter = LLMLimiter(limit=1, timeout=5)
+
+    async def main():
+        stream = limiter.stream(stalled())
+        async for _ in stream:
+            break
+        await stream.aclose()
+        return await limiter.run(lambda: asyncio.sleep(0, result="next"), timeout=1)
+
+    assert asyncio.run(main()) == "next"
+
+def test_first_model_check_runs_off_the_event_loop(fake_ollama, monkeypatch):
+    from ai.tools.ollama_manager import ModelRegistry
+    ensure = ModelRegistry.ensure
+    threads = []
+
+    def recording_ensure(self, model_name):
+        threads.append(threading.current_thread())
+        return ensure(self, model_name)
+    monkeypatch.setattr(ModelRegistry, "ensure", recording_ensure)
+
+    chain = BaseChain()
+    timer = StreamTimer()
+
+    async def main():
+        loop_thread = threading.current_thread()
+        text = await chain.agenerate("Explain eigenvalues")
+        streamed = [token async for token in chain.astream_generate("Explain eigenvalues", timer)]
+        return loop_thread, text, streamed
+
+    loop_thread, text, streamed = asyncio.run(main())
+    assert text and "".join(streamed) == text
+    assert threads and loop_thread not in threads
+    assert timer.result()["tokens"] == len(streamed)
+
+def test_answer_cache_embedding_takes_a_limiter_slot(fake_ollama, tmp_path, monkeypatch):
+    from ai.agents.qa_agent import QAAgent
+    from ai.chains.answer_cache import SemanticAnswerCache
+    qa = QAAgent(persist_dir=str(tmp_path / "kb"), answer_cache=SemanticAnswerCache())
+    run = qa.limiter.run
+    in_slot = []
+
+    async def recording_run(call, timeout=None):
+        def recorded():
+            awaitable = call()
+            in_slot.append(getattr(awaitable, "__qualname__", ""))
+            return awaitable
+        return await run(recorded, timeout)
+    monkeypatch.setattr(qa.limiter, "run", recording_run)
+
+    first = asyncio.run(qa.aanswer("Explain spaced repetition"))
+    embedded = fake_ollama.embedded_texts
+    assert asyncio.run(qa.aanswer("Explain spaced repetition")) == first
+    assert fake_ollama.embedded_texts == embedded  # Second question embedded from the cache
+    assert "to_thread" in in_slot  # The cache lookup ran inside a slot
+    assert fake_ollama.generations == 1
+
+def test_call_timing_out_in_the_queue_is_never_created():
+    limiter = LLMLimiter(limit=1, timeout=0.1)
+    created = []
+
+    def call():
+        created.append(1)
+        return asyncio.sleep(0)
+
+    async def main():
+        async with limiter.slot():  # The only slot is taken
+            with pytest.raises(asyncio.TimeoutError):
+                await limiter.run(call)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # "coroutine ... was never awaited" would fail the test
+        asyncio.run(main())
+    assert created == []
@@ -0,0 +1,77 @@
+# ai/tests/test_bm25_index.py
+import threading
+import pytest
+from ai.tools.bm25_index import BM25Index, tokenize
+
+CHUNKS = {
+    "c1": "Eigenvalues are roots of the characteristic polynomial",
+    "c2": "The determinant of a singular matrix is zero",
+    "c3": "Separable differential equations integrate both sides",
+}
+
+@pytest.fixture
+def index(tmp_path):
+    index = BM25Index(tmp_path / "bm25.json")
+    index.add(list(CHUNKS), list(CHUNKS.values()), [{"source": cid} for cid in CHUNKS])
+    return index
+
+def test_tokenize_drops_stopwords_and_single_letters():
+    assert tokenize("What is a Matrix, and x?") == ["matrix"]
+
+def test_upsert_replaces_a_chunk(index):
+    index.add(["c2"], ["Gaussian elimination reduces a matrix to row echelon form"])
+    assert len(index) == 3
+    assert index.search("determinant") == []
+    assert [doc_id for doc_id, _, _ in index.search("echelon")] == ["c2"]
+    assert index.total_length == sum(doc["length"] for doc in index.docs.values())
+
+def test_remove_drops_postings(index):
+    index.remove(["c1", "missing"])
+    assert len(index) == 2
+    assert "eigenvalues" not in index.postings
+    assert index.search("eigenvalues") == []
+
+def test_normalized_scores_agree_with_search(index):
+    hits = index.search("singular matrix determinant")
+    assert hits[0][0] == "c2" and 0 < hits[0][2] <= 1
+    scores = index.normalized_scores("singular matrix determinant", ["c2", "c3", "missing"])
+    assert scores["c2"] == pytest.approx(hits[0][2])
+    assert scores["c3"] == scores["missing"] == 0.0
+
+def test_save_and_load_round_trip(index):
+    index.save()
+    loaded = BM25Index.load(index.path)
+    assert loaded.docs == index.docs
+    assert loaded.postings == index.postings
+    assert loaded.search("differential equations") == index.search("differential equations")
+
+def test_searches_and_saves_during_upserts(index):
+    errors = []
+    done = threading.Event()
+
+    def write():
+        for i in range(300):
+            index.add([f"n{i}"], [f"matrix rank nullity number {i}"])
+            if i % 3 == 0:
+                index.remove([f"n{i - 1}"])
+        done.set()
+
+    def read():
+        try:
+            while not done.is_set():
+                for doc_id, score, norm in index.search("matrix rank", k=5):
+                    assert score > 0 and 0 < norm <= 1
+                index.normalized_scores("matrix rank", ["c2", "n1"])
+                index.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(BM25Index.load(index.path)) <= len(index)
+    index.save()
+    assert BM25Index.load(index.path).postings == index.postings
@@ -0,0 +1,56 @@
+# ai/tests/test_decomposition_cache.py
+import time
+from pathlib import Path
+from ai.chains.decomposition_cache import DecompositionCache
+
+TASKS = [{"topic": "Vectors", "hours": 2.0}, {"topic": "Matrices", "hours": 4.0}]
+
+def test_hit_rescale_and_miss():
+    cache = DecompositionCache()
+    cache.put("Linear  Algebra final", 6, "mistral", TASKS)
+    assert cache.get("linear algebra FINAL", 6, "mistral") == TASKS
+    assert cache.get("Linear algebra final", 12, "mistral") == [
+        {"topic": "Vectors", "hours": 4.0}, {"topic": "Matrices", "hours": 8.0}
+    ]
+    assert cache.get("Linear algebra final", 6, "llama3") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["rescaled"], stats["misses"]) == (1, 1, 1)
+
+def test_lookups_do_not_write():
+    cache = DecompositionCache(touch_batch=1000)
+    cache.put("Physics lab report", 4, "mistral", TASKS)
+    changes = cache.conn.total_changes
+    for _ in range(50):
+        assert cache.get("Physics lab report", 4, "mistral") is not None
+    assert cache.conn.total_changes == changes
+    assert not cache.conn.in_transaction
+
+def test_expired_entries_are_skipped_then_deleted_on_put():
+    cache = DecompositionCache(ttl=0.05)
+    cache.put("History essay", 3, "mistral", TASKS)
+    time.sleep(0.1)
+    assert cache.get("History essay", 3, "mistral") is None
+    cache.put("Statistics set", 2, "mistral", TASKS)
+    assert cache.stats()["expired"] == 1
+    assert cache.stats()["entries"] == 1
+
+def test_lru_eviction_uses_batched_last_used(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = DecompositionCache(path, max_entries=2)
+    cache.put("goal a", 1, "mistral", TASKS)
+    cache.put("goal b", 1, "mistral", TASKS)
+    time.sleep(0.01)
+    cache.get("goal a", 1, "mistral")  # Touch held in memory until the next put
+    cache.put("goal c", 1, "mistral", TASKS)
+    assert cache.get("goal a", 1, "mistral") is not None
+    assert cache.get("goal b", 1, "mistral") is None
+    cache.close()
+    assert DecompositionCache(path).stats()["entries"] == 2
+
+def test_scheduler_opens_the_cache_lazily(monkeypatch):
+    from ai.agents.scheduler_agent import DECOMPOSITION_CACHE_PATH, SchedulerAgent
+    monkeypatch.setenv("DECOMPOSITION_CACHE_PATH", "")
+    agent = SchedulerAgent()
+    assert agent._decomposition_cache is None
+    assert isinstance(agent.decomposition_cache, DecompositionCache)
+    assert Path(DECOMPOSITION_CACHE_PATH).parts[-2:] == ("database", "decomposition_cache.db")
@@ -0,0 +1,95 @@
+# ai/tests/test_mood_classifier.py
+import asyncio
+import pytest
+from langchain_ollama import OllamaEmbeddings
+from ai.tools.mood_classifier import MoodClassifier, lexical_mood, lexical_sentiment
+
+EXAMPLES = {
+    "stressed": ["lab report due tonight not started", "three deadlines this week pile up"],
+    "anxious": ["heart racing thinking about tomorrow", "what happens if results come back bad"],
+    "calm": ["nice walk in the park this afternoon", "cup of tea and some reading"],
+}
+
+@pytest.fixture
+def classifier(fake_ollama):
+    embedder = OllamaEmbeddings(model="nomic-embed-text", base_url=fake_ollama.url)
+    return MoodClassifier(embedder, examples=EXAMPLES)
+
+def test_lexical_stage_answers_clear_cues():
+    assert lexical_mood("I'm so overwhelmed with finals").label == "stressed"
+    assert lexical_mood("What if I fail this exam?").label == "anxious"
+    assert lexical_mood("I feel prepared for my presentation").label == "calm"
+    assert lexical_mood("Not sure how the week went, honestly") is None
+
+def test_sentiment_comes_from_the_same_engine():
+    from ai.database.progress_db import ProgressDB
+    db = ProgressDB(":memory:")
+    db.log_interaction("finals", "I'm so overwhelmed with finals", "wellness")
+    db.log_interaction("prep", "I feel prepared for my presentation", "wellness")
+    assert [r["sentiment"] for r in db.storage.all("interactions")] == ["negative", "positive"]
+    assert lexical_sentiment("hmm") is None
+    db.close()
+
+def test_tiers(classifier, fake_ollama):
+    texts = [
+        "I'm so overwhelmed with finals",  # Keyword stage
+        "my lab report is due tonight",    # Nearest centroid
+        "nice walk this afternoon",        # Nearest centroid
+        "hmm",                             # Neither: escalate
+    ]
+    results = classifier.classify_local_many(texts)
+    assert [(r.label, r.stage) if r else None for r in results] == [
+        ("stressed", "lexical"), ("stressed", "embedding"), ("calm", "embedding"), None
+    ]
+    stats = classifier.stats()
+    assert (stats["lexical"], stats["embedding"], stats["escalated"]) == (1, 2, 1)
+
+def test_lexical_hits_never_call_the_server(classifier, fake_ollama):
+    classifier.classify_local_many(["I'm so overwhelmed with finals", "What if I fail this exam?"])
+    assert fake_ollama.embedded_texts == 0
+    assert fake_ollama.generations == 0
+
+def test_agent_escalates_only_ambiguous_messages(fake_ollama):
+    from ai.agents.wellness_agent import WellnessAgent, WellnessState
+    agent = WellnessAgent()
+    assert agent.analyze_mood("I'm so overwhelmed with finals") == WellnessState.STRESSED
+    assert fake_ollama.generations == 0
+    assert agent.analyze_mood("hmm") in (WellnessState.STRESSED, WellnessState.ANXIOUS, WellnessState.CALM)
+    assert fake_ollama.generations == 1
+
+def test_async_embedding_stage_takes_a_limiter_slot(fake_ollama, monkeypatch):
+    from ai.agents.wellness_agent import WellnessAgent
+    agent = WellnessAgent()
+    run = agent.limiter.run
+    slots = []
+
+    async def counting_run(call, timeout=None):
+        slots.append(call)
+        return await run(call, timeout)
+    monkeypatch.setattr(agent.limiter, "run", counting_run)
+
+    asyncio.run(agent.aanalyze_mood("I'm so overwhelmed with finals"))
+    assert not slots  # Settled by keywords, no model server involved
+    asyncio.run(agent.aanalyze_mood("Not sure how the week went, honestly"))
+    assert slots  # Embedding stage (and possibly the LLM) went through the limiter
+
+class DownEmbedder:
+    def embed_documents(self, texts):
+        raise ConnectionError("model server unreachable")
+
+def test_embedding_failure_escalates_only_the_undecided():
+    classifier = MoodClassifier(DownEmbedder(), examples=EXAMPLES)
+    results = classifier.classify_local_many(["I'm so overwhelmed with finals", "my lab report is due tonight"])
+    assert results[0].label == "stressed" and results[1] is None
+    assert classifier.stats()["escalated"] == 1
+
+def test_agent_sends_messages_to_the_llm_when_embedding_fails(fake_ollama, monkeypatch):
+    from ai.agents.wellness_agent import WellnessAgent, WellnessState
+    agent = WellnessAgent()
+    monkeypatch.setattr(agent.mood_classifier, "embedder", DownEmbedder())
+    texts = ["I'm so overwhelmed with finals", "my lab report is due tonight", "nice walk this afternoon"]
+    moods = agent.analyze_moods(texts)
+    assert moods[0] == WellnessState.STRESSED
+    assert all(isinstance(mood, WellnessState) for mood in moods)
+    assert fake_ollama.generations >= 1
+    assert asyncio.run(agent.aanalyze_moods(texts))[0] == WellnessState.STRESSED
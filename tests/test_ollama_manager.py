@@ -0,0 +1,107 @@
+# ai/tests/test_ollama_manager.py
+import socket
+import time
+import pytest
+from ai.tools.ollama_manager import HTTPStatusError, OllamaManager, PullError, PullInterrupted
+
+MODEL = "course-notes:latest"
+SIZE = 8 << 20
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("ai.tools.ollama_manager.time.sleep", sleeps.append)
+    return sleeps
+
+def closed_port() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+def test_inventory_over_http(fake_ollama):
+    manager = OllamaManager(host=fake_ollama.url, backend="http")
+    assert manager.list_models() == {"mistral:latest", "nomic-embed-text:latest"}
+    assert manager.model_exists("mistral")
+    assert not manager.model_exists("mistral:7b")
+    manager.list_models()
+    assert fake_ollama.calls["/api/tags"] == 1  # Cached within inventory_ttl
+
+def test_inventory_falls_back_to_cli(monkeypatch):
+    manager = OllamaManager(host=closed_port(), backend="auto")
+    monkeypatch.setattr(manager, "_locate_ollama", lambda path: "ollama")
+    monkeypatch.setattr(manager, "_run_command", lambda cmd: (
+        "NAME                      ID              SIZE      MODIFIED\n"
+        "mistral:latest            f974a74358d6    4.1 GB    2 days ago\n"
+        "nomic-embed-text          0a109f422b47    274 MB    2 days ago\n"
+    ))
+    assert manager.list_models() == {"mistral:latest", "nomic-embed-text:latest"}
+
+def test_invalidate_forces_a_refresh(fake_ollama):
+    manager = OllamaManager(host=fake_ollama.url, backend="http")
+    manager.list_models()
+    fake_ollama.models.append("llama3:8b")
+    assert not manager.model_exists("llama3:8b")
+    manager.invalidate_inventory()
+    assert manager.model_exists("llama3:8b")
+
+def test_interrupted_pull_resumes(fake_ollama, no_backoff):
+    fake_ollama.registry[MODEL] = SIZE
+    fake_ollama.fail_once_at[MODEL] = SIZE // 2
+    progress = []
+    manager = OllamaManager(host=fake_ollama.url, backend="http")
+    manager.pull_model(MODEL, quiet=True, progress=lambda name, done, total: progress.append(done))
+
+    assert manager.model_exists(MODEL)
+    assert fake_ollama.bytes_served == SIZE  # The retry resumed, nothing downloaded twice
+    assert progress[-1] == SIZE
+    assert no_backoff == [1]
+
+def test_server_errors_are_retried(fake_ollama, no_backoff, caplog):
+    fake_ollama.registry[MODEL] = SIZE
+    fake_ollama.fail_status[MODEL] = 503
+    OllamaManager(host=fake_ollama.url, backend="http").pull_model(MODEL, quiet=True)
+    assert MODEL in fake_ollama.models
+    assert no_backoff == [1]
+    assert "failed: 503" in caplog.text  # Backed off because of the status, not a broken stream
+
+def test_server_errors_surface_with_their_status(fake_ollama, no_backoff):
+    fake_ollama.registry[MODEL] = SIZE
+    fake_ollama.fail_status[MODEL] = 503
+    manager = OllamaManager(host=fake_ollama.url, backend="http")
+    with pytest.raises(HTTPStatusError) as error:
+        manager.pull_model(MODEL, quiet=True, retries=0)
+    assert error.value.status == 503
+
+def test_daemon_error_events_are_not_retried(fake_ollama, no_backoff):
+    fake_ollama.registry[MODEL] = SIZE
+    fake_ollama.error_event[MODEL] = "pull model manifest: 401 unauthorized"
+    manager = OllamaManager(host=fake_ollama.url, backend="auto")
+    with pytest.raises(PullError, match="401 unauthorized") as error:
+        manager.pull_model(MODEL, quiet=True)
+    assert not isinstance(error.value, PullInterrupted)
+    assert no_backoff == []
+    assert fake_ollama.calls["/api/pull"] == 1
+
+def test_client_errors_are_not_retried(fake_ollama, no_backoff):
+    manager = OllamaManager(host=fake_ollama.url, backend="http")
+    with pytest.raises(HTTPStatusError) as error:
+        manager.pull_model("missing:latest", quiet=True)
+    assert error.value.status == 404
+    assert no_backoff == []
+
+def test_unreachable_daemon_falls_back_to_cli_at_once(monkeypatch):
+    pulled = []
+    manager = OllamaManager(host=closed_port(), backend="auto")
+    monkeypatch.setattr(manager, "_cli_inventory", lambda: set())
+    monkeypatch.setattr(manager, "_cli_pull", lambda name, quiet: pulled.append(name))
+    start = time.perf_counter()
+    manager.pull_model("mistral", quiet=True)
+    assert pulled == ["mistral"]
+    assert time.perf_counter() - start < 1.0
+
+def test_pull_models_reports_each_result(fake_ollama, no_backoff):
+    fake_ollama.registry.update({"a:latest": SIZE, "b:latest": SIZE})
+    manager = OllamaManager(host=fake_ollama.url, backend="http")
+    results = manager.pull_models(["a:latest", "b:latest", "missing:latest"], show_progress=False)
+    assert results["a:latest"] is None and results["b:latest"] is None
+    assert isinstance(results["missing:latest"], HTTPStatusError)
@@ -0,0 +1,87 @@
+# ai/tests/test_plan_many.py
+import asyncio
+import json
+import re
+import pytest
+from ai.agents.scheduler_agent import SchedulerAgent
+
+def canned(prompt: str) -> str:
+    """Canned JSON breakdowns; goals mentioning "messy" get prose first, "broken" never parse"""
+    name, hours = re.search(r'Goal: "(.*)" \(Total: (\d+)h\)', prompt).groups()
+    if "broken" in name or ("messy" in name and "rejected" not in prompt):
+        return "Sure! Here is a plan: tasks = [review, practice]"
+    return json.dumps({"tasks": [
+        {"topic": f"{name} part {i + 1}", "hours": round(int(hours) * share, 1)}
+        for i, share in enumerate((0.5, 0.3, 0.2))
+    ]})
+
+@pytest.fixture
+def agent(fake_ollama):
+    fake_ollama.responder = canned
+    return SchedulerAgent()
+
+def planned_topics(schedule):
+    return {entry for entries in schedule.values() for entry in entries}
+
+def test_identical_goals_are_decomposed_once(agent, fake_ollama):
+    goals = {
+        "ana": ("Linear algebra final", 3),
+        "ben": ("linear  ALGEBRA final", 3),  # Same goal once normalized
+        "cy": ("Linear algebra final", 5),    # Different total hours
+        "dee": ("World history essay", 2),
+    }
+    result = agent.plan_many(goals, max_workers=2)
+    stats = result["stats"]
+    assert (stats["students"], stats["unique_goals"], stats["deduplicated"]) == (4, 3, 1)
+    assert stats["llm_calls"] == fake_ollama.generations == 3
+    assert (stats["retries"], stats["fallbacks"], stats["cache_hits"]) == (0, 0, 0)
+    assert set(result["schedules"]) == set(goals)
+    assert result["schedules"]["ana"] == result["schedules"]["ben"]
+    assert any("part 1" in entry for entry in planned_topics(result["schedules"]["dee"]))
+
+def test_malformed_reply_is_retried_once(agent, fake_ollama):
+    stats = agent.plan_many({"ana": ("messy chemistry lab", 2)})["stats"]
+    assert (stats["llm_calls"], stats["retries"], stats["fallbacks"]) == (2, 1, 0)
+
+def test_unparseable_replies_fall_back_to_the_default_task(agent, fake_ollama):
+    result = agent.plan_many({"ana": ("broken physics review", 2)})
+    assert (result["stats"]["llm_calls"], result["stats"]["fallbacks"]) == (2, 1)
+    assert any("broken physics review" in entry for entry in planned_topics(result["schedules"]["ana"]))
+
+def test_second_run_is_served_from_the_cache(agent, fake_ollama):
+    goals = {"ana": ("Data structures project", 4), "ben": ("Microeconomics quiz", 1)}
+    first = agent.plan_many(goals)
+    second = agent.plan_many(goals)
+    assert second["stats"]["cache_hits"] == 2 and second["stats"]["llm_calls"] == 0
+    assert fake_ollama.generations == 2
+    assert second["schedules"] == first["schedules"]
+
+@pytest.mark.parametrize("reply", [
+    "```json\n{\"tasks\": [{\"topic\": \"Vectors\", \"hours\": 2}]}\n```",
+    "Here you go: {\"tasks\": [{\"topic\": \"Vectors\", \"hours\": 2.5}]} Good luck!",
+])
+def test_parser_accepts_wrapped_json(reply):
+    assert SchedulerAgent._parse_breakdown(reply).tasks[0].topic == "Vectors"
+
+@pytest.mark.parametrize("reply", [
+    "{'tasks': [{'topic': 'Vectors', 'hours': 2}]}",  # Python literal, not JSON
+    '{"tasks": []}',
+    '{"tasks": [{"topic": "Vectors", "hours": -1}]}',
+    '{"tasks": [{"topic": "", "hours": 2}]}',
+    "__import__('os').system('true')",
+])
+def test_parser_rejects_anything_else(reply):
+    with pytest.raises(ValueError):
+        SchedulerAgent._parse_breakdown(reply)
+
+@pytest.mark.parametrize("goal, expected", [
+    ("Statistics quiz", {"llm_calls": 1, "cached": False, "fallback": False}),
+    ("messy chemistry lab", {"llm_calls": 2, "cached": False, "fallback": False}),
+    ("broken physics review", {"llm_calls": 2, "cached": False, "fallback": True}),
+])
+def test_async_path_takes_the_same_steps(agent, goal, expected):
+    tasks, outcome = asyncio.run(agent._adecompose(goal, 4))
+    assert outcome == expected
+    sync_tasks, sync_outcome = agent._decompose(goal, 4)
+    assert [t.topic for t in sync_tasks] == [t.topic for t in tasks]
+    assert sync_outcome["cached"] == (not expected["fallback"])  # Valid replies were cached
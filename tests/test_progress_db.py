@@ -0,0 +1,102 @@
+# ai/tests/test_progress_db.py
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+import pytest
+from ai.database.progress_db import ProgressDB
+
+TOPICS = ["Linear Algebra", "Calculus", "Physics", "History"]
+NOW = datetime.now()
+
+def sessions(n: int = 500, days: int = 60, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        {
+            'timestamp': (NOW - timedelta(seconds=rng.randrange(days * 86400))).isoformat(),
+            'topic': rng.choice(TOPICS),
+            'duration_min': rng.randrange(5, 120),
+            'resources': [],
+            'effectiveness': None,
+            'tags': ['general']
+        }
+        for _ in range(n)
+    ]
+
+def full_scan(records, since: datetime, until=None):
+    """What the summaries computed before rollups: every session in range"""
+    minutes, days = defaultdict(int), set()
+    for s in records:
+        if s['timestamp'] >= since.isoformat() and (until is None or s['timestamp'] < until.isoformat()):
+            minutes[s['topic']] += s['duration_min']
+            days.add(s['timestamp'][:10])
+    return dict(minutes), days
+
+@pytest.fixture(params=["progress.db", "progress.json"])
+def db(request, tmp_path):
+    db = ProgressDB(str(tmp_path / request.param))
+    db.records = sessions()
+    db._write_many('study_sessions', db.records)
+    yield db
+    db.close()
+
+def test_week_and_month_summaries_match_a_full_scan(db):
+    for days in (7, 30):
+        since = NOW - timedelta(days=days)
+        minutes, _ = full_scan(db.records, since)
+        assert db.get_topic_minutes("custom", since) == minutes
+    summary = db.get_study_summary("month")
+    top = sorted(full_scan(db.records, NOW - timedelta(days=30))[0].items(), key=lambda x: (-x[1], x[0]))
+    assert [topic for topic, _ in summary['top_topics']] == [topic for topic, _ in top[:3]]
+
+def test_custom_ranges_with_partial_days_match_a_full_scan(db):
+    rng = random.Random(1)
+    for _ in range(25):
+        start = NOW - timedelta(seconds=rng.randrange(60 * 86400))
+        end = start + timedelta(seconds=rng.randrange(1, 20 * 86400))
+        assert db.get_topic_minutes("custom", start, end) == full_scan(db.records, start, end)[0]
+
+def test_streak_matches_a_full_scan(db):
+    for days in (1, 7, 30):
+        assert db.get_streak(days) == len(full_scan(db.records, NOW - timedelta(days=days))[1])
+
+def test_rebuild_reproduces_incremental_rollups(db):
+    def rows():
+        return sorted((r['day'], r['topic'], r['minutes'], r['sessions']) for r in db.storage.rollup_range())
+    incremental = rows()
+    assert db.rebuild_rollups() == len(db.records)
+    assert rows() == incremental
+
+def test_existing_database_gets_rollups_on_open(tmp_path):
+    path = str(tmp_path / "old.db")
+    db = ProgressDB(path)
+    records = sessions(100)
+    db.storage.insert_many('study_sessions', records)  # As written before rollups existed
+    db.storage.clear_rollups()
+    db.close()
+
+    db = ProgressDB(path)
+    since = NOW - timedelta(days=30)
+    assert db.get_topic_minutes("custom", since) == full_scan(records, since)[0]
+    db.close()
+
+def test_rebuild_in_small_batches_matches_one_pass(db):
+    from ai.database.storage import rebuild_rollups
+    def rows():
+        return sorted((r['day'], r['topic'], r['minutes'], r['sessions']) for r in db.storage.rollup_range())
+    one_pass = rows()
+    assert rebuild_rollups(db.storage, batch_size=7) == len(db.records)
+    assert rows() == one_pass
+
+def test_json_backend_writes_the_file_once_per_session(tmp_path, monkeypatch):
+    db = ProgressDB(str(tmp_path / "progress.json"))
+    db.log_study_session("Physics", 30)  # Today's rollup row exists now
+    storage = db.storage.db.storage
+    write = storage.write
+    writes = []
+    monkeypatch.setattr(storage, "write", lambda data: (writes.append(1), write(data)))
+
+    db._write_many('study_sessions', sessions(50, days=3))  # Updates and inserts together
+    assert len(writes) == 2  # The sessions, then every rollup change in one pass
+    since = NOW - timedelta(days=4)
+    assert db.get_topic_minutes("custom", since) == full_scan(db.storage.all('study_sessions'), since)[0]
+    db.close()
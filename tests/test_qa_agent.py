@@ -0,0 +1,59 @@
+# ai/tests/test_qa_agent.py
+import pytest
+from ai.agents.qa_agent import QAAgent
+from ai.tools.bm25_index import BM25Index
+
+NOTES = {
+    "eigen.md": "# Eigenvalues\nEigenvalues of a matrix are the roots of its characteristic polynomial.\n",
+    "det.md": "# Determinants\nThe determinant of a matrix is zero exactly when it is singular.\n",
+    "ode.md": "# ODEs\nSeparable differential equations are solved by integrating both sides.\n",
+}
+
+@pytest.fixture
+def corpus(tmp_path):
+    corpus = tmp_path / "notes"
+    corpus.mkdir()
+    for name, text in NOTES.items():
+        (corpus / name).write_text(text)
+    return corpus
+
+@pytest.fixture
+def qa(fake_ollama, tmp_path):
+    return QAAgent(persist_dir=str(tmp_path / "chroma"))
+
+def stored_ids(qa):
+    return set(qa.vector_db.get(include=[])["ids"])
+
+def test_sync_keeps_store_and_index_in_step(qa, corpus):
+    qa.sync_directory(str(corpus))
+    assert stored_ids(qa) == set(qa.bm25.docs)
+    assert len(stored_ids(qa)) == len(NOTES)
+
+    (corpus / "det.md").unlink()
+    report = qa.sync_directory(str(corpus))
+    assert report["chunks_removed"] == 1
+    assert stored_ids(qa) == set(qa.bm25.docs)
+    assert len(stored_ids(qa)) == len(NOTES) - 1
+
+def test_index_is_rebuilt_from_the_store(qa, corpus):
+    qa.sync_directory(str(corpus))
+    qa.bm25.path.unlink()
+    reopened = QAAgent(persist_dir=qa.persist_dir)
+    assert isinstance(reopened.bm25, BM25Index)
+    assert set(reopened.bm25.docs) == stored_ids(qa)
+
+def test_retriever_prefers_distinct_chunks(qa):
+    repeated = "Eigenvalues of a matrix are the roots of its characteristic polynomial."
+    qa.ingest_pieces([
+        (repeated, {"source": "copy1"}),
+        (repeated, {"source": "copy2"}),
+        (repeated + " Eigenvalues again.", {"source": "copy3"}),
+        ("Eigenvectors of a matrix keep their direction under it.", {"source": "other"}),
+    ])
+    qa.retriever.min_score = 0.0
+    sources = [doc.metadata["source"] for doc in qa.retriever.invoke("eigenvalues of a matrix")]
+    assert len(sources) == 3
+    assert "other" in sources  # Near-duplicates don't fill every slot
+
+    qa.retriever.mmr_lambda = None
+    assert "other" not in [doc.metadata["source"] for doc in qa.retriever.invoke("eigenvalues of a matrix")]
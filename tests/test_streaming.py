@@ -0,0 +1,89 @@
+# ai/tests/test_streaming.py
+import asyncio
+import pytest
+from ai.chains.base_chain import BaseChain, StreamTimer
+
+@pytest.fixture
+def qa(fake_ollama, tmp_path):
+    from ai.agents.qa_agent import QAAgent
+    return QAAgent(persist_dir=str(tmp_path / "kb"))
+
+async def collect(tokens):
+    return [token async for token in tokens]
+
+def test_stream_generate_matches_generate(fake_ollama):
+    fake_ollama.token_rate = 200
+    chain = BaseChain()
+    timer = StreamTimer()
+    tokens = list(chain.stream_generate("Explain eigenvalues", timer))
+    assert len(tokens) > 1
+    assert "".join(tokens) == chain.generate("Explain eigenvalues")
+
+    stats = timer.result()
+    assert stats["tokens"] == len(tokens)
+    assert 0 < stats["ttft_ms"] < stats["seconds"] * 1000
+    assert stats["tokens_per_second"] > 0
+
+def test_stats_are_recorded_when_the_consumer_stops_early(fake_ollama):
+    chain = BaseChain()
+    timer = StreamTimer()
+    tokens = chain.stream_generate("Explain eigenvalues", timer)
+    next(tokens)
+    tokens.close()
+    assert timer.end is not None and timer.result()["tokens"] == 1
+
+def test_concurrent_streams_keep_their_own_stats(fake_ollama):
+    fake_ollama.responder = lambda prompt: " ".join(["word"] * (5 if "short" in prompt else 40))
+    chain = BaseChain()
+    short, long = StreamTimer(), StreamTimer()
+
+    async def main():
+        await chain.agenerate("warm up")  # Model checks out of the way
+        return await asyncio.gather(
+            collect(chain.astream_generate("a short reply", short)),
+            collect(chain.astream_generate("a long reply", long))
+        )
+
+    short_tokens, long_tokens = asyncio.run(main())
+    assert len(short_tokens) < len(long_tokens)
+    assert short.result()["tokens"] == len(short_tokens)
+    assert long.result()["tokens"] == len(long_tokens)
+
+def test_general_and_rag_answers_stream(qa):
+    timer = StreamTimer()
+    general = list(qa.stream_answer("Tell me a joke", timer))  # Empty knowledge base: general answer
+    assert len(general) > 1 and timer.result()["tokens"] == len(general)
+
+    qa.ingest_pieces([("Eigenvalues are the roots of the characteristic polynomial.", {"source": "notes"})])
+    rag = list(qa.stream_answer("eigenvalues characteristic polynomial"))
+    assert "".join(rag) == qa.answer("eigenvalues characteristic polynomial")
+
+def test_stream_errors_become_a_message(qa, monkeypatch):
+    def broken(docs):
+        raise RuntimeError("model crashed")
+    monkeypatch.setattr(qa, "_answer_chain", broken)
+    assert list(qa.stream_answer("Tell me a joke")) == ["⚠️ Error processing your question: model crashed"]
+    assert asyncio.run(collect(qa.astream_answer("Tell me a joke"))) == [
+        "⚠️ Error processing your question: model crashed"
+    ]
+
+def test_async_stream_matches_sync(qa):
+    tokens = asyncio.run(collect(qa.astream_answer("Tell me a joke")))
+    assert tokens == list(qa.stream_answer("Tell me a joke"))
+
+def test_slow_model_times_out_while_streaming(qa, fake_ollama):
+    async def main():
+        await collect(qa.astream_answer("warm up"))  # Model checks out of the way
+        fake_ollama.first_token_latency = 2
+        qa.limiter.timeout = 0.3
+        return await collect(qa.astream_answer("Tell me a joke"))
+
+    assert asyncio.run(main()) == ["⚠️ Error processing your question: the model took too long to respond"]
+
+def test_wellness_pipeline_streams_lines(fake_ollama):
+    from ai.agents.wellness_agent import WellnessAgent
+    agent = WellnessAgent()
+    text = "I'm so overwhelmed with finals"
+    lines = list(agent.stream_pipeline(text))
+    assert len(lines) > 1 and "".join(lines) == agent.full_pipeline(text)
+    assert asyncio.run(collect(agent.astream_pipeline(text))) == lines
@@ -0,0 +1,78 @@
+# ai/tests/test_write_buffer.py
+import pytest
+from ai.database.progress_db import ProgressDB
+
+class Flaky:
+    """Wraps storage.insert_many to fail the next `failures` writes to `table`"""
+
+    def __init__(self, storage, table: str, failures: int):
+        self.insert_many = storage.insert_many
+        self.table = table
+        self.failures = failures
+        storage.insert_many = self
+
+    def __call__(self, table, *args, **kwargs):
+        if table == self.table and self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        return self.insert_many(table, *args, **kwargs)
+
+@pytest.fixture
+def db():
+    db = ProgressDB(":memory:", write_behind=True, flush_size=1000, flush_interval=60)
+    yield db
+    if not db.buffer._closed:
+        db.close()
+
+def test_reads_flush_queued_writes(db):
+    assert db.log_study_session("Physics", 30) is None
+    assert len(db.buffer) == 1
+    assert db.get_study_summary()['total_hours'] == 0.5
+    assert db.buffer_stats()['flushed'] == 1
+
+def test_flush_failure_requeues_only_unwritten_tables(db):
+    Flaky(db.storage, "interactions", failures=1)
+    db.log_study_session("Physics", 30)
+    db.log_interaction("What is a vector?", "An arrow", "qa")
+
+    assert db.buffer.flush() == 0
+    assert len(db.buffer) == 1  # The sessions batch was committed
+    assert db.buffer.flush() == 1
+
+    assert db.storage.count("study_sessions") == 1
+    assert db.storage.count("interactions") == 1
+    assert [r['minutes'] for r in db.storage.rollup_range()] == [30]
+    assert db.buffer_stats()['failed_flushes'] == 1
+
+def test_failed_session_write_leaves_no_rollups():
+    db = ProgressDB(":memory:")
+    db.storage.conn.execute("CREATE TRIGGER boom BEFORE INSERT ON study_sessions BEGIN SELECT RAISE(ABORT, 'boom'); END")
+    with pytest.raises(Exception):
+        db.log_study_session("Physics", 30)
+    assert db.storage.count_rollups() == 0
+    db.close()
+
+def test_close_retries_a_failed_final_flush(db):
+    Flaky(db.storage, "study_sessions", failures=2)
+    for _ in range(5):
+        db.log_study_session("History", 20)
+    db.close()
+    assert db.buffer_stats()['flushed'] == 5
+
+def test_close_raises_when_records_cannot_be_written(db):
+    Flaky(db.storage, "study_sessions", failures=100)
+    db.buffer.close_retries = 1
+    db.log_study_session("History", 20)
+    db.log_study_session("Biology", 25)
+    with pytest.raises(RuntimeError, match="2 queued records"):
+        db.buffer.close()
+
+def test_no_records_lost_under_concurrent_writers():
+    from concurrent.futures import ThreadPoolExecutor
+    db = ProgressDB(":memory:", write_behind=True, flush_size=50, flush_interval=0.01)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: db.log_study_session(f"Topic {i % 5}", 10), range(2000)))
+    db.flush()
+    assert db.storage.count("study_sessions") == 2000
+    assert sum(r['sessions'] for r in db.storage.rollup_range()) == 2000
+    db.close()
@@ -0,0 +1,289 @@
+# ai/tools/bm25_index.py
+"""
+Lexical retrieval for the knowledge base.
+BM25Index is an in-memory inverted index over ingested chunks, persisted as
+one JSON file next to the vector store and kept in sync by upserts and
+deletes keyed on chunk_id. HybridRetriever fuses its scores with vector
+similarity so both exact terms and paraphrases find the right chunks.
+"""
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict
+from ai.tools.tracing import span
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it its me my of on or "
+    "our so that the their them then there these this to was we what when where which "
+    "who why will with you your about into than".split()
+)
+_TOKEN = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without stopwords"""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+class BM25Index:
+    """
+    Okapi BM25 over chunks keyed by chunk_id:
+    - add()/remove() keep postings in step with the vector store
+    - search() returns raw scores plus a 0..1 normalized score (relative to an
+      average-length chunk containing every query term once, capped at 1),
+      usable against a fixed threshold
+    - save() writes atomically; load() rebuilds postings from stored term counts
+    Readers copy what they need under the lock and score or serialize
+    outside it, so searches and saves don't hold up concurrent upserts.
+    """
+
+    def __init__(self, path: Optional[Path] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        self.docs: Dict[str, Dict] = {}           # id -> {"text", "metadata", "terms", "length"}
+        self.postings: Dict[str, Dict[str, int]] = {}  # term -> {id: tf}
+        self.total_length = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, path: Path, **params) -> "BM25Index":
+        """Index from `path`, or an empty one bound to it if the file doesn't exist"""
+        index = cls(path, **params)
+        if index.path.exists():
+            with open(index.path) as f:
+                data = json.load(f)
+            for doc_id, (text, metadata, terms) in data["docs"].items():
+                index._insert(doc_id, text, metadata, terms)
+        return index
+
+    def save(self) -> None:
+        """Write atomically so a crash never leaves a half-written index"""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        # Writers replace doc entries rather than mutate them, so a shallow copy is a snapshot
+        with self._lock:
+            docs = list(self.docs.items())
+        with open(tmp, "w") as f:
+            json.dump({"docs": {
+                doc_id: [doc["text"], doc["metadata"], doc["terms"]] for doc_id, doc in docs
+            }}, f)
+        os.replace(tmp, self.path)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _insert(self, doc_id: str, text: str, metadata: Dict, terms: Dict[str, int]) -> None:
+        length = sum(terms.values())
+        self.docs[doc_id] = {"text": text, "metadata": metadata, "terms": terms, "length": length}
+        self.total_length += length
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def _delete(self, doc_id: str) -> None:
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self.total_length -= doc["length"]
+        for term in doc["terms"]:
+            posting = self.postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+
+    def add(self, ids: List[str], texts: List[str], metadatas: Optional[List[Dict]] = None) -> None:
+        """Insert or replace chunks"""
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                self._delete(doc_id)
+                self._insert(doc_id, text, metadata, dict(Counter(tokenize(text))))
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """Drop chunks (unknown ids are ignored)"""
+        with self._lock:
+            for doc_id in ids:
+                self._delete(doc_id)
+
+    @staticmethod
+    def _idf(n_docs: int, df: int) -> float:
+        return math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+    def _norm(self, length: int, avg_length: float) -> float:
+        return self.k1 * (1 - self.b + self.b * length / avg_length)
+
+    def _full_match_score(self, n_docs: int, dfs: Dict[str, int]) -> float:
+        """Score of an average-length chunk containing each query term once"""
+        return sum(self._idf(n_docs, df) for df in dfs.values()) or 1.0
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float, float]]:
+        """Top k (id, raw score, normalized score), best first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            # Copy only the query's postings and the lengths they reference;
+            # scoring then runs unlocked
+            n_docs, total_length = len(self.docs), self.total_length
+            postings = {term: dict(self.postings.get(term, ())) for term in terms}
+            lengths = {doc_id: self.docs[doc_id]["length"] for posting in postings.values() for doc_id in posting}
+        if not n_docs:
+            return []
+
+        # Term-at-a-time accumulation over the postings lists
+        avg_length = total_length / n_docs
+        scores: Dict[str, float] = {}
+        for posting in postings.values():
+            if not posting:
+                continue
+            weight = self._idf(n_docs, len(posting)) * (self.k1 + 1)
+            for doc_id, tf in posting.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * tf / (tf + self._norm(lengths[doc_id], avg_length))
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        full = self._full_match_score(n_docs, {term: len(posting) for term, posting in postings.items()})
+        return [(doc_id, score, min(1.0, score / full)) for doc_id, score in top]
+
+    def normalized_scores(self, query: str, ids: Iterable[str]) -> Dict[str, float]:
+        """Normalized scores of specific chunks (0 for unknown ids)"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        ids = list(ids)
+        with self._lock:
+            n_docs, total_length = len(self.docs), self.total_length
+            dfs = {term: len(self.postings.get(term, ())) for term in terms}
+            docs = {doc_id: self.docs[doc_id] for doc_id in ids if doc_id in self.docs}
+        if not n_docs or not terms:
+            return {doc_id: 0.0 for doc_id in ids}
+
+        avg_length = total_length / n_docs
+        full = self._full_match_score(n_docs, dfs)
+        scores = {}
+        for doc_id in ids:
+            doc = docs.get(doc_id)
+            if doc is None:
+                scores[doc_id] = 0.0
+                continue
+            norm = self._norm(doc["length"], avg_length)
+            score = 0.0
+            for term in terms:
+                tf = doc["terms"].get(term)
+                if tf:
+                    score += self._idf(n_docs, dfs[term]) * tf * (self.k1 + 1) / (tf + norm)
+            scores[doc_id] = min(1.0, score / full)
+        return scores
+
+    def document(self, doc_id: str) -> Document:
+        doc = self.docs[doc_id]
+        return Document(page_content=doc["text"], metadata=doc["metadata"], id=doc_id)
+
+def unit_l2_relevance(distance: float) -> float:
+    """
+    Chroma's default squared-L2 distance between unit embeddings as cosine
+    similarity, clipped to 0..1 (LangChain's default goes negative)
+    """
+    return min(1.0, max(0.0, 1.0 - distance / 2))
+
+def _doc_id(doc: Document) -> Optional[str]:
+    return doc.metadata.get("chunk_id") or getattr(doc, "id", None)
+
+class HybridRetriever(BaseRetriever):
+    """
+    Fuses vector similarity and BM25:
+        fused = alpha * vector relevance + (1 - alpha) * normalized BM25
+    Candidates are the top fetch_k of each; a candidate missing from the
+    vector list gets the lowest vector score seen. Returns the top k with
+    fused >= min_score (scores are also stored in metadata["fused_score"]).
+    With mmr_lambda set, the k are picked by maximal marginal relevance:
+    mmr_lambda * fused - (1 - mmr_lambda) * term overlap (cosine of term
+    counts) with chunks already picked, so overlapping chunks don't crowd
+    out other material.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store: VectorStore
+    index: BM25Index
+    k: int = 3
+    fetch_k: int = 20
+    alpha: float = 0.5
+    min_score: float = 0.0
+    mmr_lambda: Optional[float] = None
+
+    def scored(self, query: str) -> List[Tuple[Document, float]]:
+        """All fused candidates, best first"""
+        if not len(self.index):
+            return []  # Nothing ingested: skip the embedding round-trip
+
+        with span("retrieval.vector") as s:
+            vector_hits = self.vector_store.similarity_search_with_relevance_scores(query, k=self.fetch_k)
+            s.set(hits=len(vector_hits))
+        candidates: Dict[str, Document] = {}
+        vector_scores: Dict[str, float] = {}
+        for doc, score in vector_hits:
+            doc_id = _doc_id(doc) or doc.page_content
+            candidates.setdefault(doc_id, doc)
+            vector_scores[doc_id] = max(score, vector_scores.get(doc_id, 0.0))
+
+        with span("retrieval.bm25") as s:
+            lexical = {doc_id: norm for doc_id, _, norm in self.index.search(query, self.fetch_k)}
+            missing = [doc_id for doc_id in vector_scores if doc_id not in lexical]
+            lexical.update(self.index.normalized_scores(query, missing))
+            s.set(hits=len(lexical))
+        for doc_id in lexical:
+            if doc_id not in candidates:
+                candidates[doc_id] = self.index.document(doc_id)
+
+        floor = min(vector_scores.values(), default=0.0)
+        fused = [
+            (doc, self.alpha * vector_scores.get(doc_id, floor) + (1 - self.alpha) * lexical.get(doc_id, 0.0))
+            for doc_id, doc in candidates.items()
+        ]
+        fused.sort(key=lambda pair: -pair[1])
+        return fused
+
+    def top_score(self, query: str) -> float:
+        """Best fused score for the query (0 when nothing matches)"""
+        scored = self.scored(query)
+        return scored[0][1] if scored else 0.0
+
+    def _mmr(self, scored: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+        """Pick k of the scored candidates by maximal marginal relevance"""
+        vectors = []
+        for doc, _ in scored:
+            terms = Counter(tokenize(doc.page_content))
+            vectors.append((terms, math.sqrt(sum(tf * tf for tf in terms.values())) or 1.0))
+
+        def overlap(i: int, j: int) -> float:
+            (a, norm_a), (b, norm_b) = vectors[i], vectors[j]
+            if len(a) > len(b):
+                a, b = b, a
+            return sum(tf * b.get(term, 0) for term, tf in a.items()) / (norm_a * norm_b)
+
+        picked: List[int] = []
+        remaining = list(range(len(scored)))
+        while remaining and len(picked) < self.k:
+            best = max(remaining, key=lambda i: self.mmr_lambda * scored[i][1] - (1 - self.mmr_lambda) * max(
+                (overlap(i, j) for j in picked), default=0.0
+            ))
+            picked.append(best)
+            remaining.remove(best)
+        return [scored[i] for i in picked]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        scored = [(doc, score) for doc, score in self.scored(query) if score >= self.min_score]
+        scored = self._mmr(scored) if self.mmr_lambda is not None else scored[:self.k]
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "fused_score": score}, id=doc.id)
+            for doc, score in scored
+        ]
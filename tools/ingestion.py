@@ -0,0 +1,185 @@
+# ai/tools/ingestion.py
+"""
+Streaming document ingestion helpers.
+Everything here is a generator, so a corpus is never held in memory:
+files -> pages -> overlapping chunks -> batches -> embeddings.
+IngestManifest records per-file and per-chunk content hashes so
+re-syncs only embed what changed.
+"""
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# (text, metadata) pairs flowing through the pipeline
+Piece = Tuple[str, Dict]
+
+MARKDOWN_SUFFIXES = (".md", ".markdown", ".txt")
+PDF_SUFFIXES = (".pdf",)
+
+def iter_files(root: str) -> Iterator[Path]:
+    """Supported files under root, in a stable order"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = Path(dirpath) / name
+            if path.suffix.lower() in MARKDOWN_SUFFIXES + PDF_SUFFIXES:
+                yield path
+
+def iter_markdown_pages(path: Path, max_page_chars: int = 4000) -> Iterator[Piece]:
+    """
+    Stream a Markdown/text file as pages.
+    A page ends at a top-level heading or once it reaches max_page_chars.
+    """
+    page, size, number = [], 0, 1
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if (line.startswith("# ") and page) or size >= max_page_chars:
+                yield "".join(page), {"source": str(path), "page": number}
+                page, size, number = [], 0, number + 1
+            page.append(line)
+            size += len(line)
+    if page:
+        yield "".join(page), {"source": str(path), "page": number}
+
+def iter_pdf_pages(path: Path) -> Iterator[Piece]:
+    """Stream a PDF one page at a time (requires pypdf)"""
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise ImportError("PDF ingestion requires pypdf: pip install pypdf") from e
+
+    reader = PdfReader(str(path))
+    for number, page in enumerate(reader.pages, start=1):
+        text = page.extract_text() or ""
+        if text.strip():
+            yield text, {"source": str(path), "page": number}
+
+def iter_file_pages(path: Path) -> Iterator[Piece]:
+    """Stream pages from one supported file"""
+    if path.suffix.lower() in PDF_SUFFIXES:
+        return iter_pdf_pages(path)
+    return iter_markdown_pages(path)
+
+def iter_pages(root: str) -> Iterator[Piece]:
+    """Stream pages from every supported file under root"""
+    for path in iter_files(root):
+        yield from iter_file_pages(path)
+
+def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> Iterator[str]:
+    """
+    Split text into chunks of at most chunk_size characters, each sharing
+    about `overlap` characters with the previous one. Cuts prefer whitespace.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
+
+    text = text.strip()
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            cut = text.rfind(" ", start + overlap + 1, end)
+            if cut > start:
+                end = cut
+        chunk = text[start:end].strip()
+        if chunk:
+            yield chunk
+        if end >= len(text):
+            break
+        next_start = end - overlap
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+
+def iter_chunks(pieces: Iterable[Piece], chunk_size: int = 1000, overlap: int = 200) -> Iterator[Piece]:
+    """Chunk each (text, metadata) piece, tagging chunks with their index"""
+    for text, metadata in pieces:
+        for i, chunk in enumerate(chunk_text(text, chunk_size, overlap)):
+            yield chunk, {**metadata, "chunk": i}
+
+def content_hash(text: str) -> str:
+    """Stable hash of a chunk's text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def file_hash(path: Path, block_size: int = 1 << 20) -> str:
+    """sha256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_id(source: str, text_hash: str, occurrence: int = 1) -> str:
+    """
+    Deterministic vector id for a chunk: same source + same text -> same id,
+    so re-adding a chunk overwrites instead of duplicating.
+    """
+    return f"{content_hash(source)[:12]}-{text_hash[:24]}-{occurrence}"
+
+def with_chunk_ids(pieces: Iterable[Piece]) -> Iterator[Piece]:
+    """Attach a content-derived chunk_id to chunks that don't have one"""
+    for text, metadata in pieces:
+        if "chunk_id" not in metadata:
+            source = f"{metadata.get('source', '')}#{metadata.get('page', '')}#{metadata.get('chunk', '')}"
+            metadata = {**metadata, "chunk_id": chunk_id(source, content_hash(text))}
+        yield text, metadata
+
+class IngestManifest:
+    """
+    JSON record of what is already in the vector store:
+    {"params": {...}, "files": {source: {"sha256": ..., "chunks": {chunk_id: text_hash}}}}
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.params: Dict = {}
+        self.files: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                data = json.load(f)
+            self.params = data.get("params", {})
+            self.files = data.get("files", {})
+
+    def save(self) -> None:
+        """Write atomically so a crash never leaves a half-written manifest"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"params": self.params, "files": self.files}, f)
+        os.replace(tmp, self.path)
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """Group an iterable into lists of at most `size` items"""
+    it = iter(items)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+def embed_batches(
+    embed: Callable[[List[str]], List[List[float]]],
+    batches: Iterable[List[Piece]],
+    workers: int = 4,
+    max_pending: Optional[int] = None
+) -> Iterator[Tuple[List[Piece], List[List[float]]]]:
+    """
+    Embed batches on a thread pool, yielding (batch, embeddings) in order.
+    At most max_pending batches (default 2x workers) are in flight, which
+    keeps memory flat however many batches the source produces.
+    """
+    max_pending = max_pending or workers * 2
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch in batches:
+            pending.append((batch, pool.submit(embed, [text for text, _ in batch])))
+            if len(pending) >= max_pending:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
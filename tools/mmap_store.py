@@ -0,0 +1,300 @@
+# ai/tools/mmap_store.py
+"""
+In-process vector store for a read-heavy, mostly fixed corpus.
+Embeddings are unit-normalized float32 rows in one contiguous file that is
+memory-mapped read-only, so worker processes on the same host share its
+pages through the OS page cache instead of each loading a copy. Ids, texts
+and metadata live in a JSON sidecar. Search is one matrix-vector product
+plus argpartition top-k (exact, no ANN index to build or load).
+"""
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+def _unit_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+class MmapVectorStore(VectorStore):
+    """
+    LangChain VectorStore over a memory-mapped float32 matrix:
+    - <name>.<generation>.f32: rows of the matrix, written once per save()
+    - <name>.json: ids, texts, metadata, dim and the current matrix file;
+      replaced last, so it is the commit point of a save
+    - upsert()/delete() work on an in-memory copy until save(); readers in
+      other processes keep their old mapping until they reopen
+    - similarity and MMR search are exact (cosine), optionally filtered
+      on metadata equality; as_retriever() works as with any VectorStore
+    """
+
+    def __init__(self, path: Optional[str] = None, embedding: Optional[Embeddings] = None, name: str = "vectors"):
+        self.directory = Path(path) if path else None
+        self.name = name
+        self._embedding = embedding
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict] = []
+        self._row: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None  # capacity x dim; np.memmap when freshly loaded
+        self._size = 0
+        self._dim: Optional[int] = None
+        self._generation = 0
+        self._dirty = False
+        self._lock = threading.RLock()
+        if self.directory is not None:
+            self._load()
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+
+    @property
+    def _sidecar(self) -> Path:
+        return self.directory / f"{self.name}.json"
+
+    def _matrix_path(self, generation: int) -> Path:
+        return self.directory / f"{self.name}.{generation}.f32"
+
+    def _load(self) -> None:
+        if not self._sidecar.exists():
+            return
+        with open(self._sidecar) as f:
+            meta = json.load(f)
+        self.ids, self.texts, self.metadatas = meta["ids"], meta["texts"], meta["metadatas"]
+        self._row = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self._size = len(self.ids)
+        self._dim = meta["dim"]
+        self._generation = meta["generation"]
+        if self._size:
+            self._matrix = np.memmap(
+                self._matrix_path(self._generation), dtype=np.float32, mode="r", shape=(self._size, self._dim)
+            )
+
+    def save(self) -> None:
+        """Write the matrix and sidecar, then re-map the matrix read-only"""
+        if self.directory is None or not self._dirty:
+            return
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            old, generation = self._generation, self._generation + 1
+            if self._size:
+                self._matrix[:self._size].tofile(self._matrix_path(generation))
+            tmp = self._sidecar.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump({
+                    "dim": self._dim,
+                    "generation": generation,
+                    "ids": self.ids,
+                    "texts": self.texts,
+                    "metadatas": self.metadatas
+                }, f)
+            os.replace(tmp, self._sidecar)
+            self._generation = generation
+            self._dirty = False
+            self._matrix = None
+            if self._size:
+                self._matrix = np.memmap(
+                    self._matrix_path(generation), dtype=np.float32, mode="r", shape=(self._size, self._dim)
+                )
+            try:
+                self._matrix_path(old).unlink(missing_ok=True)
+            except OSError:
+                pass  # Still mapped by a reader on a platform that forbids deleting it
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _writable(self, extra: int) -> None:
+        """In-memory matrix with room for `extra` more rows (amortized doubling)"""
+        needed = self._size + extra
+        matrix = self._matrix
+        if matrix is not None and not isinstance(matrix, np.memmap) and len(matrix) >= needed:
+            return
+        capacity = max(needed, 2 * (len(matrix) if matrix is not None else 0), 1024)
+        grown = np.empty((capacity, self._dim), dtype=np.float32)
+        if self._size:
+            grown[:self._size] = matrix[:self._size]
+        self._matrix = grown
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Sequence[str],
+        metadatas: Optional[Sequence[Dict]] = None
+    ) -> None:
+        """Insert or replace rows with pre-computed embeddings"""
+        if not ids:
+            return
+        vectors = _unit_rows(np.asarray(embeddings, dtype=np.float32))
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} != store dimension {self._dim}")
+            self._writable(sum(1 for doc_id in set(ids) if doc_id not in self._row))
+            rows = []
+            for doc_id, text, metadata in zip(ids, documents, metadatas):
+                row = self._row.get(doc_id)
+                if row is None:
+                    row = self._row[doc_id] = self._size
+                    self._size += 1
+                    self.ids.append(doc_id)
+                    self.texts.append(text)
+                    self.metadatas.append(metadata)
+                else:
+                    self.texts[row] = text
+                    self.metadatas[row] = metadata
+                rows.append(row)
+            self._matrix[rows] = vectors
+            self._dirty = True
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[Dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        texts = list(texts)
+        if self._embedding is None:
+            raise ValueError("MmapVectorStore needs an embedding to add texts")
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        self.upsert(ids, self._embedding.embed_documents(texts), texts, metadatas)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Remove rows by id (the last row moves into each freed slot)"""
+        with self._lock:
+            doomed = [doc_id for doc_id in dict.fromkeys(ids or ()) if doc_id in self._row]
+            if not doomed:
+                return False
+            self._writable(0)
+            for doc_id in doomed:
+                row = self._row.pop(doc_id)
+                last = self._size - 1
+                if row != last:
+                    moved = self.ids[last]
+                    self._matrix[row] = self._matrix[last]
+                    self.ids[row], self.texts[row], self.metadatas[row] = moved, self.texts[last], self.metadatas[last]
+                    self._row[moved] = row
+                self.ids.pop()
+                self.texts.pop()
+                self.metadatas.pop()
+                self._size -= 1
+            self._dirty = True
+            return True
+
+    def _document(self, row: int) -> Document:
+        return Document(page_content=self.texts[row], metadata=dict(self.metadatas[row]), id=self.ids[row])
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        with self._lock:
+            return [self._document(self._row[doc_id]) for doc_id in ids if doc_id in self._row]
+
+    def _top_rows(self, embedding: Sequence[float], k: int, filter: Optional[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, cosine scores) of the k best rows, best first; caller holds the lock"""
+        if not self._size or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = _unit_rows(np.asarray(embedding, dtype=np.float32).reshape(1, -1))[0]
+        scores = self._matrix[:self._size] @ query
+        if filter:
+            keep = np.fromiter(
+                (all(m.get(key) == value for key, value in filter.items()) for m in self.metadatas),
+                dtype=bool, count=self._size
+            )
+            scores = np.where(keep, scores, -np.inf)
+        k = min(k, self._size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        return top, scores[top]
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: Sequence[float], k: int = 4, filter: Optional[Dict] = None
+    ) -> List[Tuple[Document, float]]:
+        with self._lock:
+            rows, scores = self._top_rows(embedding, k, filter)
+            return [(self._document(row), float(score)) for row, score in zip(rows.tolist(), scores.tolist())]
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Top k with cosine similarity (higher is closer)"""
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k, filter)
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return lambda score: min(1.0, max(0.0, score))
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        """MMR over the fetch_k nearest rows, vectorized over candidates"""
+        with self._lock:
+            rows, relevance = self._top_rows(embedding, max(fetch_k, k), filter)
+            if not len(rows):
+                return []
+            vectors = self._matrix[rows]
+            chosen = [0]
+            closest = vectors @ vectors[0]  # Similarity of each candidate to the chosen set
+            while len(chosen) < min(k, len(rows)):
+                mmr = lambda_mult * relevance - (1 - lambda_mult) * closest
+                mmr[chosen] = -np.inf
+                best = int(np.argmax(mmr))
+                chosen.append(best)
+                closest = np.maximum(closest, vectors @ vectors[best])
+            return [self._document(int(rows[i])) for i in chosen]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self._embedding.embed_query(query), k, fetch_k, lambda_mult, filter
+        )
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[Dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        path: Optional[str] = None,
+        **kwargs: Any
+    ) -> "MmapVectorStore":
+        store = cls(path, embedding)
+        store.add_texts(texts, metadatas, ids=ids)
+        store.save()
+        return store
@@ -0,0 +1,239 @@
+# ai/tools/mood_classifier.py
+"""
+Local mood classification in front of the LLM.
+Stage 1: weighted keyword/phrase scorer (microseconds, no I/O)
+Stage 2: nearest centroid over embeddings of labeled example messages
+Anything still ambiguous (or stage 2 can't run: model server down) is left
+for the caller to send to the LLM.
+Labels match WellnessState values: "stressed", "anxious", "calm".
+"""
+import logging
+import math
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+MOODS = ("stressed", "anxious", "calm")
+
+# Cue -> weight per mood. Strong cues (2) decide on their own; weak ones (1) need support.
+LEXICON: Dict[str, Dict[str, float]] = {
+    "stressed": {
+        "overwhelmed": 2, "overwhelming": 2, "stress": 2, "stressed": 2, "stressful": 2,
+        "stressing": 2, "swamped": 2, "burnout": 2, "burned out": 2, "burnt out": 2,
+        "exhausted": 2, "drowning": 2, "overloaded": 2, "overworked": 2, "frazzled": 2,
+        "cramming": 2, "too much": 2, "too many": 2, "so much work": 2, "can't keep up": 2,
+        "falling behind": 2, "no time": 2, "deadline": 1, "deadlines": 1, "pressure": 1,
+        "hectic": 1, "behind": 1, "tired": 1, "hard": 1, "busy": 1
+    },
+    "anxious": {
+        "anxious": 2, "anxiety": 2, "nervous": 2, "worried": 2, "worry": 2, "worrying": 2,
+        "scared": 2, "afraid": 2, "panic": 2, "panicking": 2, "terrified": 2, "dread": 2,
+        "dreading": 2, "freaking out": 2, "what if": 2, "fail": 2, "failing": 2,
+        "uneasy": 1, "insecure": 1, "fear": 1, "doubt": 1, "jittery": 1
+    },
+    "calm": {
+        "calm": 2, "relaxed": 2, "confident": 2, "prepared": 2, "went well": 2, "proud": 2,
+        "motivated": 2, "peaceful": 2, "excited": 2, "great": 2, "excellent": 2, "happy": 2,
+        "on track": 2, "productive": 2, "enjoyed": 2, "good": 1, "fine": 1, "ready": 1,
+        "okay": 1, "ok": 1, "enjoy": 1, "content": 1
+    }
+}
+
+# A negated cue counts (at half weight) toward the opposite mood: "not ready" -> anxious
+NEGATIONS = {"not", "no", "never", "don't", "dont", "isn't", "wasn't", "aren't", "didn't", "hardly"}
+NEGATED = {"calm": "anxious", "stressed": "calm", "anxious": "calm"}
+
+# Labeled examples for the embedding stage (extend via MoodClassifier(examples=...))
+EXAMPLES: Dict[str, List[str]] = {
+    "stressed": [
+        "I have three assignments due tomorrow and haven't started",
+        "There's way too much work this week",
+        "I'm buried in coursework and can't catch a break",
+        "Between my job and classes I have no time left",
+        "My to-do list keeps growing faster than I can finish it"
+    ],
+    "anxious": [
+        "What if I blank on the exam?",
+        "I'm scared my grade won't be good enough",
+        "My stomach is in knots before the test",
+        "I keep thinking I'll mess up my presentation",
+        "I'm not sure I understood anything and the exam is soon"
+    ],
+    "calm": [
+        "I finished my review and feel good about it",
+        "Studying went smoothly today",
+        "I'm on schedule with my revision plan",
+        "The lecture made sense and I'm enjoying the topic",
+        "Had a nice productive session at the library"
+    ]
+}
+
+_CUES: Dict[str, List[Tuple[str, float]]] = {}
+for _mood, _cues in LEXICON.items():
+    for _cue, _weight in _cues.items():
+        _CUES.setdefault(_cue, []).append((_mood, _weight))
+_MAX_CUE_WORDS = max(len(cue.split()) for cue in _CUES)
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+class MoodResult(NamedTuple):
+    label: str
+    stage: str          # "lexical" or "embedding"
+    confidence: float   # Winning margin (score points or cosine difference)
+
+def lexical_scores(text: str) -> Dict[str, float]:
+    """Weighted cue counts per mood (phrases first, negation-aware)"""
+    tokens = _TOKEN.findall(text.lower().replace("’", "'"))
+    scores = dict.fromkeys(MOODS, 0.0)
+    i = 0
+    while i < len(tokens):
+        for size in range(min(_MAX_CUE_WORDS, len(tokens) - i), 0, -1):
+            hits = _CUES.get(" ".join(tokens[i:i + size]))
+            if hits:
+                negated = any(t in NEGATIONS for t in tokens[max(0, i - 2):i])
+                for mood, weight in hits:
+                    if negated:
+                        scores[NEGATED[mood]] += weight / 2
+                    else:
+                        scores[mood] += weight
+                i += size
+                break
+        else:
+            i += 1
+    return scores
+
+def lexical_mood(text: str, min_score: float = 2.0, min_margin: float = 1.0) -> Optional[MoodResult]:
+    """Stage 1: a mood when one clearly outscores the others, else None"""
+    ranked = sorted(lexical_scores(text).items(), key=lambda kv: -kv[1])
+    (label, best), (_, second) = ranked[0], ranked[1]
+    if best >= min_score and best - second >= min_margin:
+        return MoodResult(label, "lexical", best - second)
+    return None
+
+def lexical_sentiment(text: str) -> Optional[str]:
+    """'positive' (calm) / 'negative' (stressed, anxious) / None, from stage 1 alone"""
+    result = lexical_mood(text, min_score=1.0)
+    if result is None:
+        return None
+    return "positive" if result.label == "calm" else "negative"
+
+def _unit(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+class MoodClassifier:
+    """
+    Two local stages in front of the LLM:
+    - Lexical scorer answers messages with an unambiguous cue
+    - Nearest centroid over example embeddings answers messages that are
+      clearly closer to one mood than the rest (needs an embedder)
+    classify_local() returns None when the message should go to the LLM;
+    stats() reports how often each stage answered.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional["Embeddings"] = None,
+        examples: Optional[Dict[str, List[str]]] = None,
+        min_score: float = 2.0,
+        min_margin: float = 1.0,
+        min_similarity: float = 0.3,
+        min_centroid_margin: float = 0.05
+    ):
+        """
+        Args:
+            embedder: Embeddings for stage 2 (None = lexical stage only);
+                pass a cached embedder so example vectors are computed once
+            examples: mood -> labeled example messages (default EXAMPLES)
+            min_score, min_margin: Stage 1 confidence thresholds
+            min_similarity: Lowest cosine to the winning centroid stage 2 accepts
+            min_centroid_margin: Required cosine lead over the runner-up centroid
+        """
+        self.embedder = embedder
+        self.examples = examples or EXAMPLES
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.min_similarity = min_similarity
+        self.min_centroid_margin = min_centroid_margin
+        self._centroids: Optional[Dict[str, List[float]]] = None
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(("lexical", "embedding", "escalated"), 0)
+        self._tried = dict.fromkeys(("lexical", "embedding"), 0)
+        self._seconds = dict.fromkeys(("lexical", "embedding"), 0.0)
+
+    def _get_centroids(self) -> Dict[str, List[float]]:
+        """Unit-length mean of each mood's example embeddings (built once)"""
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    centroids = {}
+                    for mood, texts in self.examples.items():
+                        vectors = [_unit(v) for v in self.embedder.embed_documents(list(texts))]
+                        centroids[mood] = _unit([sum(column) for column in zip(*vectors)])
+                    self._centroids = centroids
+        return self._centroids
+
+    def _nearest(self, vector: Sequence[float]) -> Optional[MoodResult]:
+        query = _unit(vector)
+        ranked = sorted(
+            ((sum(a * b for a, b in zip(query, centroid)), mood)
+             for mood, centroid in self._get_centroids().items()),
+            reverse=True
+        )
+        (best, label), (second, _) = ranked[0], ranked[1]
+        if best >= self.min_similarity and best - second >= self.min_centroid_margin:
+            return MoodResult(label, "embedding", best - second)
+        return None
+
+    def _record(self, stage: str, answered: int, tried: int = 0, seconds: float = 0.0) -> None:
+        with self._lock:
+            self._counts[stage] += answered
+            if stage in self._tried:
+                self._tried[stage] += tried
+                self._seconds[stage] += seconds
+
+    def classify_local(self, text: str) -> Optional[MoodResult]:
+        """Answer from the local stages, or None to escalate to the LLM"""
+        return self.classify_local_many([text])[0]
+
+    def classify_local_many(self, texts: Iterable[str]) -> List[Optional[MoodResult]]:
+        """classify_local() for many messages; stage 2 embeds all leftovers in one request"""
+        texts = list(texts)
+        start = time.perf_counter()
+        results = [lexical_mood(t, self.min_score, self.min_margin) for t in texts]
+        answered = sum(r is not None for r in results)
+        self._record("lexical", answered, len(texts), time.perf_counter() - start)
+
+        pending = [i for i, r in enumerate(results) if r is None]
+        if pending and self.embedder is not None:
+            start = time.perf_counter()
+            try:
+                vectors = self.embedder.embed_documents([texts[i] for i in pending])
+                nearest = [self._nearest(vector) for vector in vectors]
+            except Exception:
+                # Embedding failed (server down, timeout): these escalate to the LLM
+                logger.warning(f"Mood embedding stage failed; escalating {len(pending)} messages", exc_info=True)
+                nearest = [None] * len(pending)
+            for i, result in zip(pending, nearest):
+                results[i] = result
+            answered = sum(results[i] is not None for i in pending)
+            self._record("embedding", answered, len(pending), time.perf_counter() - start)
+
+        self._record("escalated", sum(r is None for r in results))
+        return results
+
+    def stats(self) -> Dict:
+        """Messages answered per stage, hit ratios and mean per-message stage latency"""
+        with self._lock:
+            total = sum(self._counts.values())
+            stats = {"messages": total, **self._counts}
+            for stage, count in self._counts.items():
+                stats[f"{stage}_ratio"] = count / total if total else 0.0
+            for stage, tried in self._tried.items():
+                stats[f"{stage}_us"] = self._seconds[stage] / tried * 1e6 if tried else 0.0
+            return stats
@@ -1,7 +1,15 @@
 # ai/tools/ollama_manager.py
+import os
+import json
 import subprocess
 import shutil
-from typing import Optional, Literal
+import threading
+import time
+import socket
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from typing import Optional, Literal, Dict, Set, Iterator, Callable, List
 import logging
 from pathlib import Path
 
@@ -9,21 +17,164 @@ from pathlib import Path
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Errors that mean "daemon unreachable" rather than "bad request"
+HTTP_ERRORS = (OSError, http.client.HTTPException)
+
+# Nothing is listening (or the host doesn't resolve): retrying won't help
+CONNECT_ERRORS = (ConnectionRefusedError, socket.gaierror)
+
+# progress(model_name, completed_bytes, total_bytes)
+ProgressCallback = Callable[[str, int, int], None]
+
+class PullError(RuntimeError):
+    """Raised when the daemon reports a failed pull"""
+
+class PullInterrupted(PullError):
+    """The pull stream ended before the daemon reported success (retried)"""
+
+class HTTPStatusError(http.client.HTTPException):
+    """The daemon answered with an HTTP error status"""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+def normalize_model_name(name: str) -> str:
+    """Canonical 'name:tag' form ('mistral' -> 'mistral:latest')"""
+    name = name.strip()
+    if ":" not in name.rsplit("/", 1)[-1]:
+        name += ":latest"
+    return name
+
+class OllamaHTTPClient:
+    """
+    Minimal client for the Ollama daemon REST API.
+    Keeps one keep-alive connection per thread, so repeated calls
+    reuse the same socket instead of reconnecting.
+    """
+
+    def __init__(self, host: Optional[str] = None, timeout: float = 5.0):
+        host = host or os.getenv("OLLAMA_HOST", "http://localhost:11434")
+        if "://" not in host:
+            host = f"http://{host}"
+        parts = urlsplit(host)
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _new_connection(self, timeout: Optional[float]) -> http.client.HTTPConnection:
+        conn_cls = (http.client.HTTPSConnection if self.scheme == "https"
+                    else http.client.HTTPConnection)
+        return conn_cls(self.netloc, timeout=timeout)
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._new_connection(self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _reset(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def request_json(self, method: str, path: str, body: Optional[Dict] = None) -> Dict:
+        """Send a request and decode the JSON reply"""
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload else {}
+
+        # A pooled connection may have been closed by the server; retry once
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self._reset()
+                if attempt:
+                    raise
+                continue
+            except HTTP_ERRORS:
+                self._reset()
+                raise
+
+            if response.status >= 400:
+                raise HTTPStatusError(
+                    f"{method} {path} failed: {response.status} {data[:200]!r}", response.status
+                )
+            return json.loads(data) if data else {}
+
+    def stream_json(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Dict] = None,
+        timeout: Optional[float] = 300.0
+    ) -> Iterator[Dict]:
+        """
+        Send a request and yield each object of an NDJSON streaming reply.
+        Uses a dedicated connection so long streams don't tie up the pool.
+        """
+        payload = json.dumps(body).encode() if body is not None else None
+        conn = self._new_connection(timeout)
+        try:
+            conn.request(method, path, body=payload,
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            if response.status >= 400:
+                raise HTTPStatusError(
+                    f"{method} {path} failed: {response.status} {response.read()[:200]!r}", response.status
+                )
+            for line in response:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
+    def close(self) -> None:
+        """Close this thread's pooled connection"""
+        self._reset()
+
 class OllamaManager:
     """
     Handles Ollama model operations including:
-    - Checking model availability
+    - Checking model availability (daemon HTTP API, `ollama list` fallback)
     - Pulling models
     - Validating local installations
     """
 
-    def __init__(self, ollama_path: Optional[str] = None):
-        self.ollama_bin = self._locate_ollama(ollama_path)
+    def __init__(
+        self,
+        ollama_path: Optional[str] = None,
+        host: Optional[str] = None,
+        backend: Literal["auto", "http", "cli"] = "auto",
+        inventory_ttl: float = 30.0
+    ):
+        self._ollama_path = ollama_path
+        self._ollama_bin: Optional[str] = None
+        self.backend = backend
+        self.http = OllamaHTTPClient(host)
+        self.inventory_ttl = inventory_ttl
+        self._inventory: Optional[Set[str]] = None
+        self._inventory_at = 0.0
+        self._inventory_lock = threading.Lock()
         self.required_models = {
             'llm': 'mistral',
             'embeddings': 'nomic-embed-text'
         }
 
+    @property
+    def ollama_bin(self) -> str:
+        """Ollama executable (only located when the CLI is actually needed)"""
+        if self._ollama_bin is None:
+            self._ollama_bin = self._locate_ollama(self._ollama_path)
+        return self._ollama_bin
+
     def _locate_ollama(self, custom_path: Optional[str]) -> str:
         """Find Ollama executable path"""
         if custom_path and Path(custom_path).exists():
@@ -58,32 +209,191 @@ class OllamaManager:
             logger.error(f"Command failed: {e.stderr}")
             raise
 
+    def _http_inventory(self) -> Set[str]:
+        """Installed models from the daemon's /api/tags endpoint"""
+        data = self.http.request_json("GET", "/api/tags")
+        return {
+            normalize_model_name(m.get("name") or m["model"])
+            for m in data.get("models", [])
+        }
+
+    def _cli_inventory(self) -> Set[str]:
+        """Installed models parsed from `ollama list` (NAME is the first column)"""
+        output = self._run_command(f"{self.ollama_bin} list")
+        lines = output.splitlines()[1:]  # Skip header row
+        return {normalize_model_name(line.split()[0]) for line in lines if line.strip()}
+
+    def list_models(self, refresh: bool = False) -> Set[str]:
+        """Installed model names ('name:tag'), cached for inventory_ttl seconds"""
+        with self._inventory_lock:
+            fresh = (
+                self._inventory is not None
+                and time.monotonic() - self._inventory_at < self.inventory_ttl
+            )
+            if fresh and not refresh:
+                return self._inventory
+
+            if self.backend == "cli":
+                inventory = self._cli_inventory()
+            elif self.backend == "http":
+                inventory = self._http_inventory()
+            else:
+                try:
+                    inventory = self._http_inventory()
+                except HTTP_ERRORS as e:
+                    logger.debug(f"Ollama API unavailable ({e}), falling back to CLI")
+                    inventory = self._cli_inventory()
+
+            self._inventory = inventory
+            self._inventory_at = time.monotonic()
+            return inventory
+
+    def invalidate_inventory(self) -> None:
+        """Force the next check to re-read the model list"""
+        with self._inventory_lock:
+            self._inventory = None
+
     def model_exists(self, model_name: str) -> bool:
-        """Check if model is available locally"""
+        """Check if model is available locally (exact name:tag match)"""
         try:
-            models = self._run_command(f"{self.ollama_bin} list")
-            return model_name in models
+            return normalize_model_name(model_name) in self.list_models()
         except Exception:
             return False
 
-    def pull_model(self, model_name: str, quiet: bool = False) -> None:
+    def pull_model(
+        self,
+        model_name: str,
+        quiet: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        retries: int = 3
+    ) -> None:
         """
         Pull a model from Ollama registry
         Args:
             model_name: Name of model (e.g. 'mistral')
             quiet: If True, suppresses output
+            progress: Called with (model, completed_bytes, total_bytes) as layers download
+            retries: Extra attempts after an interrupted download (the daemon
+                keeps partial blobs, so each retry resumes where it stopped)
         """
         if self.model_exists(model_name):
             logger.info(f"Model '{model_name}' already exists")
             return
 
         logger.info(f"Downloading model '{model_name}'...")
-        cmd = f"{self.ollama_bin} pull {model_name}"
-        if quiet:
-            cmd += " > /dev/null 2>&1"
-        self._run_command(cmd)
+        if self.backend == "cli":
+            self._cli_pull(model_name, quiet)
+        else:
+            try:
+                self._http_pull(model_name, progress, retries)
+            except HTTP_ERRORS:
+                if self.backend == "http":
+                    raise
+                logger.debug("Ollama API unavailable, pulling with CLI")
+                self._cli_pull(model_name, quiet)
+        self.invalidate_inventory()
         logger.info(f"Model '{model_name}' ready")
 
+    def _cli_pull(self, model_name: str, quiet: bool) -> None:
+        """Pull via `ollama pull` (output discarded when quiet)"""
+        try:
+            subprocess.run(
+                [self.ollama_bin, "pull", model_name],
+                check=True,
+                stdout=subprocess.DEVNULL if quiet else None,
+                stderr=subprocess.PIPE if quiet else None
+            )
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Command failed: {e.stderr}")
+            raise
+
+    def _http_pull(
+        self,
+        model_name: str,
+        progress: Optional[ProgressCallback],
+        retries: int
+    ) -> None:
+        """
+        Pull via the daemon's streaming /api/pull, retrying interrupted
+        downloads and 5xx replies. An unreachable daemon or a 4xx reply
+        is raised at once (auto mode then falls back to the CLI), as is an
+        error the daemon reports in the stream (e.g. unknown model).
+        """
+        layers: Dict[str, List[int]] = {}  # digest -> [completed, total]
+
+        for attempt in range(retries + 1):
+            try:
+                for event in self.http.stream_json(
+                    "POST", "/api/pull", {"model": model_name, "stream": True}
+                ):
+                    if "error" in event:
+                        raise PullError(f"Pull of '{model_name}' failed: {event['error']}")
+                    if event.get("digest") and event.get("total"):
+                        layers[event["digest"]] = [event.get("completed", 0), event["total"]]
+                        if progress:
+                            progress(
+                                model_name,
+                                sum(done for done, _ in layers.values()),
+                                sum(total for _, total in layers.values())
+                            )
+                    if event.get("status") == "success":
+                        return
+                raise PullInterrupted(f"Pull of '{model_name}' ended before completing")
+            except HTTP_ERRORS + (PullInterrupted,) as e:
+                if attempt == retries or isinstance(e, CONNECT_ERRORS):
+                    raise
+                if isinstance(e, HTTPStatusError) and e.status < 500:
+                    raise
+                done = sum(done for done, _ in layers.values())
+                delay = min(2 ** attempt, 30)
+                logger.warning(
+                    f"Pull of '{model_name}' interrupted at {done} bytes ({e}); "
+                    f"resuming in {delay}s"
+                )
+                time.sleep(delay)
+
+    def pull_models(
+        self,
+        model_names: List[str],
+        max_workers: int = 3,
+        show_progress: bool = True,
+        retries: int = 3
+    ) -> Dict[str, Optional[Exception]]:
+        """
+        Pull several models concurrently on a bounded thread pool.
+        Returns {model: None on success, or the exception that stopped it}.
+        """
+        bars = {}
+        if show_progress:
+            from tqdm import tqdm
+            bars = {
+                name: tqdm(desc=name, unit="B", unit_scale=True, position=i, leave=True)
+                for i, name in enumerate(model_names)
+            }
+
+        def on_progress(name: str, completed: int, total: int) -> None:
+            bar = bars.get(name)
+            if bar is not None:
+                bar.total = total
+                bar.n = completed
+                bar.refresh()
+
+        def pull_one(name: str) -> Optional[Exception]:
+            try:
+                self.pull_model(name, quiet=True, progress=on_progress, retries=retries)
+                return None
+            except Exception as e:
+                logger.error(f"Failed to pull '{name}': {e}")
+                return e
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(model_names)))) as pool:
+                results = dict(zip(model_names, pool.map(pull_one, model_names)))
+        finally:
+            for bar in bars.values():
+                bar.close()
+        return results
+
     def verify_models(self) -> None:
         """Ensure all required models are available"""
         missing = []
@@ -98,10 +408,11 @@ class OllamaManager:
             self._download_missing(missing)
 
     def _download_missing(self, models: list) -> None:
-        """Download missing models with progress"""
-        from tqdm import tqdm
-        for model_type, model_name in tqdm(models, desc="Downloading models"):
-            self.pull_model(model_name, quiet=True)
+        """Download missing models concurrently with per-model progress"""
+        results = self.pull_models([model_name for _, model_name in models])
+        failed = {name: e for name, e in results.items() if e is not None}
+        if failed:
+            raise RuntimeError(f"Failed to download models: {', '.join(failed)}")
 
     def get_model_path(self, model_name: str) -> Path:
         """Get local path to model files"""
@@ -111,6 +422,73 @@ class OllamaManager:
             raise FileNotFoundError(f"Model files not found at {model_file}")
         return model_file
 
+class ModelRegistry:
+    """
+    Process-wide record of verified models:
+    - Each model is checked/pulled at most once per TTL window
+    - One shared OllamaManager instead of one per agent
+    - Thread-safe (per-model locks stop concurrent agents double-pulling)
+    """
+
+    _default: Optional["ModelRegistry"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, manager: Optional[OllamaManager] = None, ttl: float = 300.0):
+        self._manager = manager
+        self.ttl = ttl
+        self._verified: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._model_locks: Dict[str, threading.Lock] = {}
+
+    @classmethod
+    def default(cls) -> "ModelRegistry":
+        """Shared registry for the current process"""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    ttl = float(os.getenv("OLLAMA_VERIFY_TTL", "300"))
+                    cls._default = cls(ttl=ttl)
+        return cls._default
+
+    @property
+    def manager(self) -> OllamaManager:
+        """Lazily created manager shared by all verifications"""
+        if self._manager is None:
+            with self._lock:
+                if self._manager is None:
+                    self._manager = OllamaManager()
+        return self._manager
+
+    def is_verified(self, model_name: str) -> bool:
+        """True if the model was verified within the TTL window"""
+        with self._lock:
+            verified_at = self._verified.get(model_name)
+        return verified_at is not None and time.monotonic() - verified_at < self.ttl
+
+    def ensure(self, model_name: str) -> None:
+        """Make sure a model is available, hitting Ollama only on a cache miss"""
+        if self.is_verified(model_name):
+            return
+
+        with self._lock:
+            model_lock = self._model_locks.setdefault(model_name, threading.Lock())
+
+        with model_lock:
+            # Another thread may have verified it while we waited
+            if self.is_verified(model_name):
+                return
+            self.manager.pull_model(model_name)
+            with self._lock:
+                self._verified[model_name] = time.monotonic()
+
+    def invalidate(self, model_name: Optional[str] = None) -> None:
+        """Forget one (or every) verification so the next ensure() re-checks"""
+        with self._lock:
+            if model_name is None:
+                self._verified.clear()
+            else:
+                self._verified.pop(model_name, None)
+
 # Test cases
 if __name__ == "__main__":
     manager = OllamaManager()
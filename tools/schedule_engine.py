@@ -0,0 +1,197 @@
+# ai/tools/schedule_engine.py
+"""
+Constraint-based study scheduling.
+Tasks are allocated day by day from a priority queue ordered by
+(deadline, priority), i.e. earliest-deadline-first, which meets every
+deadline whenever that is possible under the daily cap. Per-task numbers
+live in NumPy arrays; the caller's task objects are only read, never changed.
+"""
+import heapq
+from datetime import date, datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import numpy as np
+
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+class StudySlot(NamedTuple):
+    day: date
+    task: int          # Index into the input task list
+    topic: str
+    minutes: int
+    priority: str
+    late: bool         # Scheduled after the task's deadline
+
+def subject_weight(topic: str, weights: Dict[str, float]) -> float:
+    """Largest weight whose subject appears in the topic (1.0 if none)"""
+    topic = topic.lower()
+    return max((w for subject, w in weights.items() if subject.lower() in topic), default=1.0)
+
+class SchedulePlan:
+    """
+    Result of build_schedule(): one row per (task, day) allocation,
+    stored as parallel NumPy arrays plus per-task leftovers.
+    """
+
+    def __init__(
+        self,
+        start: date,
+        days: int,
+        max_daily: int,
+        topics: List[str],
+        priorities: List[str],
+        minutes: np.ndarray,
+        last_day: np.ndarray,
+        slot_task: np.ndarray,
+        slot_day: np.ndarray,
+        slot_minutes: np.ndarray
+    ):
+        self.start = start
+        self.days = days
+        self.max_daily = max_daily
+        self.topics = topics
+        self.priorities = priorities
+        self.minutes = minutes          # Weighted minutes each task needs
+        self.last_day = last_day        # Last day index each task may use
+        self.slot_task = slot_task
+        self.slot_day = slot_day
+        self.slot_minutes = slot_minutes
+
+    @property
+    def slot_late(self) -> np.ndarray:
+        return self.slot_day > self.last_day[self.slot_task]
+
+    def scheduled_minutes(self) -> np.ndarray:
+        """Minutes allocated per task"""
+        return np.bincount(self.slot_task, weights=self.slot_minutes, minlength=len(self.topics)).astype(np.int64)
+
+    def unscheduled_minutes(self) -> np.ndarray:
+        """Minutes per task that did not fit in the planning window"""
+        return self.minutes - self.scheduled_minutes()
+
+    def daily_minutes(self) -> np.ndarray:
+        """Study load per day"""
+        return np.bincount(self.slot_day, weights=self.slot_minutes, minlength=self.days).astype(np.int64)
+
+    def slots(self) -> List[StudySlot]:
+        """All allocations, ordered by day"""
+        late = self.slot_late
+        return [
+            StudySlot(
+                day=self.start + timedelta(days=int(d)),
+                task=int(t),
+                topic=self.topics[t],
+                minutes=int(m),
+                priority=self.priorities[t],
+                late=bool(l)
+            )
+            for t, d, m, l in zip(self.slot_task, self.slot_day, self.slot_minutes, late)
+        ]
+
+    def by_day(self) -> Dict[date, List[StudySlot]]:
+        """Slots grouped per day (every day in the window, possibly empty)"""
+        days: Dict[date, List[StudySlot]] = {
+            self.start + timedelta(days=d): [] for d in range(self.days)
+        }
+        for slot in self.slots():
+            days[slot.day].append(slot)
+        return days
+
+    def stats(self) -> Dict:
+        """Totals plus an EDF feasibility check of the deadlines"""
+        order = np.argsort(self.last_day, kind="stable")
+        demand = np.cumsum(self.minutes[order])
+        capacity = (np.clip(self.last_day[order], -1, self.days - 1) + 1) * self.max_daily
+        scheduled = int(self.slot_minutes.sum())
+        return {
+            "tasks": len(self.topics),
+            "slots": len(self.slot_task),
+            "scheduled_minutes": scheduled,
+            "unscheduled_minutes": int(self.minutes.sum()) - scheduled,
+            "late_minutes": int(self.slot_minutes[self.slot_late].sum()),
+            "utilization": scheduled / (self.days * self.max_daily) if self.days else 0.0,
+            "deadlines_feasible": bool(np.all(demand <= capacity))
+        }
+
+def build_schedule(
+    tasks: Sequence,
+    days: int,
+    max_daily: int = 240,
+    subject_weights: Optional[Dict[str, float]] = None,
+    start: Optional[datetime] = None,
+    max_block: Optional[int] = None
+) -> SchedulePlan:
+    """
+    Allocate tasks (anything with topic/duration/priority/deadline) to days.
+    Args:
+        days: Planning window length, starting at `start` (default now)
+        max_daily: Study-minute cap per day
+        subject_weights: Topic substring -> duration multiplier
+        max_block: Most minutes one task may take per day (None = no limit),
+            so long tasks get interleaved with others
+    Tasks that miss their deadline are still scheduled (flagged late);
+    whatever does not fit in the window is reported by unscheduled_minutes().
+    """
+    start = start or datetime.now()
+    weights = subject_weights or {}
+    n = len(tasks)
+
+    topics = [t.topic for t in tasks]
+    priorities = [t.priority for t in tasks]
+    duration = np.fromiter((t.duration for t in tasks), dtype=np.float64, count=n)
+    weight_of = {topic: subject_weight(topic, weights) for topic in set(topics)}
+    weight = np.fromiter((weight_of[topic] for topic in topics), dtype=np.float64, count=n)
+    minutes = np.maximum(np.rint(duration * weight), 0).astype(np.int64)
+    last_day = np.fromiter(
+        ((t.deadline.date() - start.date()).days for t in tasks), dtype=np.int64, count=n
+    )
+    rank = np.fromiter((PRIORITY_RANK.get(p, 1) for p in priorities), dtype=np.int64, count=n)
+
+    remaining = minutes.tolist()  # Python ints: cheaper than NumPy scalars in the loop
+    queue = [(d, r, i) for i, (d, r, m) in enumerate(zip(last_day.tolist(), rank.tolist(), remaining)) if m > 0]
+    heapq.heapify(queue)
+    block = max_block or max_daily
+
+    slot_task: List[int] = []
+    slot_day: List[int] = []
+    slot_minutes: List[int] = []
+    for day in range(days):
+        if not queue:
+            break
+        capacity = max_daily
+        deferred = []  # Tasks that hit max_block today; back in the queue tomorrow
+        while capacity > 0 and queue:
+            entry = heapq.heappop(queue)
+            i = entry[2]
+            alloc = min(remaining[i], capacity, block)
+            slot_task.append(i)
+            slot_day.append(day)
+            slot_minutes.append(alloc)
+            remaining[i] -= alloc
+            capacity -= alloc
+            if remaining[i] > 0:
+                deferred.append(entry)
+        for entry in deferred:
+            heapq.heappush(queue, entry)
+
+    return SchedulePlan(
+        start=start.date(),
+        days=days,
+        max_daily=max_daily,
+        topics=topics,
+        priorities=priorities,
+        minutes=minutes,
+        last_day=last_day,
+        slot_task=np.asarray(slot_task, dtype=np.int64),
+        slot_day=np.asarray(slot_day, dtype=np.int64),
+        slot_minutes=np.asarray(slot_minutes, dtype=np.int64)
+    )
+
+def format_schedule(plan: SchedulePlan, break_minutes: int = 15) -> Dict[str, List[str]]:
+    """Legacy {"YYYY-MM-DD": ["topic (Nmin)", ..., "15min break"]} view of a plan"""
+    schedule = {}
+    for day, slots in plan.by_day().items():
+        entries = [f"{s.topic} ({s.minutes}min)" for s in slots]
+        if entries and break_minutes:
+            entries.append(f"{break_minutes}min break")
+        schedule[day.strftime("%Y-%m-%d")] = entries
+    return schedule
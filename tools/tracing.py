@@ -0,0 +1,404 @@
+# ai/tools/tracing.py
+"""
+Opt-in instrumentation: timing spans and counters fanned out to sinks.
+Disabled by default, in which case span() hands back one shared no-op
+object and count() returns at once, so instrumented code pays a function
+call. Enable with TRACING=1 (in-memory histograms) and/or TRACE_JSONL_PATH,
+or programmatically with Tracer.default().enable(sink, ...).
+"""
+import atexit
+import contextvars
+import functools
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Histogram bucket upper bounds in seconds (cumulative, Prometheus-style)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_trace_ids = itertools.count(1)
+
+class Span:
+    """
+    One timed operation. Attributes (token counts, cache hits, sizes) are
+    set with set(); spans opened inside another share its trace id.
+    """
+
+    __slots__ = ("tracer", "name", "attrs", "trace", "parent", "start", "seconds", "error", "_outer")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.error: Optional[str] = None
+        self.seconds = 0.0
+        outer = _current.get()
+        self._outer = outer
+        self.trace = outer.trace if outer is not None else next(_trace_ids)
+        self.parent = outer.name if outer is not None else None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def fail(self, exc: BaseException) -> None:
+        """Mark the span failed for an exception the caller handles itself"""
+        self.error = type(exc).__name__
+
+    def __enter__(self) -> "Span":
+        _current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.seconds = time.perf_counter() - self.start
+        _current.set(self._outer)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.tracer._emit(self)
+        return False
+
+class _NoopSpan:
+    """What span() returns while tracing is off"""
+
+    __slots__ = ()
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+    def fail(self, exc: BaseException) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+class Tracer:
+    """
+    Routes spans and counters to sinks:
+    - HistogramSink: in-memory latency histograms, summary() and a
+      Prometheus text dump
+    - JSONLSink: one JSON object per event, appended to a file
+    Any object with record_span(span), record_count(name, value, labels)
+    and flush() works as a sink.
+    """
+
+    _default: Optional["Tracer"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, sinks: Sequence = ()):
+        self.sinks: List = list(sinks)
+        self.enabled = bool(self.sinks)
+
+    @classmethod
+    def default(cls) -> "Tracer":
+        """Process-wide tracer (TRACING=1 -> HistogramSink, TRACE_JSONL_PATH -> JSONLSink)"""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    sinks = []
+                    if os.getenv("TRACING", "") not in ("", "0"):
+                        sinks.append(HistogramSink())
+                    if os.getenv("TRACE_JSONL_PATH"):
+                        sinks.append(JSONLSink(os.environ["TRACE_JSONL_PATH"]))
+                    cls._default = cls(sinks)
+        return cls._default
+
+    def enable(self, *sinks) -> None:
+        """Add sinks and start recording"""
+        self.sinks.extend(sinks)
+        self.enabled = bool(self.sinks)
+
+    def disable(self) -> None:
+        """Flush and detach every sink"""
+        self.flush()
+        self.sinks = []
+        self.enabled = False
+
+    def sink(self, kind: type):
+        """First attached sink of the given type (None if absent)"""
+        return next((s for s in self.sinks if isinstance(s, kind)), None)
+
+    def span(self, name: str, **attrs: Any):
+        """Context manager timing one operation"""
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def record(self, name: str, seconds: float, error: Optional[str] = None, **attrs: Any) -> None:
+        """Report a span timed elsewhere (e.g. by a callback)"""
+        if not self.enabled:
+            return
+        span = Span(self, name, attrs)
+        span.seconds = seconds
+        span.error = error
+        self._emit(span)
+
+    def count(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Increment a counter"""
+        if not self.enabled:
+            return
+        for sink in self.sinks:
+            sink.record_count(name, value, labels)
+
+    def _emit(self, span: Span) -> None:
+        for sink in self.sinks:
+            sink.record_span(span)
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush()
+
+def span(name: str, **attrs: Any):
+    """Span on the default tracer"""
+    return Tracer.default().span(name, **attrs)
+
+def count(name: str, value: float = 1, **labels: Any) -> None:
+    """Counter on the default tracer"""
+    Tracer.default().count(name, value, **labels)
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator: time every call of the function as span `name`"""
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = Tracer.default()
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class HistogramSink:
+    """
+    In-memory per-span latency histograms (fixed buckets, so memory is
+    constant) plus counters. Numeric span attributes are summed per span
+    name, e.g. total prompt_tokens of "llm"; booleans count True values.
+    """
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS):
+        self.buckets = tuple(buckets)
+        self._spans: Dict[str, Dict] = {}
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        self._lock = threading.Lock()
+
+    def record_span(self, span: Span) -> None:
+        with self._lock:
+            h = self._spans.get(span.name)
+            if h is None:
+                h = self._spans[span.name] = {
+                    "buckets": [0] * (len(self.buckets) + 1), "count": 0, "sum": 0.0,
+                    "max": 0.0, "errors": 0, "totals": {}
+                }
+            h["buckets"][bisect_left(self.buckets, span.seconds)] += 1
+            h["count"] += 1
+            h["sum"] += span.seconds
+            h["max"] = max(h["max"], span.seconds)
+            if span.error is not None:
+                h["errors"] += 1
+            totals = h["totals"]
+            for key, value in span.attrs.items():
+                if isinstance(value, (int, float)):
+                    totals[key] = totals.get(key, 0) + value
+
+    def record_count(self, name: str, value: float, labels: Dict[str, Any]) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def flush(self) -> None:
+        pass
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    def _quantile(self, h: Dict, q: float) -> float:
+        """Estimate from the buckets, interpolating linearly inside one"""
+        rank = q * h["count"]
+        seen = 0
+        for i, n in enumerate(h["buckets"]):
+            if n and seen + n >= rank:
+                lo = self.buckets[i - 1] if i else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else h["max"]
+                return min(lo + (hi - lo) * (rank - seen) / n, h["max"])
+            seen += n
+        return h["max"]
+
+    def summary(self) -> Dict[str, Dict]:
+        """span name -> count, mean/p50/p95/p99/max in ms, errors and attribute totals"""
+        with self._lock:
+            return {
+                name: {
+                    "count": h["count"],
+                    "mean_ms": h["sum"] / h["count"] * 1000,
+                    "p50_ms": self._quantile(h, 0.5) * 1000,
+                    "p95_ms": self._quantile(h, 0.95) * 1000,
+                    "p99_ms": self._quantile(h, 0.99) * 1000,
+                    "max_ms": h["max"] * 1000,
+                    "errors": h["errors"],
+                    **h["totals"]
+                }
+                for name, h in sorted(self._spans.items())
+            }
+
+    def counters(self) -> Dict[str, float]:
+        """"name{label=value,...}" -> total"""
+        with self._lock:
+            return {
+                name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else ""): value
+                for (name, labels), value in sorted(self._counters.items())
+            }
+
+    def prometheus_text(self, prefix: str = "studybuddy") -> str:
+        """Everything recorded so far in the Prometheus text exposition format"""
+        def labels(**pairs) -> str:
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items()) + "}"
+
+        lines = [
+            f"# HELP {prefix}_span_seconds Duration of instrumented operations",
+            f"# TYPE {prefix}_span_seconds histogram"
+        ]
+        error_lines, attr_lines = [], []
+        with self._lock:
+            for name, h in sorted(self._spans.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), h["buckets"]):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{prefix}_span_seconds_bucket{labels(span=name, le=le)} {cumulative}")
+                lines.append(f"{prefix}_span_seconds_sum{labels(span=name)} {h['sum']}")
+                lines.append(f"{prefix}_span_seconds_count{labels(span=name)} {h['count']}")
+                error_lines.append(f"{prefix}_span_errors_total{labels(span=name)} {h['errors']}")
+                for attr, total in sorted(h["totals"].items()):
+                    attr_lines.append(f"{prefix}_span_attribute_total{labels(span=name, attribute=attr)} {total}")
+            if error_lines:
+                lines.append(f"# TYPE {prefix}_span_errors_total counter")
+                lines.extend(error_lines)
+            if attr_lines:
+                lines.append(f"# TYPE {prefix}_span_attribute_total counter")
+                lines.extend(attr_lines)
+            family = None
+            for (name, pairs), value in sorted(self._counters.items()):
+                metric = f"{prefix}_{_metric_name(name)}_total"
+                if metric != family:
+                    lines.append(f"# TYPE {metric} counter")
+                    family = metric
+                lines.append(f"{metric}{labels(**dict(pairs)) if pairs else ''} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, prefix: str = "studybuddy") -> None:
+        """Atomic dump for a node-exporter style textfile collector"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(self.prometheus_text(prefix))
+        os.replace(tmp, path)
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+class JSONLSink:
+    """
+    Appends one JSON object per span/counter to a file. Lines are buffered
+    and written buffer_size at a time (and on flush/exit).
+    """
+
+    def __init__(self, path: str, buffer_size: int = 256):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.buffer_size = buffer_size
+        self._lines: List[str] = []
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def _append(self, event: Dict) -> None:
+        line = json.dumps(event, default=str)
+        with self._lock:
+            self._lines.append(line)
+            if len(self._lines) < self.buffer_size:
+                return
+            lines, self._lines = self._lines, []
+            self._write(lines)
+
+    def _write(self, lines: List[str]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def record_span(self, span: Span) -> None:
+        self._append({
+            "ts": time.time(),
+            "type": "span",
+            "name": span.name,
+            "ms": span.seconds * 1000,
+            "trace": span.trace,
+            "parent": span.parent,
+            "error": span.error,
+            **span.attrs
+        })
+
+    def record_count(self, name: str, value: float, labels: Dict[str, Any]) -> None:
+        self._append({"ts": time.time(), "type": "count", "name": name, "value": value, **labels})
+
+    def flush(self) -> None:
+        with self._lock:
+            lines, self._lines = self._lines, []
+            if lines:
+                self._write(lines)
+
+@functools.lru_cache(maxsize=None)
+def _llm_handler_class():
+    # Built on first use so importing this module never pulls in LangChain
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMSpanHandler(BaseCallbackHandler):
+        """Records an "llm" span per model call, with Ollama's token counts"""
+
+        run_inline = True  # Same thread/context as the caller, so spans nest
+
+        def __init__(self, tracer: Tracer):
+            self.tracer = tracer
+            self._started: Dict[Any, float] = {}
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+            self._started[run_id] = time.perf_counter()
+
+        def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+            start = self._started.pop(run_id, None)
+            if start is None:
+                return
+            generations = response.generations[0] if response.generations else []
+            info = (generations[0].generation_info or {}) if generations else {}
+            self.tracer.record(
+                "llm", time.perf_counter() - start,
+                prompt_tokens=info.get("prompt_eval_count") or 0,
+                output_tokens=info.get("eval_count") or 0
+            )
+
+        def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+            start = self._started.pop(run_id, None)
+            if start is not None:
+                self.tracer.record("llm", time.perf_counter() - start, error=type(error).__name__)
+
+    return LLMSpanHandler
+
+def llm_span_handler(tracer: Tracer):
+    """LangChain callback handler that reports LLM calls to `tracer`"""
+    return _llm_handler_class()(tracer)